@@ -0,0 +1,91 @@
+import context
+import io
+import time
+import argparse
+import contextlib
+import numpy as np
+from random import seed
+from multiprocessing import Process, Queue
+from queue import Empty
+from schedule.NFLSchedule import NFLSchedule
+from solver.genetic_algorithm import genetic_algorithm
+from solver.local_search import simulated_annealing
+
+# argument parser for the benchmark
+parser = argparse.ArgumentParser(description='Compare the time to the first playable schedule of the search engines.')
+parser.add_argument('-r',
+            dest='num_runs',
+            required=False,
+            type=int,
+            default=5,
+            help='The number of runs of each engine, each with its own seed')
+parser.add_argument('-t',
+            dest='time_limit',
+            required=False,
+            type=float,
+            default=600,
+            help='The number of seconds before a run is stopped')
+
+# search engines, each returning a list of playable schedules
+engines = {
+	'ga': lambda base: genetic_algorithm(base, num_results=1),
+	'sa': lambda base: simulated_annealing(base, num_results=1)
+}
+
+def run(engine, run_seed, times):
+	"""
+	Times a search engine to the first playable schedule, without its progress output.
+	
+	Args:
+	  engine: the name of the engine
+	  run_seed: the random seed
+	  times: queue to put the time and the score of the schedule
+	"""
+	seed(run_seed)
+	np.random.seed(run_seed)
+	start = time.perf_counter()
+	with contextlib.redirect_stdout(io.StringIO()):
+		schedules = engines[engine](NFLSchedule())
+	times.put((time.perf_counter() - start, schedules[0].get_score()))
+
+
+def benchmark(engine, run_seed, time_limit):
+	"""
+	Times a search engine in its own process, so it can be stopped at the time limit.
+	
+	Args:
+	  engine: the name of the engine
+	  run_seed: the random seed
+	  time_limit: the number of seconds before the run is stopped
+	
+	Return:
+	  The time and the score of the schedule, None if the run was stopped.
+	"""
+	times = Queue()
+	process = Process(target=run, args=(engine, run_seed, times))
+	process.start()
+	try:
+		return times.get(timeout=time_limit)
+	except Empty:
+		return None
+	finally:
+		process.terminate()
+		process.join()
+
+
+if __name__ == '__main__':
+	
+	args = parser.parse_args()
+	
+	print('engine - seed -  seconds -  score')
+	for engine in engines:
+		times = []
+		for run_seed in range(args.num_runs):
+			result = benchmark(engine, run_seed, args.time_limit)
+			if result is None:
+				print('%6s - %4d -  stopped -      -' % (engine, run_seed))
+				times.append(args.time_limit)
+			else:
+				print('%6s - %4d - %8.2f - %6.2f' % (engine, run_seed, result[0], result[1]))
+				times.append(result[0])
+		print('%6s - median  %8.2f' % (engine, np.median(times)))
@@ -0,0 +1,133 @@
+import context
+import os
+import time
+import argparse
+import tempfile
+import numpy as np
+from storage.schedule_store import SQLiteScheduleStore, get_store, encode_schedule
+from schedule.constants import NUM_MATCHUPS
+
+# year of the benchmark schedules, so only they are deleted after each run
+year = 'benchmark'
+
+# argument parser for the benchmark
+parser = argparse.ArgumentParser(description='Compare inserting schedules one at a time, batched, with the schedule store, and with its bulk load, on sqlite, and on mysql with -p.')
+parser.add_argument('-n',
+            dest='num_schedules',
+            required=False,
+            type=int,
+            default=100000,
+            help='The number of schedules to insert')
+parser.add_argument('-p',
+            dest='password',
+            required=False,
+            type=str,
+            help='the rds password, to also benchmark the rds database')
+
+def get_rows(num_schedules):
+	"""
+	Gets rows of random schedules, in the benchmark year.
+	
+	Args:
+	  num_schedules: the number of schedules
+	
+	Return:
+	  A list of (schedule, year, score) rows.
+	"""
+	return [(encode_schedule(np.random.permutation(NUM_MATCHUPS).tolist()), year, -float(i)) for i in range(num_schedules)]
+
+
+def insert_one_at_a_time(store, rows):
+	"""
+	Inserts rows the way the scripts did before the schedule store, a cursor and
+	 an execute of an INSERT of the row for each row, and one commit.
+	
+	Args:
+	  store: the schedule store, for its connection and placeholder
+	  rows: the rows
+	"""
+	conn = store.connection()
+	for row in rows:
+		cursor = conn.cursor()
+		cursor.execute(insert_sql(store), row)
+		cursor.close()
+	conn.commit()
+
+
+def insert_batched(store, rows):
+	"""
+	Inserts rows with the same INSERT as insert_one_at_a_time, batch_size rows per
+	 executemany, and one commit, without the fingerprints and facets of the store.
+	
+	Args:
+	  store: the schedule store, for its connection, placeholder and batch size
+	  rows: the rows
+	"""
+	conn = store.connection()
+	cursor = conn.cursor()
+	for i in range(0, len(rows), store.batch_size):
+		cursor.executemany(insert_sql(store), rows[i:i+store.batch_size])
+	cursor.close()
+	conn.commit()
+
+
+def insert_sql(store):
+	"""
+	Return:
+	  The INSERT of a (schedule, year, score) row, with the placeholder of the store.
+	"""
+	return 'INSERT INTO schedules (schedule, year, score) VALUES (%s, %s, %s)' % ((store.placeholder,) * 3)
+
+
+def benchmark(backend, store, rows):
+	"""
+	Times inserting the rows one at a time, batched, with the store, and bulk
+	 loading them with the store, each into an empty table, and prints the
+	 seconds and rows per second of each. The store also reads the fingerprints
+	 of the rows and counts the facets, so it is timed apart from the batched
+	 insert.
+	
+	Args:
+	  backend: the name of the backend
+	  store: the schedule store, with an empty table
+	  rows: the rows
+	"""
+	for path, insert in [('one at a time', insert_one_at_a_time),
+						 ('batched', insert_batched),
+						 ('store', lambda store, rows: store.insert_schedules(rows)),
+						 ('store bulk load', lambda store, rows: store.load_schedules(rows))]:
+		start = time.perf_counter()
+		insert(store, rows)
+		seconds = time.perf_counter() - start
+		clear(store)
+		print('%-7s - %-15s - %7d - %9.2f - %9.0f' % (backend, path, len(rows), seconds, len(rows) / seconds))
+
+
+def clear(store):
+	"""
+	Deletes the benchmark schedules of a store.
+	
+	Args:
+	  store: the schedule store
+	"""
+	conn = store.connection()
+	cursor = conn.cursor()
+	cursor.execute('DELETE FROM schedules WHERE year = %s' % store.placeholder, (year,))
+	cursor.close()
+	conn.commit()
+
+
+if __name__ == '__main__':
+	
+	args = parser.parse_args()
+	rows = get_rows(args.num_schedules)
+	
+	print('backend - path            - rows    - seconds   - rows/s')
+	with tempfile.TemporaryDirectory() as directory:
+		with SQLiteScheduleStore(os.path.join(directory, 'schedules.db')) as store:
+			benchmark('sqlite', store, rows)
+	print('sqlite is a local file, without the round trip per statement that batching saves on mysql')
+	
+	if args.password is not None:
+		with get_store(args.password) as store:
+			benchmark('mysql', store, rows)
@@ -0,0 +1,238 @@
+import context
+import io
+import sys
+import json
+import time
+import argparse
+import platform
+import contextlib
+import numpy as np
+from random import seed
+from engines import engines, benchmark
+from schedule.NFLSchedule import NFLSchedule
+from schedule.score.score_calculator import get_score, get_constraints, get_heuristic, get_scores, score_version
+from schedule.score.constraints.one_game_per_week import one_game_per_week
+from schedule.score.constraints.fixed_matchup import fixed_matchup
+from schedule.score.constraints.fixed_home_game import fixed_home_game
+from schedule.score.constraints.shared_stadium import shared_stadium
+from schedule.score.heuristics.consecutive_games import consecutive_road_games
+from schedule.score.heuristics.international_bye import no_bye_after_international
+from schedule.constants import london_games, thanksgiving_gameslots, JETS, GIANTS, RAIDERS_SEAHAWKS, LIONS, NUM_MATCHUPS
+from solver.population import Population
+from solver.genetic_algorithm import next_generation
+
+# argument parser for the benchmark
+parser = argparse.ArgumentParser(description='Time the scoring, the schedule operations and the search engines, as json, to track regressions.')
+parser.add_argument('-s',
+            dest='seed',
+            required=False,
+            type=int,
+            default=0,
+            help='The random seed, the same seed times the same schedules')
+parser.add_argument('-n',
+            dest='num_calls',
+            required=False,
+            type=int,
+            default=1000,
+            help='The number of timed calls of each operation')
+parser.add_argument('-g',
+            dest='num_generations',
+            required=False,
+            type=int,
+            default=50,
+            help='The number of timed generations of the genetic algorithm')
+parser.add_argument('-r',
+            dest='num_runs',
+            required=False,
+            type=int,
+            default=1,
+            help='The number of runs to the first playable schedule of each engine, 0 to skip them')
+parser.add_argument('-t',
+            dest='time_limit',
+            required=False,
+            type=float,
+            default=600,
+            help='The number of seconds before a run to the first playable schedule is stopped')
+parser.add_argument('-o',
+            dest='output',
+            required=False,
+            type=str,
+            help='The file to write the json results to, otherwise they are printed')
+
+def time_calls(function, num_calls, setup=None):
+	"""
+	Times calls of a function, each timed on its own so a setup can run between calls.
+	
+	Args:
+	  function: the function, called without arguments
+	  num_calls: the number of calls
+	  setup: an optional function called before each call, not timed
+	
+	Return:
+	  A dictionary of the number of calls, and the median, mean and minimum seconds per call.
+	"""
+	times = np.empty(num_calls)
+	for i in range(num_calls):
+		if setup is not None:
+			setup()
+		start = time.perf_counter()
+		function()
+		times[i] = time.perf_counter() - start
+	return {'calls': num_calls, 'median': float(np.median(times)), 'mean': float(np.mean(times)), 'min': float(np.min(times))}
+
+
+def get_schedule():
+	"""
+	Gets a random schedule, with the score and the team by week counts set.
+	
+	Return:
+	  The schedule.
+	"""
+	schedule = NFLSchedule()
+	schedule.shuffle(NUM_MATCHUPS)
+	schedule.get_score()
+	return schedule
+
+
+def benchmark_scoring(num_calls):
+	"""
+	Times the score and each constraint and heuristic, on a random schedule.
+	
+	Args:
+	  num_calls: the number of calls of each function
+	
+	Return:
+	  A dictionary of the timings of each function.
+	"""
+	
+	schedule = get_schedule()
+	
+	# score from scratch, without the score kept by the schedule
+	results = {'get_score': time_calls(schedule.get_score, num_calls, schedule._reset_score),
+			   'score_calculator.get_score': time_calls(lambda: get_score(schedule), num_calls),
+			   'get_constraints': time_calls(lambda: get_constraints(schedule), num_calls),
+			   'get_heuristic': time_calls(lambda: get_heuristic(schedule), num_calls)}
+	
+	# constraints
+	results['one_game_per_week'] = time_calls(lambda: one_game_per_week(schedule), num_calls)
+	results['fixed_matchup'] = time_calls(lambda: fixed_matchup(schedule, RAIDERS_SEAHAWKS, london_games[0]), num_calls)
+	results['fixed_home_game'] = time_calls(lambda: fixed_home_game(schedule, LIONS, thanksgiving_gameslots[0]), num_calls)
+	results['shared_stadium'] = time_calls(lambda: shared_stadium(schedule, JETS, GIANTS), num_calls)
+	
+	# heuristics
+	results['consecutive_road_games'] = time_calls(lambda: consecutive_road_games(schedule), num_calls)
+	results['no_bye_after_international'] = time_calls(lambda: no_bye_after_international(schedule), num_calls)
+	
+	# batch score of a population of random schedules, per schedule
+	matchups = np.array([get_schedule().get_matchups() for _ in range(128)])
+	batch = time_calls(lambda: get_scores(matchups), max(num_calls // 100, 1))
+	results['get_scores_per_schedule'] = dict(batch, median=batch['median'] / len(matchups), mean=batch['mean'] / len(matchups), min=batch['min'] / len(matchups))
+	
+	return results
+
+
+def benchmark_operations(num_calls):
+	"""
+	Times the schedule operations, on random schedules.
+	
+	Args:
+	  num_calls: the number of calls of each operation
+	
+	Return:
+	  A dictionary of the timings of each operation.
+	"""
+	
+	s1 = get_schedule()
+	s2 = get_schedule()
+	
+	# the swap is scored incrementally, as in the local search
+	def swap_and_score():
+		s1.swap(*np.random.randint(0, NUM_MATCHUPS, 2))
+		s1.get_score()
+	
+	# equality from scratch, without the fingerprints kept by the schedules
+	def reset_fingerprints():
+		s1._fingerprint = None
+		s2._fingerprint = None
+	
+	return {'shuffle': time_calls(lambda: s1.shuffle(1), num_calls),
+			'swap': time_calls(lambda: s1.swap(*np.random.randint(0, NUM_MATCHUPS, 2)), num_calls),
+			'swap_and_score': time_calls(swap_and_score, num_calls),
+			'copy': time_calls(s1.copy, num_calls),
+			'reproduce': time_calls(lambda: NFLSchedule.reproduce(s1, s2), num_calls),
+			'__eq__': time_calls(lambda: s1 == s2, num_calls, reset_fingerprints),
+			'__eq__cached': time_calls(lambda: s1 == s2, num_calls)}
+
+
+def benchmark_generations(num_generations):
+	"""
+	Times generations of the genetic algorithm, with the default population.
+	
+	Args:
+	  num_generations: the number of generations
+	
+	Return:
+	  A dictionary of the number of generations, the seconds, the generations per second
+	   and the best score, the same for the same seed.
+	"""
+	population = Population(NFLSchedule(), 128, 256)
+	start = time.perf_counter()
+	with contextlib.redirect_stdout(io.StringIO()):
+		for _ in range(num_generations):
+			next_generation(population, 16)
+	seconds = time.perf_counter() - start
+	return {'generations': num_generations, 'seconds': seconds, 'generations_per_second': num_generations / seconds,
+			'best_score': float(population.scores[0])}
+
+
+def benchmark_feasible(num_runs, run_seed, time_limit):
+	"""
+	Times each search engine to the first playable schedule, see engines.py.
+	
+	Args:
+	  num_runs: the number of runs of each engine, each with its own seed
+	  run_seed: the seed of the first run
+	  time_limit: the number of seconds before a run is stopped
+	
+	Return:
+	  A dictionary of the runs of each engine, the seconds and the score, None if the run was stopped.
+	"""
+	results = dict()
+	for engine in engines:
+		results[engine] = []
+		for i in range(num_runs):
+			result = benchmark(engine, run_seed + i, time_limit)
+			results[engine].append({'seed': run_seed + i,
+									'seconds': None if result is None else result[0],
+									'score': None if result is None else float(result[1])})
+	return results
+
+
+if __name__ == '__main__':
+
+	args = parser.parse_args()
+	
+	# the same seed for each group of benchmarks, so a group times the same
+	#  schedules whichever groups run before it
+	def reseed():
+		seed(args.seed)
+		np.random.seed(args.seed)
+	
+	results = {'python': platform.python_version(),
+			   'numpy': np.__version__,
+			   'score_version': score_version,
+			   'seed': args.seed}
+	reseed()
+	results['scoring'] = benchmark_scoring(args.num_calls)
+	reseed()
+	results['operations'] = benchmark_operations(args.num_calls)
+	reseed()
+	results['genetic_algorithm'] = benchmark_generations(args.num_generations)
+	results['first_feasible'] = benchmark_feasible(args.num_runs, args.seed, args.time_limit)
+	
+	if args.output is None:
+		json.dump(results, sys.stdout, indent=2)
+		print()
+	else:
+		with open(args.output, 'w') as f:
+			json.dump(results, f, indent=2)
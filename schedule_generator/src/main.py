@@ -1,17 +1,26 @@
-from solver.genetic_algorithm import genetic_algorithm
+from solver.genetic_algorithm import genetic_algorithm_stream, island_genetic_algorithm_stream
+from solver.local_search import simulated_annealing_stream
+from solver.metrics import Metrics
 from schedule.NFLSchedule import NFLSchedule
+from storage.schedule_store import get_store, encode_schedule, decode_schedule
 import csv
-import pymysql
 import argparse
-from random import randint
+from itertools import islice
+from contextlib import closing
 
 # argument parser for password
 parser = argparse.ArgumentParser(description='Supply the password.')
 parser.add_argument('-p',
             dest='password',
-            required=True,
+            required=False,
             type=str,
             help='the rds password')
+parser.add_argument('-d',
+            dest='sqlite_path',
+            required=False,
+            type=str,
+            default=None,
+            help='A SQLite file to store the schedules in, instead of the rds database')
 parser.add_argument('-n',
             dest='num_results',
             required=True,
@@ -22,14 +31,105 @@ parser.add_argument('-s',
             required=False,
             type=bool,
             help='True for highest scoring seed, False for random seed')
+parser.add_argument('-e',
+            dest='engine',
+            required=False,
+            type=str,
+            default='ga',
+            choices=['ga', 'sa'],
+            help='The search engine, ga for the genetic algorithm, sa for simulated annealing')
+parser.add_argument('-i',
+            dest='num_islands',
+            required=False,
+            type=int,
+            default=1,
+            help='The number of islands, each evolved in its own process')
+parser.add_argument('-m',
+            dest='migration_interval',
+            required=False,
+            type=int,
+            default=50,
+            help='The number of generations between migrations of the islands')
+parser.add_argument('-c',
+            dest='cache_size',
+            required=False,
+            type=int,
+            default=0,
+            help='The number of scores to keep in the score cache, 0 for no cache')
+parser.add_argument('-b',
+            dest='batch_size',
+            required=False,
+            type=int,
+            default=100,
+            help='The number of schedules to write to the database at a time')
+parser.add_argument('-k',
+            dest='checkpoint_path',
+            required=False,
+            type=str,
+            default=None,
+            help='The file to checkpoint the genetic algorithm to, with one island only, not with simulated annealing')
+parser.add_argument('--checkpoint-interval',
+            dest='checkpoint_interval',
+            required=False,
+            type=int,
+            default=100,
+            help='The number of generations between checkpoints')
+parser.add_argument('--resume',
+            dest='resume',
+            action='store_true',
+            help='Continue from the checkpoint, if it exists')
+parser.add_argument('--metrics',
+            dest='metrics_path',
+            required=False,
+            type=str,
+            default=None,
+            help='The file to write the scoring and search metrics to, with simulated annealing or one island only')
+parser.add_argument('--metrics-format',
+            dest='metrics_format',
+            required=False,
+            type=str,
+            default='json',
+            choices=['json', 'prometheus'],
+            help='json to append json lines, prometheus to replace the file with prometheus text')
+parser.add_argument('--metrics-interval',
+            dest='metrics_interval',
+            required=False,
+            type=float,
+            default=60,
+            help='The minimum number of seconds between metrics writes')
 args = parser.parse_args()
+if args.metrics_path is not None and args.engine == 'ga' and args.num_islands > 1:
+	parser.error('--metrics is not supported with more than one island')
+if (args.checkpoint_path is not None or args.resume) and (args.engine != 'ga' or args.num_islands > 1):
+	parser.error('-k and --resume are only supported by the genetic algorithm with one island')
+if args.resume and args.checkpoint_path is None:
+	parser.error('--resume needs the checkpoint file, -k')
+
+def write_schedules(store, schedules):
+	"""
+	Writes schedules to the store, or appends them to the results csv if there is an error.
+	
+	Args:
+	  store: the schedule store
+	  schedules: a list of schedules
+	"""
+	
+	# try and write to the store
+	try:
+		store.insert_schedules([(encode_schedule(schedule.get_matchups()), '2018', schedule.get_score()) for schedule in schedules])
+	
+	# save the results to a csv if there was an error
+	except:
+		
+		# result filename
+		result_filename = './../results/results.csv'
+		
+		# write the results
+		with open(result_filename, 'a+') as csvfile:
+			writer = csv.writer(csvfile, delimiter=',')
+			for schedule in schedules:
+				writer.writerow(schedule.get_matchups())
 
-# connection information
-host='nflschedules.cd7ko38smnnq.us-west-1.rds.amazonaws.com'
-port=3306
-dbname='nflschedules'
-user='nflschedules'
-password=args.password
 
 if __name__ == '__main__':
 
@@ -39,56 +139,49 @@ if __name__ == '__main__':
 	# shuffles to make for each individual in the initial population
 	init_shuffles = 256
 	
+	# schedule store, the connection is reused for all writes
+	store = get_store(args.password, args.sqlite_path)
+	
 	# set the base matchups to one from the database
 	if args.seed is not None:
 		# TODO fetch highest score
-		try:
-			# connect to the database
-			conn = pymysql.connect(host, user=user, port=port, passwd=password, db=dbname)
-			with conn.cursor() as cursor:
-				# get all matchups from the database, select one at random and set to the base
-				cursor.execute('SELECT * FROM schedules')
-				all_matchups = cursor.fetchall()
-				matchup = all_matchups[randint(0,len(all_matchups)-1)][0]
-				base.set_matchups([int(i) for i in matchup.split(',')])
-				init_shuffles = 0
-		finally:
-			conn.close()
+		# select one schedule at random, and set to the base
+		row = store.get_random_schedule()
+		if row is None:
+			raise Exception("there are no schedules to seed from")
+		base.set_matchups(decode_schedule(row[0]))
+		init_shuffles = 0
 	
-	# get schedules
-	schedules = genetic_algorithm(base, pop_size=128, num_elitist=16, num_results=args.num_results, init_shuffles=init_shuffles)
-	
-	# try and write to database
-	try:
-		
-		# connect to the database
-		conn = pymysql.connect(host, user=user, port=port, passwd=password, db=dbname)
-		
-		# sql command
-		sql = 'INSERT INTO schedules (schedule, year, score) VALUES (%s, %s, %s) ON DUPLICATE KEY UPDATE score=%s'
-		
-		# write each schedule to database
-		for schedule in schedules:
-			with conn.cursor() as cursor:
-				cursor.execute(sql, (",".join(map(str,schedule.get_matchups().tolist())), '2018', schedule.get_score(), schedule.get_score()))
+	# metrics, None for no metrics
+	metrics = None
+	if args.metrics_path is not None:
+		metrics = Metrics(args.metrics_path, args.metrics_format, args.metrics_interval)
 	
-		# commit
-		conn.commit()
+	# schedules found, but not yet written
+	batch = []
 	
-	# save the results to a csv if there was an error
-	except:
-		
-		# result filename
-		result_filename = './../results/results.csv'
-
-		# write the results
-		with open(result_filename, 'a+') as csvfile:
-			writer = csv.writer(csvfile, delimiter=',')
-			for schedule in schedules:
-				writer.writerow(schedule.get_matchups())
+	def flush():
+		"""
+		Writes the schedules found so far, so they are durable before a checkpoint records them as found.
+		"""
+		if batch:
+			write_schedules(store, batch)
+			batch.clear()
 	
-	finally:
-		
-		# close the connection
-		conn.close()
+	# schedules, generated as they are found
+	if args.engine == 'sa':
+		schedules = simulated_annealing_stream(base, init_shuffles=init_shuffles, metrics=metrics)
+	elif args.num_islands > 1:
+		schedules = island_genetic_algorithm_stream(base, num_islands=args.num_islands, migration_interval=args.migration_interval, pop_size=128, num_elitist=16, init_shuffles=init_shuffles, cache_size=args.cache_size)
+	else:
+		schedules = genetic_algorithm_stream(base, pop_size=128, num_elitist=16, init_shuffles=init_shuffles, cache_size=args.cache_size,
+											 checkpoint_path=args.checkpoint_path, checkpoint_interval=args.checkpoint_interval,
+											 resume=args.resume, on_checkpoint=flush, metrics=metrics)
 	
+	# write the schedules in batches, as they are found
+	with closing(schedules), store:
+		for schedule in islice(schedules, args.num_results):
+			batch.append(schedule)
+			if len(batch) == args.batch_size:
+				flush()
+		flush()
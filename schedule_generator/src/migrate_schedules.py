@@ -0,0 +1,55 @@
+"""
+Migrates the schedules table from comma separated schedules to packed schedules,
+ one byte per matchup. The comma separated table is kept as schedules_csv. With
+ --ids, adds the id column to a schedules table that is already packed, with
+ --score-versions, adds the score_version column to it, with --fingerprints, adds
+ the fingerprint column and its unique key, deleting the identical schedules, and
+ with --facets, recounts the schedule_facets table.
+"""
+
+from storage.schedule_store import get_store
+import argparse
+
+# argument parser for password
+parser = argparse.ArgumentParser(description='Supply the password.')
+parser.add_argument('-p',
+            dest='password',
+            required=False,
+            type=str,
+            help='the rds password')
+parser.add_argument('-d',
+            dest='sqlite_path',
+            required=False,
+            type=str,
+            default=None,
+            help='A SQLite file the schedules are stored in, instead of the rds database')
+parser.add_argument('--ids',
+            dest='ids',
+            action='store_true',
+            help='Only add the id column, the schedules are already packed')
+parser.add_argument('--score-versions',
+            dest='score_versions',
+            action='store_true',
+            help='Only add the score_version column, the schedules are already packed')
+parser.add_argument('--fingerprints',
+            dest='fingerprints',
+            action='store_true',
+            help='Only add the fingerprint column and its unique key, the schedules are already packed')
+parser.add_argument('--facets',
+            dest='facets',
+            action='store_true',
+            help='Only recount the matchups of the facet gameslots, the schedules are already packed')
+args = parser.parse_args()
+
+with get_store(args.password, args.sqlite_path) as store:
+	if args.ids:
+		store.add_ids()
+	elif args.score_versions:
+		store.add_score_versions()
+	elif args.fingerprints:
+		store.add_fingerprints()
+	elif args.facets:
+		store.rebuild_facets()
+	else:
+		store.migrate_to_packed()
+	print(store.get_num_schedules())
@@ -1,7 +1,8 @@
 import numpy as np
 from random import shuffle, randint
-from schedule.score.score_calculator import get_score
-from schedule.constants import teams, matchup_team, NUM_MATCHUPS, NUM_TEAMS, NUM_GAMESLOTS, NUM_WEEKS, num_games_per_week, thanksgiving_gameslots
+from schedule.score.score_calculator import get_score_terms, get_local_score_terms, score_from_terms
+from schedule.fingerprint import get_fingerprint
+from schedule.constants import teams, matchup_team, matchup_hometeam, matchup_awayteam, gameslot_week_index, gameslot_group, NUM_MATCHUPS, NUM_TEAMS, NUM_GAMESLOTS, NUM_WEEKS, num_games_per_week, thanksgiving_gameslots
 
 class NFLSchedule:
 	"""
@@ -19,16 +20,28 @@ class NFLSchedule:
 		self.gameslot_matchup = [0 for _ in range(NUM_GAMESLOTS)]
 		self._set_gameslot_matchup()
 		
+		# canonical fingerprint, only calculated when it is called for
+		self._fingerprint = None
+		
 		# score, initially set to None and only calculate when it is called for
 		#  this is because there can, most likely, be shuffling. therefore,
 		#  the score should only be calculated when the user calls get_score(),
 		#  assuming the user has set the schedule and is ready for the score.
 		self._score = None
+		
+		# score terms and home/away team by week game counts, set with the
+		#  score and then updated incrementally by swaps so a swap does not
+		#  require the score to be calculated from scratch
+		self._score_terms = None
+		self.team_week = None
+		self.hometeam_week = None
+		self.awayteam_week = None
 	
 	
 	def __eq__(self, other):
 		"""
-		Test if this NFLSchedule is equal to another NFLSchedule.
+		Test if this NFLSchedule is equal to another NFLSchedule. The order of
+		the Sunday afternoon games within a week does not matter.
 
 		Args:
 		  other: the other NFLSchedule
@@ -37,40 +50,38 @@ class NFLSchedule:
 		  True if this schedule is equal to the other schedule, false othewise.
 		"""
 		if isinstance(other, NFLSchedule):
-			
-			# order of Sunday games does not matter
-			gs_count = 0
-			for week_num in range(NUM_WEEKS-1): # skip week 17
-				
-				# Thursday night check
-				if gs_count != thanksgiving_gameslots[0]:
-					s = gs_count+1
-					if self.gameslot_matchup[gs_count] != other.gameslot_matchup[gs_count]:
-						return False
-				else:
-					s = gs_count+3
-					if (self.gameslot_matchup[gs_count] != other.gameslot_matchup[gs_count]) or (self.gameslot_matchup[gs_count+1] != other.gameslot_matchup[gs_count+1]) or (self.gameslot_matchup[gs_count+2] != other.gameslot_matchup[gs_count+2]):
-						return False
-				# increment gameslot counter
-				gs_count += num_games_per_week[week_num]
-				
-				# Sunday day check
-				if not (sorted(self.gameslot_matchup[s:gs_count-2]) == sorted(other.gameslot_matchup[s:gs_count-2])):
-					return False
-				
-				# Sunday night check
-				if self.gameslot_matchup[gs_count-2] != other.gameslot_matchup[gs_count-2]:
-					return False
-				
-				# Monday night check
-				if self.gameslot_matchup[gs_count-1] != other.gameslot_matchup[gs_count-1]:
-					return False
-				
-			return True
+			return self.fingerprint() == other.fingerprint()
 		else:
 			return False
 	
 	
+	def __hash__(self):
+		"""
+		Hash of the canonical fingerprint, consistent with equality. A schedule
+		should not be swapped while it is in a set or dictionary.
+		
+		Return:
+		  The hash of this schedule.
+		"""
+		return hash(self.fingerprint())
+	
+	
+	def fingerprint(self):
+		"""
+		Gets the canonical fingerprint of this schedule, equal for schedules that
+		only differ by the order of the Sunday afternoon games within weeks.
+		
+		Return:
+		  The fingerprint, as bytes.
+		"""
+		
+		# only calculate it once, when it is asked for
+		if self._fingerprint is None:
+			self._fingerprint = get_fingerprint(self.gameslot_matchup)
+		
+		return self._fingerprint
+	
+	
 	def get_matchups(self):
 		"""
 		Gets the matchups.
@@ -96,7 +107,7 @@ class NFLSchedule:
 		self._set_gameslot_matchup()
 		
 		# reset the score
-		self._score = None
+		self._reset_score()
 	
 	
 	def _set_gameslot_matchup(self):
@@ -105,6 +116,9 @@ class NFLSchedule:
 		"""
 		for i in range(NUM_MATCHUPS):
 			self.gameslot_matchup[self.matchup_gameslot[i]] = i
+		
+		# reset the fingerprint
+		self._fingerprint = None
 	
 	
 	@classmethod
@@ -141,35 +155,34 @@ class NFLSchedule:
 		child._set_gameslot_matchup()
 		
 		# reset the score
-		child._score = None
+		child._reset_score()
 		
 		# return the child
 		return child
 	
 	
-	def _set_home_away_matrix(self):
+	def _set_team_week(self):
 		"""
-		Sets the home and away matrix inferred from the current matchup to gs assignment. 
+		Sets the home and away team by week game counts inferred from the current matchup to gs assignment.
 		"""
 		
-		# reset, or initialize, the matrices
-		self.hometeam_gameslot = np.zeros((NUM_TEAMS, NUM_GAMESLOTS))
-		self.awayteam_gameslot = np.zeros((NUM_TEAMS, NUM_GAMESLOTS))
+		# week of each matchup
+		matchup_week = gameslot_week_index[self.matchup_gameslot]
 		
-		# for each matchup, find the gameslot index, and
-		#  set the home/away team index to this game slot
-		for matchup_index in range(NUM_MATCHUPS):
-		
-			# get the game slot index where the matchup is scheduled
-			gameslot_index = self.matchup_gameslot[matchup_index]
-			
-			# get the index of the home and away team
-			home_index = matchup_team[matchup_index][0]
-			away_index = matchup_team[matchup_index][1]
-			
-			# set the home/away team to gameslot matrix
-			self.hometeam_gameslot[home_index, gameslot_index] = 1
-			self.awayteam_gameslot[away_index, gameslot_index] = 1
+		# count the home and away games of each team in each week
+		self.team_week = np.stack([
+			np.bincount(matchup_hometeam * NUM_WEEKS + matchup_week, minlength=NUM_TEAMS*NUM_WEEKS),
+			np.bincount(matchup_awayteam * NUM_WEEKS + matchup_week, minlength=NUM_TEAMS*NUM_WEEKS)
+		]).astype(np.int8).reshape((2, NUM_TEAMS, NUM_WEEKS))
+		self.hometeam_week, self.awayteam_week = self.team_week
+	
+	
+	def _reset_score(self):
+		"""
+		Resets the score, and the incremental score state, so it is calculated from scratch.
+		"""
+		self._score = None
+		self._score_terms = None
 	
 	
 	def shuffle(self, iterations):
@@ -184,15 +197,7 @@ class NFLSchedule:
 		for i in range(iterations):
 			m1 = randint(0, NUM_MATCHUPS-1)
 			m2 = randint(0, NUM_MATCHUPS-1)
-			g1 = self.matchup_gameslot[m1]
-			g2 = self.matchup_gameslot[m2]
-			self.matchup_gameslot[[m1,m2]] = self.matchup_gameslot[[m2,m1]]
-			self.gameslot_matchup[g2] = m1
-			self.gameslot_matchup[g1] = m2
-		
-		if iterations > 0:
-			# reset the score
-			self._score = None
+			self.swap(m1, m2)
 		
 	
 	def swap(self, m1, m2):
@@ -205,18 +210,64 @@ class NFLSchedule:
 		"""
 		
 		# swapped gameslots
-		g1 = self.matchup_gameslot[m1]
-		g2 = self.matchup_gameslot[m2]
+		g1 = int(self.matchup_gameslot[m1])
+		g2 = int(self.matchup_gameslot[m2])
+		
+		# nothing to swap
+		if g1 == g2:
+			return
+		
+		# swapping within a gameslot group, ie Sunday afternoon games of a week,
+		#  does not change the team by week counts, the score or the fingerprint
+		same_group = gameslot_group[g1] == gameslot_group[g2]
+		
+		# if the score terms are set, only the teams of the two matchups,
+		#  the weeks of the two gameslots and the two gameslots are affected by the swap
+		incremental = self._score_terms is not None and not same_group
+		if incremental:
+			w1 = int(gameslot_week_index[g1])
+			w2 = int(gameslot_week_index[g2])
+			swapped_teams = sorted(set(matchup_team[m1]) | set(matchup_team[m2]))
+			weeks = [w1] if w1 == w2 else [w1, w2]
+			gameslots = [g1, g2]
+			before = get_local_score_terms(self, swapped_teams, weeks, gameslots)
 		
 		# swap the matchups
-		self.matchup_gameslot[[m1,m2]] = self.matchup_gameslot[[m2,m1]]
+		self.matchup_gameslot[m1] = g2
+		self.matchup_gameslot[m2] = g1
 		
 		# reset gameslot to matchup
 		self.gameslot_matchup[g2] = m1
 		self.gameslot_matchup[g1] = m2
 		
-		# need to recalculate score
-		self._score = None
+		if same_group:
+			return
+		
+		# reset the fingerprint
+		self._fingerprint = None
+		
+		if incremental:
+		
+			# move the teams of the matchups between the weeks
+			if w1 != w2:
+				h1, a1 = matchup_team[m1]
+				h2, a2 = matchup_team[m2]
+				self.hometeam_week[h1, w1] -= 1
+				self.hometeam_week[h1, w2] += 1
+				self.awayteam_week[a1, w1] -= 1
+				self.awayteam_week[a1, w2] += 1
+				self.hometeam_week[h2, w2] -= 1
+				self.hometeam_week[h2, w1] += 1
+				self.awayteam_week[a2, w2] -= 1
+				self.awayteam_week[a2, w1] += 1
+			
+			# update the score terms with the change of the local terms
+			after = get_local_score_terms(self, swapped_teams, weeks, gameslots)
+			self._score_terms = [t + a - b for t, a, b in zip(self._score_terms, after, before)]
+			self._score = score_from_terms(self._score_terms)
+		else:
+			# need to recalculate score
+			self._score = None
 	
 	
 	def copy(self):
@@ -233,8 +284,15 @@ class NFLSchedule:
 		# copy the schedule
 		copy.matchup_gameslot = np.copy(self.matchup_gameslot)
 		
-		# copy over the error, incase it was already calculated
+		# copy over the error and fingerprint, incase they were already calculated
 		copy._score = self._score
+		copy._fingerprint = self._fingerprint
+		
+		# copy over the incremental score state
+		if self._score_terms is not None:
+			copy._score_terms = self._score_terms[:]
+			copy.team_week = np.copy(self.team_week)
+			copy.hometeam_week, copy.awayteam_week = copy.team_week
 		
 		# reset gameslot to matchup
 		copy.gameslot_matchup = self.gameslot_matchup[:]
@@ -257,11 +315,12 @@ class NFLSchedule:
 		# only calculate it once, when it is asked for
 		if self._score == None:
 		
-			# set the home/away team to gameslot matrix
-			self._set_home_away_matrix()
+			# set the home/away team by week counts
+			self._set_team_week()
 			
 			# calculate the score
-			self._score = get_score(self)
+			self._score_terms = get_score_terms(self)
+			self._score = score_from_terms(self._score_terms)
 			
 		# return the score
 		return self._score
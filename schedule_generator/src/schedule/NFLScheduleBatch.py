@@ -0,0 +1,42 @@
+import numpy as np
+from schedule.constants import matchup_hometeam, matchup_awayteam, gameslot_week_index, NUM_MATCHUPS, NUM_TEAMS, NUM_WEEKS
+
+class NFLScheduleBatch:
+	"""
+	A batch of schedules, with the same attributes as an NFLSchedule but with
+	 a leading schedule dimension, so a population can be scored with vectorized
+	 operations instead of one schedule at a time.
+	"""
+	
+	def __init__(self, matchup_gameslots):
+		"""
+		Initializes the batch from the matchup to gameslot assignment of each schedule.
+		
+		Args:
+		  matchup_gameslots: a 2-D array, where row i is the matchup to gameslot assignment of schedule i.
+		"""
+		
+		# schedule x matchup array
+		self.matchup_gameslot = np.asarray(matchup_gameslots, dtype=np.intp).reshape((-1, NUM_MATCHUPS))
+		num_schedules = len(self.matchup_gameslot)
+		rows = np.arange(num_schedules)[:, None]
+		
+		# schedule x gameslot to matchup array
+		self.gameslot_matchup = np.empty_like(self.matchup_gameslot)
+		self.gameslot_matchup[rows, self.matchup_gameslot] = np.arange(NUM_MATCHUPS)
+		
+		# week of each matchup, offset by the schedule index
+		matchup_week = gameslot_week_index[self.matchup_gameslot] + rows * (NUM_TEAMS * NUM_WEEKS)
+		
+		# count the home and away games of each team in each week of each schedule
+		size = num_schedules * NUM_TEAMS * NUM_WEEKS
+		self.hometeam_week = np.bincount((matchup_week + matchup_hometeam * NUM_WEEKS).ravel(), minlength=size).reshape((num_schedules, NUM_TEAMS, NUM_WEEKS))
+		self.awayteam_week = np.bincount((matchup_week + matchup_awayteam * NUM_WEEKS).ravel(), minlength=size).reshape((num_schedules, NUM_TEAMS, NUM_WEEKS))
+	
+	
+	def __len__(self):
+		"""
+		Return:
+		  The number of schedules in the batch.
+		"""
+		return len(self.matchup_gameslot)
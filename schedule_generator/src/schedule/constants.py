@@ -1,3 +1,4 @@
+import os
 import numpy as np
 
 def get_schedule_info(filepath):
@@ -41,7 +42,7 @@ def get_schedule_info(filepath):
 	# return information
 	return teams, matchup_team
 
-teams, matchup_team = get_schedule_info('../resources/nfl-matchups_2018.csv')
+teams, matchup_team = get_schedule_info(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'resources', 'nfl-matchups_2018.csv'))
 
 def get_matchup_index(hometeam, awayteam):
 	"""
@@ -77,6 +78,10 @@ NUM_GAMESLOTS = len(matchup_team)
 NUM_MATCHUPS = len(matchup_team)
 NUM_TEAMS = len(teams)
 
+# home and away team index of each matchup
+matchup_hometeam = np.array([m[0] for m in matchup_team], dtype=np.intp)
+matchup_awayteam = np.array([m[1] for m in matchup_team], dtype=np.intp)
+
 # week gameslot matrix
 week_gameslot = []
 count = 0
@@ -87,6 +92,43 @@ for n in num_games_per_week:
 	week_gameslot.append(week_games)
 gameslot_week = np.array(week_gameslot, dtype=np.uint32).T
 
+# gameslot to week index, ie the week number of each gameslot
+gameslot_week_index = np.argmax(gameslot_week, axis=1)
+
+# first (Thursday) and last (Monday) gameslot of each week
+week_first_gameslot = [sum(num_games_per_week[:i]) for i in range(NUM_WEEKS)]
+week_last_gameslot = [sum(num_games_per_week[:i+1])-1 for i in range(NUM_WEEKS)]
+
+# Sunday afternoon gameslots, and all of week 17, as all teams play on Sunday,
+#  except for the international games
+sunday_gameslot = np.zeros(NUM_GAMESLOTS, dtype=bool)
+for week_num in range(NUM_WEEKS):
+	first, last = week_first_gameslot[week_num], week_last_gameslot[week_num]
+	if week_num == NUM_WEEKS-1:
+		sunday_gameslot[first:last+1] = True
+	elif first == thanksgiving_gameslots[0]:
+		sunday_gameslot[first+len(thanksgiving_gameslots):last-1] = True
+	else:
+		sunday_gameslot[first+1:last-1] = True
+sunday_gameslot[international_gameslots] = False
+
+# gameslot group index, where the order of the games within a group does not
+#  matter. that is, the Sunday afternoon games of a week. every other gameslot
+#  is its own group, so the score does not depend on the order within a group.
+#  groups are numbered in the order of their first gameslot.
+gameslot_group = np.zeros(NUM_GAMESLOTS, dtype=np.intp)
+week_sunday_group = dict()
+NUM_GROUPS = 0
+for gameslot in range(NUM_GAMESLOTS):
+	week_num = gameslot_week_index[gameslot]
+	if sunday_gameslot[gameslot] and week_num in week_sunday_group:
+		gameslot_group[gameslot] = week_sunday_group[week_num]
+	else:
+		gameslot_group[gameslot] = NUM_GROUPS
+		if sunday_gameslot[gameslot]:
+			week_sunday_group[week_num] = NUM_GROUPS
+		NUM_GROUPS += 1
+
 # TEAMS
 RAIDERS = teams["Oakland Raiders"]
 SEAHAWKS = teams["Seattle Seahawks"]
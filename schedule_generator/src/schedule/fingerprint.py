@@ -0,0 +1,62 @@
+import numpy as np
+import hashlib
+from schedule.constants import gameslot_group, NUM_MATCHUPS
+
+# number of bytes of a fingerprint digest
+DIGEST_SIZE = 16
+
+# sort key offset of each gameslot, so sorting the keys keeps the gameslot
+#  groups in order and only orders the matchups within a group
+gameslot_key = gameslot_group * NUM_MATCHUPS
+
+
+def get_fingerprint(gameslot_matchup):
+	"""
+	Gets the canonical fingerprint of a schedule. Schedules that only differ by
+	 the order of the Sunday afternoon games within weeks have the same fingerprint.
+	
+	Args:
+	  gameslot_matchup: the matchup index of each gameslot
+	
+	Return:
+	  The fingerprint, as bytes.
+	"""
+	
+	return (np.sort(gameslot_key + gameslot_matchup) % NUM_MATCHUPS).astype(np.uint8).tobytes()
+
+
+def get_fingerprints(matchup_gameslots):
+	"""
+	Gets the canonical fingerprint of each schedule in a batch.
+	
+	Args:
+	  matchup_gameslots: a 2-D array, where row i is the matchup to gameslot assignment of schedule i
+	
+	Return:
+	  A list with the fingerprint of each schedule, as bytes.
+	"""
+	
+	# gameslot to matchup for each schedule
+	matchup_gameslots = np.asarray(matchup_gameslots, dtype=np.intp).reshape((-1, NUM_MATCHUPS))
+	gameslot_matchups = np.empty_like(matchup_gameslots)
+	gameslot_matchups[np.arange(len(matchup_gameslots))[:, None], matchup_gameslots] = np.arange(NUM_MATCHUPS)
+	
+	# canonical gameslot to matchup for each schedule
+	canonical = (np.sort(gameslot_key + gameslot_matchups, axis=1) % NUM_MATCHUPS).astype(np.uint8)
+	
+	return [row.tobytes() for row in canonical]
+
+
+def get_digest(fingerprint):
+	"""
+	Gets a short digest of a fingerprint, for keeping many fingerprints in memory
+	 for duplicate checks.
+	
+	Args:
+	  fingerprint: the fingerprint, as bytes
+	
+	Return:
+	  The digest, as bytes.
+	"""
+	
+	return hashlib.blake2b(fingerprint, digest_size=DIGEST_SIZE).digest()
@@ -1,3 +1,5 @@
+from schedule.constants import matchup_team, matchup_hometeam
+import numpy as np
 
 def fixed_home_game(schedule, team, gameslot):
 	"""
@@ -12,4 +14,20 @@ def fixed_home_game(schedule, team, gameslot):
 	  0 if the team has a home game at the gameslot, 1 otherwise
 	"""
 	
-	return 0 if schedule.hometeam_gameslot[team][gameslot] == 1 else 1
+	return 0 if matchup_team[schedule.gameslot_matchup[gameslot]][0] == team else 1
+
+
+def fixed_home_game_batch(schedules, team, gameslot):
+	"""
+	Enforce that a team has a homegame at the gameslot, for each schedule in a batch.
+	
+	Args:
+	  schedules: the schedule batch object
+	  team: the index of the team
+	  gameslot: the game slot
+
+	Return:
+	  An array with 0 for each schedule where the team has a home game at the gameslot, 1 otherwise
+	"""
+	
+	return (matchup_hometeam[schedules.gameslot_matchup[:, gameslot]] != team).astype(np.int64)
@@ -1,3 +1,4 @@
+import numpy as np
 
 def fixed_matchup(schedule, matchup, gameslot):
 	"""
@@ -12,3 +13,18 @@ def fixed_matchup(schedule, matchup, gameslot):
 	  0 if the matchup is schedule for the gameslot, 1 otherwise.
 	"""
 	return 0 if schedule.matchup_gameslot[matchup] == gameslot else 1
+
+
+def fixed_matchup_batch(schedules, matchup, gameslot):
+	"""
+	Enforce that a matchup be played at a gameslot, for each schedule in a batch.
+	
+	Args:
+	  schedules: the schedule batch object
+	  matchup: the matchup index
+	  gameslot: the gameslot index
+	
+	Return:
+	  An array with 0 for each schedule with the matchup in the gameslot, 1 otherwise.
+	"""
+	return (schedules.matchup_gameslot[:, matchup] != gameslot).astype(np.int64)
@@ -1,4 +1,4 @@
-from schedule.constants import gameslot_week, NUM_TEAMS
+from schedule.constants import NUM_TEAMS
 import numpy as np
 
 def one_game_per_week(schedule):
@@ -13,11 +13,42 @@ def one_game_per_week(schedule):
 	  The number of violations for the constraint.
 	"""
 	
-	return np.sum(
-				np.where(
-					np.matmul(schedule.hometeam_gameslot, gameslot_week) +
-					np.matmul(schedule.awayteam_gameslot, gameslot_week)
-					!= 1, 1, 0
-				)
-			) - NUM_TEAMS
+	return int(np.sum((schedule.hometeam_week + schedule.awayteam_week) != 1)) - NUM_TEAMS
 
+
+def one_game_per_week_local(schedule, teams, weeks):
+	"""
+	Gets the number of violations for the one game per week constraint, restricted
+	to the given teams and weeks. Used for incremental scoring, as a swap only
+	changes the team by week counts for the teams and weeks of the swapped matchups.
+	
+	Args:
+	  schedule: the schedule object
+	  teams: a list of team indexes
+	  weeks: a list of week indexes
+	
+	Return:
+	  The number of team and week pairs where the team does not play exactly one game.
+	"""
+	
+	count = 0
+	for team in teams:
+		for week in weeks:
+			if schedule.hometeam_week.item(team, week) + schedule.awayteam_week.item(team, week) != 1:
+				count += 1
+	
+	return count
+
+
+def one_game_per_week_batch(schedules):
+	"""
+	Gets the number of violations for the one game per week constraint for each schedule in a batch.
+	
+	Args:
+	  schedules: the schedule batch object
+	
+	Return:
+	  An array with the number of violations for each schedule.
+	"""
+	
+	return np.sum((schedules.hometeam_week + schedules.awayteam_week) != 1, axis=(1, 2)) - NUM_TEAMS
@@ -1,4 +1,4 @@
-from schedule.constants import gameslot_week, NUM_WEEKS, num_games_per_week
+from schedule.constants import matchup_team, matchup_hometeam, NUM_WEEKS, week_first_gameslot, week_last_gameslot
 import numpy as np
 
 def shared_stadium(schedule, team1, team2):
@@ -14,31 +14,62 @@ def shared_stadium(schedule, team1, team2):
 	  The number of violations.
 	"""
 	
-	# compute hometeam by week matrix
-	hometeam_week = np.matmul(schedule.hometeam_gameslot, gameslot_week)
-	
-	# extract home games per week for each team
-	hometeam_week_team1 = hometeam_week[team1]
-	hometeam_week_team2 = hometeam_week[team2]
-	
-	# element wise multiplication, if 1 then home game in same week
-	home_same_week = hometeam_week_team1 * hometeam_week_team2
+	return shared_stadium_local(schedule, team1, team2, range(NUM_WEEKS))
 
-	# validate distance between games, ie if team plays home Thursday or Monday, it is okay
-	#  for both teams to play home games in the same week
-	gs_count = 0
-	for week_num in range(NUM_WEEKS-1): # skip week 17, as all teams play on Sunday
+
+def shared_stadium_local(schedule, team1, team2, weeks):
+	"""
+	Shared stadium violations restricted to the given weeks. Used for incremental
+	scoring, as a swap only changes the home games in the weeks of the swapped matchups.
+
+	Args:
+	  schedule: the schedule object
+	  team1: the index of the first team
+	  team2: the index of the second team
+	  weeks: a list of week indexes
+
+	Return:
+	  The number of violations in the weeks.
+	"""
+	
+	count = 0
+	for week_num in weeks:
 		
-		# thursday check
-		if schedule.hometeam_gameslot[team1][gs_count] or schedule.hometeam_gameslot[team2][gs_count]:
-			home_same_week[week_num] = 0
+		# both teams have home games in the same week
+		home_same_week = schedule.hometeam_week.item(team1, week_num) * schedule.hometeam_week.item(team2, week_num)
 		
-		# increment number of games
-		gs_count += num_games_per_week[week_num]
+		# thursday or monday home games are okay, skip week 17, as all teams play on Sunday
+		if home_same_week and week_num < NUM_WEEKS-1:
+			for gs in (week_first_gameslot[week_num], week_last_gameslot[week_num]):
+				if matchup_team[schedule.gameslot_matchup[gs]][0] in (team1, team2):
+					home_same_week = 0
 		
-		# monday check
-		if schedule.hometeam_gameslot[team1][gs_count-1] or schedule.hometeam_gameslot[team2][gs_count-1]:
-			home_same_week[week_num] = 0
+		count += home_same_week
+	
+	# return violations in the weeks
+	return count
+
+
+def shared_stadium_batch(schedules, team1, team2):
+	"""
+	Shared stadium violations for each schedule in a batch.
+
+	Args:
+	  schedules: the schedule batch object
+	  team1: the index of the first team
+	  team2: the index of the second team
+
+	Return:
+	  An array with the number of violations for each schedule.
+	"""
+	
+	# both teams have home games in the same week
+	home_same_week = schedules.hometeam_week[:, team1] * schedules.hometeam_week[:, team2]
+	
+	# thursday or monday home games are okay, skip week 17, as all teams play on Sunday
+	for gameslots in (week_first_gameslot[:-1], week_last_gameslot[:-1]):
+		hometeam = matchup_hometeam[schedules.gameslot_matchup[:, gameslots]]
+		home_same_week[:, :-1][(hometeam == team1) | (hometeam == team2)] = 0
 	
 	# return total violations
-	return np.sum(home_same_week)
+	return np.sum(home_same_week, axis=1)
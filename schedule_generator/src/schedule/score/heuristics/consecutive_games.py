@@ -1,4 +1,4 @@
-from schedule.constants import gameslot_week, NUM_TEAMS, NUM_WEEKS
+from schedule.constants import NUM_WEEKS
 import numpy as np
 
 def consecutive_road_games(schedule):
@@ -12,17 +12,57 @@ def consecutive_road_games(schedule):
 	  The total number of times a teams has 3 or more consecutive road games
 	"""
 	
-	# get away team by week matrix
-	awayteam_week = np.matmul(schedule.awayteam_gameslot, gameslot_week)
+	# road game in week for each team
+	road = schedule.awayteam_week == 1
 	
 	# count number of times a team has 3 consecutive road games
+	return int(np.sum(road[:, :-2] & road[:, 1:-1] & road[:, 2:]))
+
+
+def consecutive_road_games_local(schedule, teams, weeks):
+	"""
+	Count the number of times the given teams have 3 consecutive road games in a
+	stretch of weeks containing one of the given weeks. Used for incremental scoring,
+	as a swap only changes the road games of the teams in the swapped matchups.
+	
+	Args:
+	  schedule: the schedule
+	  teams: a list of team indexes
+	  weeks: a list of week indexes
+	
+	Return:
+	  The number of times the teams have 3 consecutive road games around the weeks.
+	"""
+	
+	# first week of each 3 week stretch containing one of the weeks
+	starts = set()
+	for week in weeks:
+		starts.update(range(max(week-2, 0), min(week+1, NUM_WEEKS-2)))
+	
+	# count the stretches of 3 road games
 	count = 0
-	for team in range(NUM_TEAMS):
-		for week in range(NUM_WEEKS-2):
-			if (awayteam_week[team][week] == 1 and
-				awayteam_week[team][week+1] == 1 and
-				awayteam_week[team][week+2] == 1):
+	for team in teams:
+		away_week = schedule.awayteam_week[team].tolist()
+		for week in starts:
+			if away_week[week] == 1 and away_week[week+1] == 1 and away_week[week+2] == 1:
 				count += 1
-				
+	
 	return count
 	
+
+def consecutive_road_games_batch(schedules):
+	"""
+	Count the total number of times a team has 3 or more consecutive road games, for each schedule in a batch.
+	
+	Args:
+	  schedules: the schedule batch
+	
+	Return:
+	  An array with the count for each schedule.
+	"""
+	
+	# road game in week for each team
+	road = schedules.awayteam_week == 1
+	
+	# count number of times a team has 3 consecutive road games
+	return np.sum(road[:, :, :-2] & road[:, :, 1:-1] & road[:, :, 2:], axis=(1, 2))
@@ -1,6 +1,9 @@
-from schedule.constants import matchup_team, gameslot_week, NUM_TEAMS, NUM_WEEKS, international_gameslots
+from schedule.constants import matchup_team, matchup_hometeam, matchup_awayteam, gameslot_week_index, NUM_WEEKS, international_gameslots
 import numpy as np
 
+# week number of each international gameslot
+international_gameslot_week = [(gs, int(gameslot_week_index[gs])) for gs in international_gameslots]
+
 def no_bye_after_international(schedule):
 	"""
 	Counts the number of times a team playing in an international game does not
@@ -13,20 +16,56 @@ def no_bye_after_international(schedule):
 	  The number of times a team does not have a bye following an international game.
 	"""
 	
-	# team x week matrix
-	team_week = (np.matmul(schedule.hometeam_gameslot, gameslot_week) +
-				 np.matmul(schedule.awayteam_gameslot, gameslot_week))
+	return no_bye_after_international_local(schedule, range(NUM_WEEKS), international_gameslots)
+
+
+def no_bye_after_international_local(schedule, weeks, gameslots):
+	"""
+	Counts the number of times a team playing in an international game does not
+	 have a bye the following week, for the international games in the gameslots or
+	 followed by one of the weeks. Used for incremental scoring, as the count for the
+	 other international games is not changed by a swap in the weeks and gameslots.
+	
+	Args:
+	  schedule: the schedule
+	  weeks: a list of week indexes
+	  gameslots: a list of gameslot indexes
+	
+	Return:
+	  The number of times a team does not have a bye following one of the international games.
+	"""
 	
 	# count of time international teams don't have a bye the following week
 	count = 0
 	
-	for gs in international_gameslots:
-		teams = matchup_team[schedule.gameslot_matchup[gs]]
-		week_num = np.argwhere(gameslot_week[gs])[0][0]
+	for gs, week_num in international_gameslot_week:
+		if week_num < NUM_WEEKS - 1 and (gs in gameslots or week_num+1 in weeks):
+			for team in matchup_team[schedule.gameslot_matchup[gs]]:
+				if schedule.hometeam_week.item(team, week_num+1) + schedule.awayteam_week.item(team, week_num+1) != 0:
+					count += 1
+	
+	return count
+
+
+def no_bye_after_international_batch(schedules):
+	"""
+	Counts the number of times a team playing in an international game does not
+	 have a bye the following week, for each schedule in a batch.
+	
+	Args:
+	  schedules: the schedule batch
+	
+	Return:
+	  An array with the count for each schedule.
+	"""
+	
+	rows = np.arange(len(schedules))
+	count = np.zeros(len(schedules), dtype=np.int64)
+	
+	for gs, week_num in international_gameslot_week:
 		if week_num < NUM_WEEKS - 1:
-			if team_week[teams[0]][week_num+1] != 0:
-				count += 1
-			if team_week[teams[1]][week_num+1] != 0:
-				count += 1
+			matchups = schedules.gameslot_matchup[:, gs]
+			for teams in (matchup_hometeam[matchups], matchup_awayteam[matchups]):
+				count += (schedules.hometeam_week[rows, teams, week_num+1] + schedules.awayteam_week[rows, teams, week_num+1]) != 0
 	
 	return count
@@ -0,0 +1,73 @@
+from collections import OrderedDict
+
+class ScoreCache:
+	"""
+	A bounded, least recently used, cache of scores keyed by the canonical
+	 schedule fingerprint. The score only depends on the fingerprint, so a
+	 schedule that was already scored, or only differs by the order of the
+	 Sunday afternoon games, does not need to be scored again.
+	"""
+	
+	def __init__(self, maxsize=100000):
+		"""
+		Initializes an empty cache.
+		
+		Args:
+		  maxsize: the maximum number of scores in the cache
+		"""
+		self.maxsize = maxsize
+		self._scores = OrderedDict()
+		
+		# counters for sizing the cache
+		self.hits = 0
+		self.misses = 0
+	
+	
+	def __len__(self):
+		"""
+		Return:
+		  The number of scores in the cache.
+		"""
+		return len(self._scores)
+	
+	
+	def get(self, fingerprint):
+		"""
+		Gets a score from the cache.
+		
+		Args:
+		  fingerprint: the schedule fingerprint
+		
+		Return:
+		  The score, None if it is not in the cache.
+		"""
+		score = self._scores.get(fingerprint)
+		if score is None:
+			self.misses += 1
+		else:
+			self.hits += 1
+			self._scores.move_to_end(fingerprint)
+		return score
+	
+	
+	def put(self, fingerprint, score):
+		"""
+		Adds a score to the cache, evicting the least recently used score if the cache is full.
+		
+		Args:
+		  fingerprint: the schedule fingerprint
+		  score: the score
+		"""
+		self._scores[fingerprint] = score
+		self._scores.move_to_end(fingerprint)
+		if len(self._scores) > self.maxsize:
+			self._scores.popitem(last=False)
+	
+	
+	def hit_rate(self):
+		"""
+		Return:
+		  The fraction of lookups that were hits.
+		"""
+		lookups = self.hits + self.misses
+		return self.hits / lookups if lookups else 0.0
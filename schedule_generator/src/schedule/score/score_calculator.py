@@ -1,17 +1,53 @@
-from schedule.score.constraints.one_game_per_week import one_game_per_week
-from schedule.score.constraints.fixed_matchup import fixed_matchup
-from schedule.score.constraints.fixed_home_game import fixed_home_game
-from schedule.score.constraints.shared_stadium import shared_stadium
-from schedule.score.heuristics.consecutive_games import consecutive_road_games
-from schedule.score.heuristics.international_bye import no_bye_after_international
-from schedule.constants import international_gameslots, london_games, mexico_games, thanksgiving_gameslots, EAGLES, LIONS, COWBOYS, JETS, GIANTS, RAIDERS_SEAHAWKS, CHARGERS_TITANS, JAGUARS_EAGLES, RAMS_CHIEFS, NUM_TEAMS
+import numpy as np
+from schedule.NFLScheduleBatch import NFLScheduleBatch
+from schedule.fingerprint import get_fingerprints
+from schedule.score.constraints.one_game_per_week import one_game_per_week, one_game_per_week_local, one_game_per_week_batch
+from schedule.score.constraints.fixed_matchup import fixed_matchup, fixed_matchup_batch
+from schedule.score.constraints.fixed_home_game import fixed_home_game, fixed_home_game_batch
+from schedule.score.constraints.shared_stadium import shared_stadium, shared_stadium_local, shared_stadium_batch
+from schedule.score.heuristics.consecutive_games import consecutive_road_games, consecutive_road_games_local, consecutive_road_games_batch
+from schedule.score.heuristics.international_bye import no_bye_after_international, no_bye_after_international_local, no_bye_after_international_batch
+from schedule.constants import international_gameslots, london_games, mexico_games, thanksgiving_gameslots, EAGLES, LIONS, COWBOYS, JETS, GIANTS, RAIDERS_SEAHAWKS, CHARGERS_TITANS, JAGUARS_EAGLES, RAMS_CHIEFS, NUM_TEAMS, teams, matchup_team
+
+# fixed constraints as (weight, constraint, matchup or team index, gameslot)
+fixed_constraints = [
+	(100, fixed_matchup, RAIDERS_SEAHAWKS, london_games[0]),
+	(100, fixed_matchup, CHARGERS_TITANS, london_games[1]),
+	(100, fixed_matchup, JAGUARS_EAGLES, london_games[2]),
+	(100, fixed_matchup, RAMS_CHIEFS, mexico_games[0]),
+	(1, fixed_home_game, EAGLES, 0),
+	(1, fixed_home_game, LIONS, thanksgiving_gameslots[0]),
+	(1, fixed_home_game, COWBOYS, thanksgiving_gameslots[1])
+]
+
+# label of each fixed constraint in the metrics, the teams and the gameslot
+team_name = {index: name for name, index in teams.items()}
+fixed_constraint_labels = [
+	'%s at %s, gameslot %d' % (team_name[matchup_team[index][1]], team_name[matchup_team[index][0]], gameslot) if constraint is fixed_matchup
+	else '%s at home, gameslot %d' % (team_name[index], gameslot)
+	for weight, constraint, index, gameslot in fixed_constraints
+]
+
+# versions of the constraints and of the heuristic, increment the constraints
+#  version when the number of violations of a schedule changes, and the heuristic
+#  version when the heuristic of a schedule without violations changes, so the
+#  stored scores are rescored, see update_scores.py
+constraints_version = 1
+heuristic_version = 1
+score_version = '%d.%d' % (constraints_version, heuristic_version)
+
+# batch version of each fixed constraint
+batch_constraints = {
+	fixed_matchup: fixed_matchup_batch,
+	fixed_home_game: fixed_home_game_batch
+}
 
 def get_score(schedule):
 	"""
 	Calculates the score for the schedule.
 	
 	Args:
-	  schedule: the schedule object
+	  schedule: the schedule object, with the team by week counts set
 	
 	Return:
 	  The score for the schedule. If the score is negative, then the
@@ -43,16 +79,30 @@ def get_constraints(schedule):
 	"""
 	
 	constraint_violations  = one_game_per_week(schedule)
-	constraint_violations += 100*fixed_matchup(schedule, RAIDERS_SEAHAWKS, london_games[0])
-	constraint_violations += 100*fixed_matchup(schedule, CHARGERS_TITANS, london_games[1])
-	constraint_violations += 100*fixed_matchup(schedule, JAGUARS_EAGLES, london_games[2])
-	constraint_violations += 100*fixed_matchup(schedule, RAMS_CHIEFS, mexico_games[0])
-	constraint_violations += fixed_home_game(schedule, EAGLES, 0)
-	constraint_violations += fixed_home_game(schedule, LIONS, thanksgiving_gameslots[0])
-	constraint_violations += fixed_home_game(schedule, COWBOYS, thanksgiving_gameslots[1])
+	constraint_violations += get_fixed_constraints(schedule)
 	constraint_violations += shared_stadium(schedule, JETS, GIANTS)
 	
 	return constraint_violations
+
+
+def get_fixed_constraints(schedule, gameslots=None):
+	"""
+	Gets the number of violations of the fixed matchup and fixed home game constraints.
+	
+	Args:
+	  schedule: the schedule object
+	  gameslots: only the constraints on these gameslots, None for all
+	
+	Return:
+	  The number of fixed constraints the schedule is violating.
+	"""
+	
+	constraint_violations = 0
+	for weight, constraint, index, gameslot in fixed_constraints:
+		if gameslots is None or gameslot in gameslots:
+			constraint_violations += weight*constraint(schedule, index, gameslot)
+	
+	return constraint_violations
 	
 
 def get_heuristic(schedule):
@@ -66,7 +116,180 @@ def get_heuristic(schedule):
 	  The heuristic calculation for the schedule.
 	"""
 	
-	score   = 0.75 * (1 - (consecutive_road_games(schedule) / (6 * NUM_TEAMS)))
-	score  += 0.25 * (1 - (no_bye_after_international(schedule) / (2 * len(international_gameslots))))
+	return heuristic_from_counts(consecutive_road_games(schedule), no_bye_after_international(schedule))
+
+
+def heuristic_from_counts(road_games, no_byes):
+	"""
+	Gets the heuristic from the heuristic counts.
+	
+	Args:
+	  road_games: the number of times a team has 3 consecutive road games
+	  no_byes: the number of times a team does not have a bye after an international game
+	
+	Return:
+	  The heuristic calculation for the counts.
+	"""
+	
+	score   = 0.75 * (1 - (road_games / (6 * NUM_TEAMS)))
+	score  += 0.25 * (1 - (no_byes / (2 * len(international_gameslots))))
 	return score * 100
+
+
+def get_score_terms(schedule):
+	"""
+	Gets the terms the score is calculated from, so the score can be updated
+	incrementally after a swap instead of calculated from scratch.
+	
+	Args:
+	  schedule: the schedule object, with the team by week counts set
+	
+	Return:
+	  [constraint violations, consecutive road games, no bye after international games]
+	"""
+	
+	return [get_constraints(schedule),
+			consecutive_road_games(schedule),
+			no_bye_after_international(schedule)]
+
+
+def get_local_score_terms(schedule, teams, weeks, gameslots):
+	"""
+	Gets the part of the score terms that depends on the given teams, weeks and
+	gameslots. If a swap only changes the games of the teams in the weeks, and the
+	matchups in the gameslots, the difference of the local terms after and before
+	the swap is the difference of the score terms.
+	
+	Args:
+	  schedule: the schedule object, with the team by week counts set
+	  teams: a list of team indexes
+	  weeks: a list of week indexes
+	  gameslots: a list of gameslot indexes
+	
+	Return:
+	  The local [constraint violations, consecutive road games, no bye after international games]
+	"""
+	
+	constraint_violations  = one_game_per_week_local(schedule, teams, weeks)
+	constraint_violations += get_fixed_constraints(schedule, gameslots)
+	constraint_violations += shared_stadium_local(schedule, JETS, GIANTS, weeks)
+	
+	return [constraint_violations,
+			consecutive_road_games_local(schedule, teams, weeks),
+			no_bye_after_international_local(schedule, weeks, gameslots)]
+
+
+def score_from_terms(terms):
+	"""
+	Calculates the score from the score terms, the same as get_score.
+	
+	Args:
+	  terms: the score terms, see get_score_terms
+	
+	Return:
+	  The score for the terms.
+	"""
+	
+	# negative number of violations if a constraint is in violation
+	if terms[0] > 0:
+		return -terms[0]
+	
+	# otherwise, the positive heuristic value
+	return heuristic_from_counts(terms[1], terms[2])
+
+
+def get_scores(matchup_gameslots, cache=None, metrics=None):
+	"""
+	Calculates the score for each schedule in a batch of schedules, the same as
+	 get_score for each schedule but with vectorized operations over the batch.
+	
+	Args:
+	  matchup_gameslots: a 2-D array, where row i is the matchup to gameslot assignment of schedule i
+	  cache: an optional ScoreCache, only the schedules not in the cache are scored
+	  metrics: optional solver.metrics.Metrics, to time the scorers and count the violations
+	
+	Return:
+	  An array with the score for each schedule.
+	"""
+	
+	if metrics is not None:
+		metrics.evaluated(len(matchup_gameslots))
+	
+	if cache is None:
+		return scores_from_terms(get_score_terms_batch(timed(metrics, NFLScheduleBatch, matchup_gameslots), metrics))
+	
+	# look up the scores in the cache
+	fingerprints = get_fingerprints(matchup_gameslots)
+	scores = np.empty(len(fingerprints))
+	missing = []
+	for i, fingerprint in enumerate(fingerprints):
+		score = cache.get(fingerprint)
+		if score is None:
+			missing.append(i)
+		else:
+			scores[i] = score
+	
+	# score the rest, and add them to the cache
+	if missing:
+		scores[missing] = scores_from_terms(get_score_terms_batch(timed(metrics, NFLScheduleBatch, np.asarray(matchup_gameslots)[missing]), metrics))
+		for i in missing:
+			cache.put(fingerprints[i], scores[i])
+	
+	return scores
+
+
+def get_score_terms_batch(schedules, metrics=None):
+	"""
+	Gets the score terms for each schedule in a batch.
+	
+	Args:
+	  schedules: the schedule batch object
+	  metrics: optional solver.metrics.Metrics, to time the scorers and count the violations
+	
+	Return:
+	  A 2-D array, where row i is the score terms of schedule i, see get_score_terms.
+	"""
+	
+	# constraint violations
+	constraint_violations  = timed(metrics, one_game_per_week_batch, schedules, constraint=True)
+	for (weight, constraint, index, gameslot), label in zip(fixed_constraints, fixed_constraint_labels):
+		constraint_violations += weight*timed(metrics, batch_constraints[constraint], schedules, index, gameslot, label=label, constraint=True)
+	constraint_violations += timed(metrics, shared_stadium_batch, schedules, JETS, GIANTS, constraint=True)
+	
+	return np.stack([constraint_violations,
+					 timed(metrics, consecutive_road_games_batch, schedules),
+					 timed(metrics, no_bye_after_international_batch, schedules)], axis=1)
+
+
+def timed(metrics, scorer, *args, label=None, constraint=False):
+	"""
+	Calls a scorer, timed by the metrics, if any.
+	
+	Args:
+	  metrics: optional solver.metrics.Metrics
+	  scorer: the scorer function
+	  args: the arguments of the scorer
+	  label: the label of the call, to tell apart calls of the same scorer with different arguments
+	  constraint: True if the scorer returns the violations of a constraint
+	
+	Return:
+	  The result of the scorer.
+	"""
+	
+	if metrics is None:
+		return scorer(*args)
+	return metrics.timed(scorer, args, label, constraint)
+
+
+def scores_from_terms(terms):
+	"""
+	Calculates the scores from the score terms of a batch of schedules, the same as score_from_terms.
+	
+	Args:
+	  terms: a 2-D array of score terms, see get_score_terms_batch
+	
+	Return:
+	  An array with the score for each schedule.
+	"""
 	
+	return np.where(terms[:, 0] > 0, -terms[:, 0], heuristic_from_counts(terms[:, 1], terms[:, 2]))
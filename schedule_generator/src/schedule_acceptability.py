@@ -2,43 +2,53 @@
 Deletes schedules from the database if the score is less than 0 (in violation) or
  if there exists an identical schedules. That is, if there is a schedule with the
  same permuation of sunday games for each week.
+
+The schedules are streamed from the database a batch at a time and scored with
+ the batch scoring, the identical schedules are found with a set of the digests
+ of their canonical fingerprints, and the deletes are made a batch at a time.
 """
 
-import pymysql
 import argparse
-from schedule.NFLSchedule import NFLSchedule
+from schedule.score.score_calculator import get_scores
+from storage.schedule_store import get_store, decode_schedules, get_digests
 
 # argument parser for password
 parser = argparse.ArgumentParser(description='Supply the password.')
 parser.add_argument('-p',
             dest='password',
-            required=True,
+            required=False,
             type=str,
             help='the rds password')
+parser.add_argument('-d',
+            dest='sqlite_path',
+            required=False,
+            type=str,
+            default=None,
+            help='A SQLite file the schedules are stored in, instead of the rds database')
+parser.add_argument('-b',
+            dest='batch_size',
+            required=False,
+            type=int,
+            default=10000,
+            help='The number of schedules read, and deleted, at a time')
 args = parser.parse_args()
 
-# connection information
-host='nflschedules.cd7ko38smnnq.us-west-1.rds.amazonaws.com'
-port=3306
-dbname='nflschedules'
-user='nflschedules'
-password=args.password
-
-try:
-	conn = pymysql.connect(host, user=user, port=port, passwd=password, db=dbname)
-	with conn.cursor() as cursor:
-		cursor.execute('SELECT * FROM schedules')
-		all_matchups = list(cursor.fetchall())
-		base = NFLSchedule()
-		schedules = []
-		for matchup in all_matchups:
-			schedule = NFLSchedule()
-			schedule.set_matchups([int(i) for i in matchup[0].split(',')])
-			if schedule.get_score() < 0 or schedule in schedules:
-				cursor.execute('DELETE FROM schedules WHERE schedule="%s" AND year="%s"' % (matchup[0], matchup[1]))
+with get_store(args.password, args.sqlite_path, args.batch_size) as store:
+	digests = set()
+	num_schedules = 0
+	num_deletes = 0
+	for rows in store.get_schedule_batches():
+		schedules = [row[0] for row in rows]
+		
+		# delete the schedules in violation, and the schedules identical to a schedule read before them
+		deletes = []
+		for row, score, digest in zip(rows, get_scores(decode_schedules(schedules)).tolist(), get_digests(schedules)):
+			if score < 0 or digest in digests:
+				deletes.append((row[0], row[1]))
 			else:
-				schedules.append(schedule)
-		conn.commit()
-finally:
-	conn.close()
-	
+				digests.add(digest)
+		store.delete_schedules(deletes)
+		
+		num_schedules += len(rows)
+		num_deletes += len(deletes)
+		print('%d - %d' % (num_schedules, num_deletes))
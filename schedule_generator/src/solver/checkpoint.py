@@ -0,0 +1,71 @@
+import os
+import random
+import numpy as np
+from solver.population import Population
+from schedule.fingerprint import DIGEST_SIZE
+
+def save_checkpoint(filepath, population, generation, digests):
+	"""
+	Saves the state of a genetic algorithm run to a compressed npz file: the
+	 population, its scores, the generation counter, the digests of the schedules
+	 already found, and the state of the numpy and python random number generators.
+	 The file is written to a temporary file first and then renamed, so a run
+	 stopped while saving keeps the previous checkpoint.
+	
+	Args:
+	  filepath: the path to the checkpoint file
+	  population: the population
+	  generation: the number of generations so far
+	  digests: the digests of the fingerprints of the schedules already found
+	"""
+	
+	# random number generator states
+	np_state = np.random.get_state()
+	py_state = random.getstate()
+	
+	# write and rename
+	tmp_filepath = filepath + '.tmp'
+	with open(tmp_filepath, 'wb') as f:
+		np.savez_compressed(f,
+			matchups=population.matchups,
+			scores=population.scores,
+			generation=generation,
+			digests=np.frombuffer(b''.join(digests), dtype=np.uint8).reshape((-1, DIGEST_SIZE)),
+			np_keys=np_state[1],
+			np_pos=np_state[2],
+			np_gauss=np.array(np_state[3:]),
+			py_version=py_state[0],
+			py_state=np.array(py_state[1], dtype=np.uint32),
+			py_gauss=np.array(np.nan if py_state[2] is None else py_state[2]))
+	os.replace(tmp_filepath, filepath)
+
+
+def load_checkpoint(filepath, cache=None, metrics=None):
+	"""
+	Loads the state of a genetic algorithm run saved by save_checkpoint, and
+	 restores the state of the random number generators, so the run continues
+	 exactly where it left off.
+	
+	Args:
+	  filepath: the path to the checkpoint file
+	  cache: an optional ScoreCache for the population
+	  metrics: optional solver.metrics.Metrics for the population
+	
+	Return:
+	  population: the population
+	  generation: the number of generations so far
+	  digests: a set of the digests of the fingerprints of the schedules already found
+	"""
+	
+	with np.load(filepath) as checkpoint:
+		
+		# restore the random number generator states
+		np.random.set_state(('MT19937', checkpoint['np_keys'], int(checkpoint['np_pos']), int(checkpoint['np_gauss'][0]), float(checkpoint['np_gauss'][1])))
+		py_gauss = float(checkpoint['py_gauss'])
+		random.setstate((int(checkpoint['py_version']), tuple(int(i) for i in checkpoint['py_state']), None if np.isnan(py_gauss) else py_gauss))
+		
+		population = Population.from_arrays(checkpoint['matchups'], checkpoint['scores'], cache, metrics)
+		generation = int(checkpoint['generation'])
+		digests = set(row.tobytes() for row in checkpoint['digests'])
+	
+	return population, generation, digests
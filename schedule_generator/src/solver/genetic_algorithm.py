@@ -1,11 +1,20 @@
+import os
 import numpy as np
-from random import random, randint, uniform, shuffle
+from random import seed
+from itertools import islice
+from contextlib import closing
 from schedule.NFLSchedule import NFLSchedule
-from math import sqrt
+from schedule.fingerprint import get_digest
+from solver.population import Population
+from solver.checkpoint import save_checkpoint, load_checkpoint
+from schedule.score.score_cache import ScoreCache
+from multiprocessing import Process, Queue, Event
+from queue import Empty
 
-def genetic_algorithm(base, pop_size=128, num_elitist=16, num_results=1000, init_shuffles=256):
+def genetic_algorithm(base, pop_size=128, num_elitist=16, num_results=1000, init_shuffles=256, cache_size=0, metrics=None):
 	"""
 	Try and find num_results unique playable schedules using the genetic algorithm.
+	 See genetic_algorithm_stream.
 	
 	Args:
 	  base: a base schedule to copy from
@@ -13,106 +22,366 @@ def genetic_algorithm(base, pop_size=128, num_elitist=16, num_results=1000, init
 	  num_elitist: the number of unique elitist to retain for each generation
 	  num_results: the number of unique schedules to return
 	  init_shuffles: the number of shuffles to perform on each copy of the base schedule for the initial population.
+	  cache_size: the number of scores to keep in the score cache, 0 for no cache
+	  metrics: optional solver.metrics.Metrics, see genetic_algorithm_stream
 	
 	Return:
 	  A list of playable schedules.
 	"""
+	with closing(genetic_algorithm_stream(base, pop_size, num_elitist, init_shuffles, cache_size, metrics=metrics)) as stream:
+		return list(islice(stream, num_results))
+
+
+def genetic_algorithm_stream(base, pop_size=128, num_elitist=16, init_shuffles=256, cache_size=0,
+							 checkpoint_path=None, checkpoint_interval=100, resume=False, on_checkpoint=None, metrics=None):
+	"""
+	Generates unique playable schedules using the genetic algorithm, each as soon
+	 as it is found, until the generator is closed. Only the digests of the
+	 fingerprints of the schedules are kept, for duplicate checks.
 	
-	# gets the reproduction probability for the current population
-	def get_reproduction_probability(population):
+	Args:
+	  base: a base schedule to copy from
+	  pop_size: the size of the population
+	  num_elitist: the number of unique elitist to retain for each generation
+	  init_shuffles: the number of shuffles to perform on each copy of the base schedule for the initial population.
+	  cache_size: the number of scores to keep in the score cache, 0 for no cache
+	  checkpoint_path: the path to save a checkpoint to, see solver.checkpoint, None for no checkpoints
+	  checkpoint_interval: the number of generations between checkpoints
+	  resume: True to continue from the checkpoint, if it exists, instead of a new population
+	  on_checkpoint: an optional function called before each checkpoint, so the schedules
+	    yielded so far can be made durable before the checkpoint records them as found
+	  metrics: optional solver.metrics.Metrics, to record the scoring, the generations
+	    and the results, written after each generation once its interval has passed,
+	    and when the generator is closed
 	
-		# probability result
-		a = []
-		
-		# for each population index
-		for i in range(len(population)):
-			if i == 0:
-				# rank of 1 for the first individual
-				a.append(1)
-			else:
-				if population[i].get_score() == population[i-1].get_score():
-					# score if the same as the previous, give the same rank
-					a.append(a[-1])
-				else:
-					# add increment rank
-					a.append(a[-1]+1)
-					
-		# invert the rankings with respect to the maximum
-		a = [a[-1]/i for i in a]
-		
-		# return as probability
-		sum_a = sum(a)
-		return [i/sum_a for i in a]
-	
-	# gets parent index from reproduction probability
-	def get_parent_index(a):
-		x = random()
-		for i in range(pop_size):
-			x -= a[i]
-			if x < 0:
-				return i
-		return 0
+	Yield:
+	  Playable schedules.
+	"""
 	
-	# initial random population
-	population = [base.copy() for _ in range(pop_size)]
-	for individual in population:
-		individual.shuffle(init_shuffles)
-	population = sorted(population, key=lambda x: x.get_score(), reverse=True)
-	reproduction_probability = get_reproduction_probability(population)
+	if resume and checkpoint_path is not None and os.path.exists(checkpoint_path):
 	
-	# results
-	res = []
+		# population, generation and results digests where the run left off
+		population, generation, res_digests = load_checkpoint(checkpoint_path, get_cache(cache_size), metrics)
+	else:
 	
-	# populate results
-	while len(res) < num_results:
+		# initial random population
+		population = Population(base, pop_size, init_shuffles, get_cache(cache_size), metrics)
+		generation = 0
 		
-		# get the maximum score
-		m = population[0].get_score()
+		# digests of the results, for constant time duplicate checks
+		res_digests = set()
+	
+	try:
+		while True:
 		
-		# new population, elitist
-		new_population = []
-		for individual in population:
-			if individual.get_score() == m:
-				if individual not in new_population:
-					new_population.append(individual)
-					if len(new_population) == num_elitist:
-						break
-			else:
-				break
-		print('%3d - %3d - %3d'%(m, population[-1].get_score(), len(new_population)))
+			# checkpoint
+			if checkpoint_path is not None and generation % checkpoint_interval == 0:
+				if on_checkpoint is not None:
+					on_checkpoint()
+				save_checkpoint(checkpoint_path, population, generation, res_digests)
+			
+			# next generation
+			next_generation(population, num_elitist)
+			generation += 1
+			
+			# yield if constraints satisfied
+			indexes = feasible(population)
+			for index, fingerprint in zip(indexes, population.fingerprints(indexes)):
+				digest = get_digest(fingerprint)
+				if digest not in res_digests:
+					res_digests.add(digest)
+					if metrics is not None:
+						metrics.found()
+					yield population.get_schedule(index)
+			
+			# metrics, once the interval has passed
+			if metrics is not None:
+				metrics.maybe_write()
+	
+	finally:
+	
+		# report the cache usage, for sizing the cache
+		if population.cache is not None:
+			print('score cache hit rate: %.3f' % population.cache.hit_rate())
 		
-		# populate next generation
-		for _ in range(pop_size-len(new_population)):
+		# final metrics
+		if metrics is not None:
+			metrics.write()
+
+
+def island_genetic_algorithm(base, num_islands=4, migration_interval=50, num_migrants=4, pop_size=128, num_elitist=16, num_results=1000, init_shuffles=256, cache_size=0):
+	"""
+	Try and find num_results unique playable schedules using the island model genetic
+	 algorithm. See island_genetic_algorithm_stream.
+	
+	Args:
+	  base: a base schedule to copy from
+	  num_islands: the number of islands, ie processes
+	  migration_interval: the number of generations between migrations
+	  num_migrants: the number of individuals sent to the next island on a migration
+	  pop_size: the size of the population of each island
+	  num_elitist: the number of unique elitist to retain for each generation
+	  num_results: the number of unique schedules to return
+	  init_shuffles: the number of shuffles to perform on each copy of the base schedule for the initial population.
+	  cache_size: the number of scores to keep in the score cache of each island, 0 for no cache
+	
+	Return:
+	  A list of playable schedules.
+	"""
+	with closing(island_genetic_algorithm_stream(base, num_islands, migration_interval, num_migrants, pop_size, num_elitist, init_shuffles, cache_size)) as stream:
+		return list(islice(stream, num_results))
+
+
+def island_genetic_algorithm_stream(base, num_islands=4, migration_interval=50, num_migrants=4, pop_size=128, num_elitist=16, init_shuffles=256, cache_size=0):
+	"""
+	Generates unique playable schedules using the island model genetic algorithm,
+	 until the generator is closed. Each island is an independent population, evolved
+	 in its own process. Every migration_interval generations, each island sends its
+	 best individuals to the next island, in a ring. Islands send their playable
+	 schedules to this process as they are found, where each unique one is yielded.
+	 The islands are stopped when the generator is closed, or when an island
+	 exits on its own, such as on an error, and an exception is raised.
+	
+	Args:
+	  base: a base schedule to copy from
+	  num_islands: the number of islands, ie processes
+	  migration_interval: the number of generations between migrations
+	  num_migrants: the number of individuals sent to the next island on a migration
+	  pop_size: the size of the population of each island
+	  num_elitist: the number of unique elitist to retain for each generation
+	  init_shuffles: the number of shuffles to perform on each copy of the base schedule for the initial population.
+	  cache_size: the number of scores to keep in the score cache of each island, 0 for no cache
+	
+	Yield:
+	  Playable schedules.
+	"""
+	
+	# migration queue for each island, playable schedule queue, and stop signal
+	inboxes = [Queue() for _ in range(num_islands)]
+	results = Queue()
+	stop = Event()
+	
+	# start the islands
+	islands = [Process(target=_island,
+					   args=(i, base.get_matchups(), inboxes[i], inboxes[(i+1) % num_islands], results, stop,
+							 migration_interval, num_migrants, pop_size, num_elitist, init_shuffles, cache_size),
+					   daemon=True)
+			   for i in range(num_islands)]
+	for island in islands:
+		island.start()
+	
+	# yield unique results
+	res_digests = set()
+	try:
+		while True:
 			
-			# asexual reproduction
-			child = population[get_parent_index(reproduction_probability)].copy()
+			# an island only exits when stopped, one that exits before breaks the ring
+			for i, island in enumerate(islands):
+				if island.exitcode is not None:
+					raise Exception("island %d stopped with exit code %d" % (i, island.exitcode))
 			
-			# mutation
-			r = random()
-			if r < 0.90:
-				child.shuffle(1)
-			elif r < 0.99:
-				child.shuffle(2)
-			else:
-				child.shuffle(3)
-				
-			# populate
-			new_population.append(child)
+			try:
+				new_results = results.get(timeout=1)
+			except Empty:
+				continue
+			for matchups in new_results:
+				individual = NFLSchedule()
+				individual.set_matchups(matchups)
+				digest = get_digest(individual.fingerprint())
+				if digest not in res_digests:
+					res_digests.add(digest)
+					yield individual
+	
+	finally:
+	
+		# stop the islands, draining the results so the islands can exit
+		stop.set()
+		while any(island.is_alive() for island in islands):
+			try:
+				results.get(timeout=0.1)
+			except Empty:
+				pass
+		for island in islands:
+			island.join()
+
+
+def _island(index, matchups, inbox, outbox, results, stop, migration_interval, num_migrants, pop_size, num_elitist, init_shuffles, cache_size):
+	"""
+	Evolves the population of an island until stopped. See island_genetic_algorithm_stream.
+	
+	Args:
+	  index: the island index
+	  matchups: the matchups of the base schedule
+	  inbox: queue of migrants from the previous island
+	  outbox: queue of migrants to the next island
+	  results: queue of playable schedules
+	  stop: event set when enough results are collected
+	  migration_interval: the number of generations between migrations
+	  num_migrants: the number of individuals sent to the next island on a migration
+	  pop_size: the size of the population
+	  num_elitist: the number of unique elitist to retain for each generation
+	  init_shuffles: the number of shuffles to perform on each copy of the base schedule for the initial population.
+	  cache_size: the number of scores to keep in the score cache, 0 for no cache
+	"""
+	
+	# each island needs its own random sequence
+	seed()
+	np.random.seed()
+	
+	# do not wait on unsent migrants when stopped
+	outbox.cancel_join_thread()
+	
+	# initial random population
+	base = NFLSchedule()
+	base.set_matchups(matchups)
+	population = Population(base, pop_size, init_shuffles, get_cache(cache_size))
+	
+	# digests of the playable schedules already sent by this island
+	sent_digests = set()
+	
+	generation = 0
+	while not stop.is_set():
+	
+		# next generation
+		next_generation(population, num_elitist, prefix='%2d: ' % index)
+		generation += 1
 		
-		# shuffle the population so we do not retain the same elitists
-		shuffle(new_population)
+		# send new playable schedules
+		new_results = []
+		indexes = feasible(population)
+		for i, fingerprint in zip(indexes, population.fingerprints(indexes)):
+			digest = get_digest(fingerprint)
+			if digest not in sent_digests:
+				sent_digests.add(digest)
+				new_results.append(population.matchups[i].copy())
+		if new_results:
+			results.put(new_results)
 		
-		# set new population and sort by error
-		population = new_population
-		population = sorted(population, key=lambda x: x.get_score(), reverse=True)
-		reproduction_probability = get_reproduction_probability(population)
+		# migration
+		if generation % migration_interval == 0:
 		
-		# add to results if constraints satisfied
-		for individual in population:
-			if not individual.constraints_satisfied():
+			# send the best individuals to the next island
+			outbox.put(population.matchups[:num_migrants].copy())
+			
+			# replace the worst individuals with the migrants from the previous island
+			try:
+				migrants = inbox.get_nowait()
+			except Empty:
+				migrants = []
+			for i, matchups in enumerate(migrants):
+				population.set_matchups(len(population)-len(migrants)+i, matchups)
+			population.score(len(population)-len(migrants))
+			population.sort()
+
+
+def next_generation(population, num_elitist, prefix=''):
+	"""
+	Replaces a population with its next generation, sorted by score.
+	
+	Args:
+	  population: the population, sorted by score
+	  num_elitist: the number of unique elitist to retain
+	  prefix: prefix of the printed generation summary
+	"""
+	
+	# reproduction probability for the current population
+	reproduction_probability = get_reproduction_probability(population.scores)
+	
+	# get the maximum score
+	m = population.scores[0]
+	
+	# new population, unique elitist
+	elitist_indexes = []
+	elitist_fingerprints = set()
+	candidates = np.flatnonzero(population.scores == m)
+	for index, fingerprint in zip(candidates, population.fingerprints(candidates)):
+		if fingerprint not in elitist_fingerprints:
+			elitist_fingerprints.add(fingerprint)
+			elitist_indexes.append(index)
+			if len(elitist_indexes) == num_elitist:
 				break
-			if individual not in res:
-				res.append(individual)
+	print('%s%3d - %3d - %3d'%(prefix, m, population.scores[-1], len(elitist_indexes)))
+	if population.metrics is not None:
+		population.metrics.generation(m, population.scores[-1], len(elitist_indexes))
+	
+	# draw the parents and the number of mutations of all children at once,
+	#  90% of children get 1 mutation, 9% get 2 and 1% get 3
+	num_children = len(population)-len(elitist_indexes)
+	parent_indexes = get_parent_indexes(reproduction_probability, num_children)
+	num_mutations = np.searchsorted([0.90, 0.99], np.random.random(num_children), side='right') + 1
+	
+	# asexual reproduction and mutation
+	start = population.reproduce(elitist_indexes, parent_indexes)
+	population.mutate(np.arange(start, len(population)), num_mutations)
+	population.score(start)
+	
+	# sort by error, shuffled so we do not retain the same elitists
+	population.sort(shuffle=True)
+
+
+def get_cache(cache_size):
+	"""
+	Gets a score cache for a population.
+	
+	Args:
+	  cache_size: the number of scores to keep in the cache, 0 for no cache
 	
-	# return the results
-	return res
+	Return:
+	  The score cache, None for no cache.
+	"""
+	return ScoreCache(cache_size) if cache_size > 0 else None
+
+
+def feasible(population):
+	"""
+	Gets the individuals of a population that satisfy the constraints.
+	
+	Args:
+	  population: the population, sorted by score
+	
+	Return:
+	  An array of the indexes of the playable individuals.
+	"""
+	
+	# if score is non negative, all constraints are satisfied
+	return np.flatnonzero(population.scores >= 0)
+
+
+def get_reproduction_probability(scores):
+	"""
+	Gets the reproduction probability for a population, from the rank of each individual.
+	
+	Args:
+	  scores: an array of the score of each individual, sorted in descending order
+	
+	Return:
+	  An array of the reproduction probability of each individual.
+	"""
+	
+	# rank of 1 for the first individual, the same rank for the same score as the
+	#  previous individual, otherwise increment the rank
+	ranks = np.ones(len(scores))
+	ranks[1:] += np.cumsum(scores[1:] != scores[:-1])
+	
+	# invert the rankings with respect to the maximum
+	a = ranks[-1] / ranks
+	
+	# return as probability
+	return a / np.sum(a)
+
+
+def get_parent_indexes(reproduction_probability, num_parents):
+	"""
+	Gets parent indexes from the reproduction probability, with a binary search of
+	 the cumulative distribution for each parent.
+	
+	Args:
+	  reproduction_probability: the reproduction probability
+	  num_parents: the number of parents to get
+	
+	Return:
+	  An array of parent indexes.
+	"""
+	cumulative = np.cumsum(reproduction_probability)
+	parent_indexes = np.searchsorted(cumulative, np.random.random(num_parents) * cumulative[-1], side='right')
+	return np.minimum(parent_indexes, len(cumulative)-1)
@@ -0,0 +1,178 @@
+import numpy as np
+from math import exp
+from random import random, randint, choice
+from itertools import islice
+from contextlib import closing
+from schedule.fingerprint import get_digest
+from solver.presolve import presolve, is_free_swap, free_matchups, team_home_matchups
+from schedule.score.constraints.shared_stadium import shared_stadium_local
+from schedule.constants import matchup_hometeam, matchup_awayteam, gameslot_week_index, week_first_gameslot, week_last_gameslot, NUM_TEAMS, NUM_WEEKS, JETS, GIANTS
+
+# matchups of each team
+team_matchups = [np.flatnonzero((matchup_hometeam == team) | (matchup_awayteam == team)) for team in range(NUM_TEAMS)]
+
+def simulated_annealing(base, num_results=1000, init_shuffles=256, initial_temperature=2.0, cooling=0.9999, min_temperature=0.01, targeted=0.9, metrics=None):
+	"""
+	Try and find num_results unique playable schedules using simulated annealing.
+	 See simulated_annealing_stream.
+	
+	Args:
+	  base: a base schedule to copy from
+	  num_results: the number of unique schedules to return
+	  init_shuffles: the number of shuffles to perform on the copy of the base schedule
+	  initial_temperature: the temperature at the start, and after each reset
+	  cooling: the factor the temperature is multiplied by after each swap
+	  min_temperature: the temperature at which the temperature is reset
+	  targeted: the probability that a swap moves a matchup in violation of a constraint
+	  metrics: optional solver.metrics.Metrics, see simulated_annealing_stream
+	
+	Return:
+	  A list of playable schedules.
+	"""
+	with closing(simulated_annealing_stream(base, init_shuffles, initial_temperature, cooling, min_temperature, targeted, metrics)) as stream:
+		return list(islice(stream, num_results))
+
+
+def simulated_annealing_stream(base, init_shuffles=256, initial_temperature=2.0, cooling=0.9999, min_temperature=0.01, targeted=0.9, metrics=None):
+	"""
+	Generates unique playable schedules using simulated annealing, each as soon as
+	 it is found, until the generator is closed. A single presolved schedule is
+	 changed by one free swap at a time, see solver.presolve, scored incrementally.
+	 A swap that does not lower the score is kept, otherwise it is kept with a
+	 probability that decreases with the temperature. The temperature cools after
+	 each swap, and is reset to the initial temperature when it reaches the minimum.
+	
+	Args:
+	  base: a base schedule to copy from
+	  init_shuffles: the number of shuffles to perform on the copy of the base schedule
+	  initial_temperature: the temperature at the start, and after each reset
+	  cooling: the factor the temperature is multiplied by after each swap
+	  min_temperature: the temperature at which the temperature is reset
+	  targeted: the probability that a swap moves a matchup in violation of a constraint
+	  metrics: optional solver.metrics.Metrics, to record the swaps scored and the
+	    results, written with the progress once its interval has passed, and when the
+	    generator is closed. The swaps are scored incrementally, so the scorers are not timed
+	
+	Yield:
+	  Playable schedules.
+	"""
+	
+	# initial random schedule with the fixed constraints satisfied, scored so the
+	#  swaps are scored incrementally
+	schedule = base.copy()
+	schedule.shuffle(init_shuffles)
+	schedule = presolve(schedule)
+	score = schedule.get_score()
+	
+	# digests of the results, for constant time duplicate checks
+	res_digests = set()
+	
+	temperature = initial_temperature
+	iteration = 0
+	try:
+		while True:
+		
+			# swap and score
+			m1, m2 = get_swap(schedule, targeted)
+			schedule.swap(m1, m2)
+			new_score = schedule.get_score()
+			
+			# keep the swap, otherwise swap back
+			if new_score >= score or random() < exp((new_score - score) / temperature):
+				score = new_score
+			else:
+				schedule.swap(m1, m2)
+			
+			# yield if constraints satisfied
+			if score >= 0:
+				digest = get_digest(schedule.fingerprint())
+				if digest not in res_digests:
+					res_digests.add(digest)
+					if metrics is not None:
+						metrics.found()
+					yield schedule.copy()
+			
+			# cool, and reset when cold
+			temperature *= cooling
+			if temperature < min_temperature:
+				temperature = initial_temperature
+			
+			# progress
+			iteration += 1
+			if iteration % 10000 == 0:
+				print('%8d - %7.2f - %5.3f - %3d'%(iteration, score, temperature, len(res_digests)))
+				if metrics is not None:
+					metrics.evaluated(10000)
+					metrics.maybe_write()
+	
+	finally:
+	
+		# final metrics, with the swaps since the last progress
+		if metrics is not None:
+			metrics.evaluated(iteration % 10000)
+			metrics.write()
+
+
+def get_swap(schedule, targeted):
+	"""
+	Gets the free matchups to swap. With probability targeted, and if a constraint
+	 is in violation, one of the matchups is in violation of a constraint, and the
+	 swap can repair it. Otherwise, the matchups are random.
+	
+	Args:
+	  schedule: the schedule object, with the team by week counts set
+	  targeted: the probability of a targeted swap
+	
+	Return:
+	  The indexes of the two matchups to swap.
+	"""
+	
+	if random() < targeted:
+		swap = get_targeted_swap(schedule)
+		if swap is not None and is_free_swap(schedule, *swap):
+			return swap
+	
+	while True:
+		m1, m2 = choice(free_matchups), choice(free_matchups)
+		if is_free_swap(schedule, m1, m2):
+			return m1, m2
+
+
+def get_targeted_swap(schedule):
+	"""
+	Gets a swap of a matchup in violation of a constraint, chosen at random from
+	 the teams with more than one game in a week, and the weeks the shared stadium
+	 is used by both teams. The fixed constraints are satisfied by the presolve.
+	
+	Args:
+	  schedule: the schedule object, with the team by week counts set
+	
+	Return:
+	  The indexes of the two matchups to swap, None if no constraint is in violation.
+	"""
+	
+	# teams with more than one game in a week, or sharing a stadium in a week
+	team_week = schedule.hometeam_week + schedule.awayteam_week
+	conflicts = np.flatnonzero(team_week > 1)
+	shared = [week for week in np.flatnonzero(schedule.hometeam_week[JETS] * schedule.hometeam_week[GIANTS]) if shared_stadium_local(schedule, JETS, GIANTS, [week])]
+	
+	num_violations = len(conflicts) + len(shared)
+	if num_violations == 0:
+		return None
+	i = randint(0, num_violations-1)
+	
+	# team with more than one game in a week, or a home game of a shared stadium team
+	if i < len(conflicts):
+		team, week = divmod(int(conflicts[i]), NUM_WEEKS)
+		matchups = team_matchups[team]
+	else:
+		team, week = choice((JETS, GIANTS)), int(shared[i-len(conflicts)])
+		matchups = team_home_matchups[team]
+	m1 = choice([m for m in matchups if gameslot_week_index[schedule.matchup_gameslot[m]] == week] or list(matchups))
+	
+	# swap into a week the team has no games, if there is one
+	byes = np.flatnonzero(team_week[team] == 0)
+	if len(byes) == 0:
+		return m1, choice(free_matchups)
+	bye = choice(byes)
+	return m1, schedule.gameslot_matchup[randint(week_first_gameslot[bye], week_last_gameslot[bye])]
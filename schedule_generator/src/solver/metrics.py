@@ -0,0 +1,210 @@
+import os
+import json
+import time
+import numpy as np
+from collections import defaultdict
+
+# prefix of the prometheus metric names
+prefix = 'nfl_schedule'
+
+class Metrics:
+	"""
+	Opt-in metrics of a search: the calls and the cumulative seconds of each
+	 scorer, the violations of each constraint, the number of schedules scored,
+	 generations and results, and the rates of evaluations and results. The
+	 metrics are written to a local file at most every interval seconds, either
+	 appended as json lines, or as prometheus text exposition replacing the file,
+	 such as for the textfile collector of the prometheus node exporter.
+	"""
+	
+	def __init__(self, filepath, format='json', interval=60):
+		"""
+		Initializes the metrics, the run starts now.
+		
+		Args:
+		  filepath: the path to the file to write the metrics to
+		  format: json for json lines, prometheus for prometheus text exposition
+		  interval: the minimum number of seconds between writes
+		"""
+		if format not in ('json', 'prometheus'):
+			raise Exception("unknown metrics format %s" % format)
+		self.filepath = filepath
+		self.format = format
+		self.interval = interval
+		
+		# scorer calls and seconds, and constraint violations, keyed by
+		#  (function name, label), the label None for a scorer called once per batch
+		self.calls = defaultdict(int)
+		self.seconds = defaultdict(float)
+		self.violations = defaultdict(int)
+		
+		# counters, and the scores of the last generation, None before the first
+		self.evaluations = 0
+		self.generations = 0
+		self.results = 0
+		self.best_score = None
+		self.worst_score = None
+		self.num_elitist = None
+		
+		# start of the run and time of the next write
+		self._start = time.time()
+		self._next_write = self._start + interval
+	
+	
+	def timed(self, scorer, args, label=None, constraint=False):
+		"""
+		Calls a scorer, and adds the call and its seconds.
+		
+		Args:
+		  scorer: the scorer function
+		  args: the arguments of the scorer
+		  label: the label of the call, such as the teams and gameslot of a fixed
+		   constraint, so each constraint checked by the same scorer is kept apart
+		  constraint: True if the scorer returns the violations of a constraint, to add them
+		
+		Return:
+		  The result of the scorer.
+		"""
+		key = (scorer.__name__, label)
+		start = time.perf_counter()
+		result = scorer(*args)
+		self.seconds[key] += time.perf_counter() - start
+		self.calls[key] += 1
+		if constraint:
+			self.violations[key] += int(np.sum(result))
+		return result
+	
+	
+	def evaluated(self, num_schedules):
+		"""
+		Adds schedules that were scored.
+		
+		Args:
+		  num_schedules: the number of schedules
+		"""
+		self.evaluations += num_schedules
+	
+	
+	def generation(self, best_score, worst_score, num_elitist):
+		"""
+		Adds a generation.
+		
+		Args:
+		  best_score: the best score of the population
+		  worst_score: the worst score of the population
+		  num_elitist: the number of unique elitist retained
+		"""
+		self.generations += 1
+		self.best_score = float(best_score)
+		self.worst_score = float(worst_score)
+		self.num_elitist = int(num_elitist)
+	
+	
+	def found(self, num_results=1):
+		"""
+		Adds new unique playable schedules.
+		
+		Args:
+		  num_results: the number of schedules
+		"""
+		self.results += num_results
+	
+	
+	def snapshot(self):
+		"""
+		Gets the metrics so far.
+		
+		Return:
+		  A dictionary of the metrics, the rates are since the start of the run, and
+		   the scorers and violations are lists with the name and label of each.
+		"""
+		now = time.time()
+		elapsed = now - self._start
+		return {'time': now,
+				'seconds': elapsed,
+				'evaluations': self.evaluations,
+				'generations': self.generations,
+				'results': self.results,
+				'evaluations_per_second': self.evaluations / elapsed if elapsed > 0 else 0.0,
+				'results_per_minute': 60 * self.results / elapsed if elapsed > 0 else 0.0,
+				'best_score': self.best_score,
+				'worst_score': self.worst_score,
+				'num_elitist': self.num_elitist,
+				'scorers': [{'scorer': name, 'label': label, 'calls': self.calls[name, label], 'seconds': self.seconds[name, label]} for name, label in self.calls],
+				'violations': [{'constraint': name, 'label': label, 'violations': count} for (name, label), count in self.violations.items()]}
+	
+	
+	def maybe_write(self):
+		"""
+		Writes the metrics if interval seconds have passed since the last write.
+		"""
+		if time.time() >= self._next_write:
+			self.write()
+	
+	
+	def write(self):
+		"""
+		Writes the metrics, a json line appended to the file, or the prometheus
+		 text written to a temporary file first and then renamed, so the file is
+		 never read half written.
+		"""
+		snapshot = self.snapshot()
+		if self.format == 'json':
+			with open(self.filepath, 'a') as f:
+				f.write(json.dumps(snapshot) + '\n')
+		else:
+			tmp_filepath = self.filepath + '.tmp'
+			with open(tmp_filepath, 'w') as f:
+				f.write(prometheus_text(snapshot))
+			os.replace(tmp_filepath, self.filepath)
+		self._next_write = time.time() + self.interval
+
+
+def prometheus_labels(**values):
+	"""
+	Formats the labels of a prometheus sample, escaped, leaving out the labels that are None.
+	
+	Args:
+	  values: the value of each label
+	
+	Return:
+	  The labels in braces, or an empty string for no labels.
+	"""
+	values = ['%s="%s"' % (name, value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')) for name, value in values.items() if value is not None]
+	return '{%s}' % ','.join(values) if values else ''
+
+
+def prometheus_text(snapshot):
+	"""
+	Formats metrics as prometheus text exposition.
+	
+	Args:
+	  snapshot: the metrics, see Metrics.snapshot
+	
+	Return:
+	  The text.
+	"""
+	
+	# (name, type, help, [(labels, value)]), the gauges of the scores are left
+	#  out before the first generation
+	metrics = [
+		('evaluations_total', 'counter', 'Schedules scored.', [('', snapshot['evaluations'])]),
+		('generations_total', 'counter', 'Generations of the genetic algorithm.', [('', snapshot['generations'])]),
+		('results_total', 'counter', 'Unique playable schedules found.', [('', snapshot['results'])]),
+		('evaluations_per_second', 'gauge', 'Schedules scored per second since the start of the run.', [('', snapshot['evaluations_per_second'])]),
+		('results_per_minute', 'gauge', 'Unique playable schedules found per minute since the start of the run.', [('', snapshot['results_per_minute'])]),
+		('scorer_calls_total', 'counter', 'Calls of each scorer.', [(prometheus_labels(scorer=scorer['scorer'], label=scorer['label']), scorer['calls']) for scorer in snapshot['scorers']]),
+		('scorer_seconds_total', 'counter', 'Cumulative seconds of each scorer.', [(prometheus_labels(scorer=scorer['scorer'], label=scorer['label']), scorer['seconds']) for scorer in snapshot['scorers']]),
+		('constraint_violations_total', 'counter', 'Violations of each constraint, over the schedules scored.', [(prometheus_labels(constraint=violations['constraint'], label=violations['label']), violations['violations']) for violations in snapshot['violations']])
+	]
+	for name in ('best_score', 'worst_score', 'num_elitist'):
+		if snapshot[name] is not None:
+			metrics.append((name, 'gauge', 'The %s of the last generation.' % name.replace('_', ' '), [('', snapshot[name])]))
+	
+	lines = []
+	for name, metric_type, help_text, samples in metrics:
+		lines.append('# HELP %s_%s %s' % (prefix, name, help_text))
+		lines.append('# TYPE %s_%s %s' % (prefix, name, metric_type))
+		for labels, value in samples:
+			lines.append('%s_%s%s %r' % (prefix, name, labels, value))
+	return '\n'.join(lines) + '\n'
@@ -0,0 +1,203 @@
+import numpy as np
+from schedule.NFLSchedule import NFLSchedule
+from schedule.score.score_calculator import get_scores
+from schedule.fingerprint import get_fingerprints
+from solver.presolve import presolve, valid_swaps, free_matchups
+from schedule.constants import NUM_MATCHUPS, NUM_GAMESLOTS
+
+# smallest unsigned integer type that can hold a gameslot index
+gameslot_dtype = np.uint8 if NUM_GAMESLOTS <= 256 else np.uint16
+
+class Population:
+	"""
+	A population of schedules, stored as one preallocated 2-D array of matchup
+	 to gameslot assignments, one row per individual, and a vector of scores.
+	 Copying, mutation and sorting are done in place with fancy indexing, and
+	 NFLSchedule objects are only built when asked for. The base schedule is
+	 presolved, and mutation only makes free swaps, see solver.presolve, so the
+	 fixed constraints are always satisfied.
+	"""
+	
+	def __init__(self, base, pop_size, init_shuffles, cache=None, metrics=None):
+		"""
+		Initializes a population of copies of a base schedule, each shuffled, and sorted by score.
+		
+		Args:
+		  base: a base schedule to copy from
+		  pop_size: the size of the population
+		  init_shuffles: the number of shuffles to perform on each copy of the base schedule
+		  cache: an optional ScoreCache for scoring the individuals
+		  metrics: optional solver.metrics.Metrics, for the scoring and the generations
+		"""
+		
+		# score cache, None to always score, and metrics, None for no metrics
+		self.cache = cache
+		self.metrics = metrics
+		
+		# individual x matchup arrays, the population and the next generation
+		self.matchups = np.empty((pop_size, NUM_MATCHUPS), dtype=gameslot_dtype)
+		self._next_matchups = np.empty_like(self.matchups)
+		self.matchups[:] = presolve(base).get_matchups()
+		
+		# score of each individual, the population and the next generation
+		self.scores = np.empty(pop_size)
+		self._next_scores = np.empty_like(self.scores)
+		
+		# shuffle each copy
+		self.mutate(np.arange(pop_size), np.full(pop_size, init_shuffles))
+		self.score()
+		self.sort()
+	
+	
+	@classmethod
+	def from_arrays(cls, matchups, scores, cache=None, metrics=None):
+		"""
+		Creates a population from the matchups and scores of its individuals, such
+		 as a population saved to a checkpoint.
+		
+		Args:
+		  matchups: a 2-D array, where row i is the matchup to gameslot assignment of individual i
+		  scores: an array of the score of each individual
+		  cache: an optional ScoreCache for scoring the individuals
+		  metrics: optional solver.metrics.Metrics, for the scoring and the generations
+		
+		Return:
+		  The population.
+		"""
+		population = cls.__new__(cls)
+		population.cache = cache
+		population.metrics = metrics
+		population.matchups = np.array(matchups, dtype=gameslot_dtype)
+		population._next_matchups = np.empty_like(population.matchups)
+		population.scores = np.array(scores, dtype=float)
+		population._next_scores = np.empty_like(population.scores)
+		return population
+	
+	
+	def __len__(self):
+		"""
+		Return:
+		  The size of the population.
+		"""
+		return len(self.matchups)
+	
+	
+	def score(self, start=0):
+		"""
+		Scores the individuals, with the batch scoring.
+		
+		Args:
+		  start: the index of the first individual to score, the others are already scored
+		"""
+		if start < len(self):
+			self.scores[start:] = get_scores(self.matchups[start:], self.cache, self.metrics)
+	
+	
+	def sort(self, shuffle=False):
+		"""
+		Sorts the population by score, in descending order.
+		
+		Args:
+		  shuffle: True to randomly order individuals with the same score
+		"""
+		order = np.random.permutation(len(self)) if shuffle else np.arange(len(self))
+		order = order[np.argsort(-self.scores[order], kind='stable')]
+		self.matchups[:] = self.matchups[order]
+		self.scores[:] = self.scores[order]
+	
+	
+	def reproduce(self, elitist_indexes, parent_indexes):
+		"""
+		Replaces the population with the next generation: the elitists, followed
+		 by a copy of each parent. The copies need to be mutated and scored.
+		
+		Args:
+		  elitist_indexes: the indexes of the individuals to retain
+		  parent_indexes: the indexes of the parent of each child
+		
+		Return:
+		  The index of the first child.
+		"""
+		
+		# fill the next generation
+		start = len(elitist_indexes)
+		self._next_matchups[:start] = self.matchups[elitist_indexes]
+		self._next_scores[:start] = self.scores[elitist_indexes]
+		self._next_matchups[start:] = self.matchups[parent_indexes]
+		
+		# swap the generations, the current one is reused for the generation after
+		self.matchups, self._next_matchups = self._next_matchups, self.matchups
+		self.scores, self._next_scores = self._next_scores, self.scores
+		
+		return start
+	
+	
+	def mutate(self, indexes, num_mutations):
+		"""
+		Randomly swaps free matchups of individuals, redrawing the swaps that are not
+		 valid, see solver.presolve.valid_swaps, so each swap changes the schedule.
+		
+		Args:
+		  indexes: the indexes of the individuals to mutate
+		  num_mutations: the number of swaps to make for each individual
+		"""
+		indexes = np.asarray(indexes)
+		num_mutations = np.asarray(num_mutations)
+		for i in range(int(num_mutations.max(initial=0))):
+		
+			# individuals with at least i+1 swaps, each appears once so the swaps do not overlap
+			rows = indexes[num_mutations > i]
+			m1 = np.empty(len(rows), dtype=np.intp)
+			m2 = np.empty(len(rows), dtype=np.intp)
+			
+			# draw the swaps, and redraw the ones that are not valid
+			redraw = np.arange(len(rows))
+			while len(redraw):
+				m1[redraw] = free_matchups[np.random.randint(0, len(free_matchups), len(redraw))]
+				m2[redraw] = free_matchups[np.random.randint(0, len(free_matchups), len(redraw))]
+				g1 = self.matchups[rows, m1]
+				g2 = self.matchups[rows, m2]
+				redraw = np.flatnonzero(~valid_swaps(m1, m2, g1, g2))
+			
+			# swap the matchups
+			self.matchups[rows, m1] = g2
+			self.matchups[rows, m2] = g1
+	
+	
+	def set_matchups(self, index, matchups):
+		"""
+		Sets the matchups of an individual. The individual needs to be scored.
+		
+		Args:
+		  index: the index of the individual
+		  matchups: the matchup to gameslot assignment
+		"""
+		self.matchups[index] = matchups
+	
+	
+	def fingerprints(self, indexes):
+		"""
+		Gets the canonical fingerprints of individuals.
+		
+		Args:
+		  indexes: the indexes of the individuals
+		
+		Return:
+		  A list with the fingerprint of each individual.
+		"""
+		return get_fingerprints(self.matchups[indexes])
+	
+	
+	def get_schedule(self, index):
+		"""
+		Builds the schedule object of an individual.
+		
+		Args:
+		  index: the index of the individual
+		
+		Return:
+		  The schedule.
+		"""
+		schedule = NFLSchedule()
+		schedule.set_matchups(self.matchups[index])
+		return schedule
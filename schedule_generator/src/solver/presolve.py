@@ -0,0 +1,90 @@
+import numpy as np
+from random import choice
+from schedule.score.score_calculator import fixed_constraints
+from schedule.score.constraints.fixed_matchup import fixed_matchup
+from schedule.score.constraints.fixed_home_game import fixed_home_game
+from schedule.constants import matchup_hometeam, gameslot_group, NUM_MATCHUPS, NUM_GAMESLOTS, NUM_TEAMS
+
+# home matchups of each team
+team_home_matchups = [np.flatnonzero(matchup_hometeam == team) for team in range(NUM_TEAMS)]
+
+# matchups pinned to a gameslot by a fixed matchup constraint, and the matchups free to be swapped
+matchup_pinned = np.zeros(NUM_MATCHUPS, dtype=bool)
+for weight, constraint, index, gameslot in fixed_constraints:
+	if constraint is fixed_matchup:
+		matchup_pinned[index] = True
+free_matchups = np.flatnonzero(~matchup_pinned)
+
+# team that has a home game at each gameslot by a fixed home game constraint, -1 for none
+gameslot_home_team = np.full(NUM_GAMESLOTS, -1, dtype=np.intp)
+for weight, constraint, index, gameslot in fixed_constraints:
+	if constraint is fixed_home_game:
+		gameslot_home_team[gameslot] = index
+
+def presolve(schedule):
+	"""
+	Places the pinned matchups in their gameslots, and a home game of the team in
+	 each fixed home game gameslot, so the fixed constraints are satisfied. Swaps
+	 that keep them satisfied, see valid_swaps, only search the rest of the schedule.
+	
+	Args:
+	  schedule: the schedule object
+	
+	Return:
+	  A copy of the schedule, with the fixed constraints satisfied.
+	"""
+	
+	schedule = schedule.copy()
+	
+	# swap the pinned matchups into their gameslots
+	for weight, constraint, index, gameslot in fixed_constraints:
+		if constraint is fixed_matchup:
+			schedule.swap(index, schedule.gameslot_matchup[gameslot])
+	
+	# swap a home game of the team, not in a pinned or home game gameslot, into the home game gameslots
+	for weight, constraint, index, gameslot in fixed_constraints:
+		if constraint is fixed_home_game and constraint(schedule, index, gameslot):
+			candidates = [m for m in team_home_matchups[index] if not matchup_pinned[m] and gameslot_home_team[schedule.matchup_gameslot[m]] < 0]
+			schedule.swap(choice(candidates), schedule.gameslot_matchup[gameslot])
+	
+	return schedule
+
+
+def valid_swaps(m1, m2, g1, g2):
+	"""
+	Tests if swapping free matchups changes the schedule and keeps the fixed home
+	 games. That is, the matchups are in different gameslot groups, as the order
+	 of the Sunday afternoon games of a week does not matter, and a matchup only
+	 moves into a fixed home game gameslot if it is a home game of the team.
+	
+	Args:
+	  m1: the first matchup index, or an array of them
+	  m2: the second matchup index, or an array of them
+	  g1: the gameslot of the first matchup, or an array of them
+	  g2: the gameslot of the second matchup, or an array of them
+	
+	Return:
+	  True if the swap is valid, or an array of them.
+	"""
+	
+	t1 = gameslot_home_team[g1]
+	t2 = gameslot_home_team[g2]
+	return (gameslot_group[g1] != gameslot_group[g2]) & ((t1 < 0) | (t1 == matchup_hometeam[m2])) & ((t2 < 0) | (t2 == matchup_hometeam[m1]))
+
+
+def is_free_swap(schedule, m1, m2):
+	"""
+	Tests if a swap does not move a pinned matchup and is valid, see valid_swaps.
+	
+	Args:
+	  schedule: the schedule object
+	  m1: the first matchup index
+	  m2: the second matchup index
+	
+	Return:
+	  True if the swap is free.
+	"""
+	
+	if matchup_pinned[m1] or matchup_pinned[m2]:
+		return False
+	return bool(valid_swaps(m1, m2, schedule.matchup_gameslot[m1], schedule.matchup_gameslot[m2]))
@@ -0,0 +1,873 @@
+import os
+import sqlite3
+import tempfile
+from random import randint
+import numpy as np
+import pymysql
+import pymysql.cursors
+from schedule.constants import thanksgiving_gameslots, NUM_MATCHUPS
+from schedule.score.score_calculator import score_version, constraints_version
+from schedule.fingerprint import get_fingerprints, get_digest, DIGEST_SIZE
+
+# MySQL connection information
+host='nflschedules.cd7ko38smnnq.us-west-1.rds.amazonaws.com'
+port=3306
+dbname='nflschedules'
+user='nflschedules'
+
+# gameslots the web app filters by, the opener and the Thanksgiving games, with
+#  the number of schedules with each matchup in them kept in the schedule_facets table
+facet_gameslots = [0] + thanksgiving_gameslots
+
+def encode_schedule(matchups):
+	"""
+	Encodes the matchups of a schedule for the schedule column, as one byte per
+	 matchup, the gameslot of the matchup.
+	
+	Args:
+	  matchups: the matchup to gameslot assignment
+	
+	Return:
+	  The packed gameslots, as bytes.
+	"""
+	return np.asarray(matchups, dtype=np.uint8).tobytes()
+
+
+def decode_schedule(schedule):
+	"""
+	Decodes the schedule column to the matchups of a schedule, without a copy.
+	
+	Args:
+	  schedule: the packed gameslots, see encode_schedule
+	
+	Return:
+	  A read only array of the gameslot of each matchup.
+	"""
+	return np.frombuffer(schedule, dtype=np.uint8)
+
+
+def decode_schedules(schedules):
+	"""
+	Decodes the schedule column of many rows at once.
+	
+	Args:
+	  schedules: a list of packed gameslots, see encode_schedule
+	
+	Return:
+	  A 2-D array, where row i is the matchup to gameslot assignment of schedule i.
+	"""
+	return np.frombuffer(b''.join(schedules), dtype=np.uint8).reshape((-1, NUM_MATCHUPS))
+
+
+def get_digests(schedules):
+	"""
+	Gets the digest of the canonical fingerprint of packed schedules, the same for
+	 schedules that only differ by the order of the Sunday afternoon games.
+	
+	Args:
+	  schedules: a list of packed gameslots, see encode_schedule
+	
+	Return:
+	  A list of the digest of each schedule, see schedule.fingerprint.get_digest.
+	"""
+	if not schedules:
+		return []
+	return [get_digest(fingerprint) for fingerprint in get_fingerprints(decode_schedules(schedules))]
+
+
+def get_facet_counts(schedules):
+	"""
+	Counts the schedules with each matchup in each of the facet gameslots.
+	
+	Args:
+	  schedules: a list of packed gameslots, see encode_schedule
+	
+	Return:
+	  A 2-D array, where entry (i, j) is the number of schedules with matchup j in facet gameslot i.
+	"""
+	counts = np.zeros((len(facet_gameslots), NUM_MATCHUPS), dtype=np.int64)
+	if schedules:
+		matchup_gameslots = decode_schedules(schedules)
+		for i, gameslot in enumerate(facet_gameslots):
+			counts[i] = np.bincount(np.nonzero(matchup_gameslots == gameslot)[1], minlength=NUM_MATCHUPS)
+	return counts
+
+
+def decode_csv_schedule(schedule):
+	"""
+	Decodes the comma separated schedule column, from before the packed encoding.
+	
+	Args:
+	  schedule: the comma separated gameslots
+	
+	Return:
+	  A list of the gameslot of each matchup.
+	"""
+	return [int(i) for i in schedule.split(',')]
+
+
+def write_load_file(f, values):
+	"""
+	Writes values to a tab separated file for LOAD DATA, with the packed columns
+	 as hex, and \\N for NULL.
+	
+	Args:
+	  f: a text file
+	  values: a list of (schedule, year, score, score_version, fingerprint)
+	"""
+	for schedule, year, score, version, fingerprint in values:
+		f.write('%s\t%s\t%s\t%s\t%s\n' % (schedule.hex(), year, '\\N' if score is None else repr(float(score)), '\\N' if version is None else version, fingerprint.hex()))
+
+
+class ScheduleStore:
+	"""
+	Stores schedules as (schedule, year, score) rows of the schedules table. The
+	 connection is opened when it is first needed and reused, and inserts are
+	 batched with executemany. Backends implement _connect and the insert statement.
+	 The score_version column is the version of the score calculation the score was
+	 calculated with, see schedule.score.score_calculator.score_version, set to the
+	 current version on insert. The fingerprint column is the digest of the schedule,
+	 see get_digests, unique for each year, so a schedule that only differs from a
+	 stored schedule by the order of the Sunday afternoon games is not inserted.
+	 Inserts and deletes of schedules also update the schedule_facets table, the
+	 number of schedules with each matchup in each facet gameslot, so the web app
+	 does not scan the schedules for them, and increment the version in the
+	 schedule_version table, so the web app knows when its caches are stale. The
+	 version is incremented first, so the lock on the version row is held until
+	 the commit, and concurrent writers wait for each other, so a schedule is
+	 counted in the facets once even if two processes write it at the same time.
+	 The writes that change or remove stored schedules, rather than only add new
+	 ones, that is deletes, score updates and inserts of stored schedules, also
+	 increment the rewrite version, row 1 of the schedule_version table, so the
+	 web app knows when it can add the new schedules to its index and when it
+	 needs to rebuild it.
+	"""
+	
+	# parameter placeholder, and insert, or update the score and score version of an existing schedule
+	placeholder = None
+	insert_sql = None
+	
+	# create a schedules table with the given name, and replace the schedules table
+	#  with the schedules_packed table, keeping it as schedules_csv
+	create_sql = None
+	replace_sql = None
+	
+	# add the id column to a schedules table created without it, None if the
+	#  backend identifies the rows another way, and the column that identifies the rows
+	add_id_sql = None
+	id_column = 'id'
+	
+	# create the schedule_facets table, and add to the count of a facet
+	facet_create_sql = None
+	facet_insert_sql = None
+	
+	# create the schedule_version table, increment the version, and increment the rewrite version
+	version_create_sql = None
+	version_update_sql = None
+	rewrite_update_sql = None
+	
+	# add the score_version column to a schedules table created without it
+	add_score_version_sql = None
+	
+	# add the fingerprint column to a schedules table created without it, and its unique key
+	add_fingerprint_sql = None
+	
+	# clause of a read of the stored keys in a write, so it reads the latest
+	#  committed rows, not a snapshot from before the version row was locked
+	locking_read = ''
+	
+	# read the schedules, or the schedules with a stale score, that is a different
+	#  score version, except a schedule with violations only needs the constraints version
+	select_sql = 'SELECT schedule, year, score FROM schedules'
+	stale_select_sql = None
+	stale_condition = 'WHERE score_version IS NULL OR (score_version <> {0} AND (score >= 0 OR score_version NOT LIKE {0}))'
+	count_sql = 'SELECT COUNT(*) FROM schedules'
+	
+	def __init__(self, batch_size=1000):
+		"""
+		Initializes the store, without connecting.
+		
+		Args:
+		  batch_size: the number of rows per executemany, and per fetch
+		"""
+		self.batch_size = batch_size
+		self._conn = None
+	
+	
+	def __enter__(self):
+		return self
+	
+	
+	def __exit__(self, *args):
+		self.close()
+	
+	
+	def _connect(self):
+		"""
+		Return:
+		  A new database connection.
+		"""
+		raise NotImplementedError
+	
+	
+	def _cursor(self, conn):
+		"""
+		Args:
+		  conn: a database connection
+		
+		Return:
+		  A cursor for reading many rows.
+		"""
+		return conn.cursor()
+	
+	
+	def _read_connection(self):
+		"""
+		Return:
+		  A connection for reading many rows while the store connection writes,
+		   closed after the read if it is not the store connection.
+		"""
+		return self._connect()
+	
+	
+	def connection(self):
+		"""
+		Gets the connection, connecting if needed.
+		
+		Return:
+		  The database connection.
+		"""
+		if self._conn is None:
+			self._conn = self._connect()
+		return self._conn
+	
+	
+	def close(self):
+		"""
+		Closes the connection, the next use reconnects.
+		"""
+		if self._conn is not None:
+			try:
+				self._conn.close()
+			finally:
+				self._conn = None
+	
+	
+	def insert_schedules(self, rows):
+		"""
+		Inserts schedules, or updates the score of the schedules that already exist,
+		 in batches of batch_size rows, and commits. A schedule with the fingerprint
+		 of a stored schedule of the year updates the stored schedule instead. The
+		 facets are counted for the new schedules. If there is an error, the
+		 connection is closed, so the next use reconnects, and the error is raised.
+		
+		Args:
+		  rows: a list of (schedule, year, score), see encode_schedule
+		"""
+		if not rows:
+			return
+		try:
+			conn = self.connection()
+			cursor = conn.cursor()
+			cursor.execute(self.version_update_sql)
+			rewrite = False
+			for i in range(0, len(rows), self.batch_size):
+				if self._insert(cursor, rows[i:i+self.batch_size], lambda values: cursor.executemany(self.insert_sql, values)):
+					rewrite = True
+			if rewrite:
+				cursor.execute(self.rewrite_update_sql)
+			cursor.close()
+			conn.commit()
+		except:
+			self.close()
+			raise
+	
+	
+	def load_schedules(self, rows):
+		"""
+		Bulk loads schedules, the same as insert_schedules, for loading many
+		 schedules at once. Backends with a bulk load, such as LOAD DATA, override
+		 this, the others insert the schedules.
+		
+		Args:
+		  rows: a list of (schedule, year, score), see encode_schedule
+		"""
+		self.insert_schedules(rows)
+	
+	
+	def _insert(self, cursor, rows, write):
+		"""
+		Writes schedules, and counts the facets of the new schedules. The version
+		 row needs to be locked, see insert_schedules.
+		
+		Args:
+		  cursor: a cursor of the connection
+		  rows: a list of (schedule, year, score), see encode_schedule
+		  write: a function that inserts, or updates, a list of
+		   (schedule, year, score, score_version, fingerprint) values
+		
+		Return:
+		  True if the score of a stored schedule was written, see the rewrite version.
+		"""
+		digests = get_digests([row[0] for row in rows])
+		existing = self._get_existing(cursor, 'fingerprint', [(digest, row[1]) for digest, row in zip(digests, rows)])
+		write([tuple(row) + (score_version, digest) for row, digest in zip(rows, digests)])
+		
+		# the first schedule of each fingerprint that is not stored is inserted
+		new = dict()
+		for digest, row in zip(digests, rows):
+			if (digest, row[1]) not in existing:
+				new.setdefault((digest, row[1]), row[0])
+		self._update_facets(cursor, get_facet_counts(list(new.values())))
+		return len(existing) > 0
+	
+	
+	def update_scores(self, rows):
+		"""
+		Updates the scores of stored schedules, with the current score version, in
+		 batches of batch_size rows, and commits. The schedules do not change, so
+		 there are no fingerprints or facets to update, and the version is not
+		 incremented, see increment_version. If there is an error, the connection
+		 is closed, so the next use reconnects, and the error is raised.
+		
+		Args:
+		  rows: a list of (schedule, year, score)
+		"""
+		if not rows:
+			return
+		sql = 'UPDATE schedules SET score = %s, score_version = %s WHERE schedule = %s AND year = %s' % ((self.placeholder,) * 4)
+		try:
+			conn = self.connection()
+			cursor = conn.cursor()
+			for i in range(0, len(rows), self.batch_size):
+				cursor.executemany(sql, [(score, score_version, schedule, year) for schedule, year, score in rows[i:i+self.batch_size]])
+			cursor.close()
+			conn.commit()
+		except:
+			self.close()
+			raise
+	
+	
+	def increment_version(self, rewrite=False):
+		"""
+		Increments the version of the schedules, and commits, so the web app
+		 reloads its caches, such as once after the scores are updated.
+		
+		Args:
+		  rewrite: True to also increment the rewrite version, after stored schedules were changed
+		"""
+		cursor = self.connection().cursor()
+		try:
+			cursor.execute(self.version_update_sql)
+			if rewrite:
+				cursor.execute(self.rewrite_update_sql)
+		finally:
+			cursor.close()
+		self.connection().commit()
+	
+	
+	def delete_schedules(self, keys):
+		"""
+		Deletes schedules, in batches of batch_size rows, and commits. The facets
+		 of the deleted schedules are uncounted.
+		
+		Args:
+		  keys: a list of (schedule, year)
+		"""
+		if not keys:
+			return
+		sql = 'DELETE FROM schedules WHERE schedule = %s AND year = %s' % (self.placeholder, self.placeholder)
+		try:
+			conn = self.connection()
+			cursor = conn.cursor()
+			cursor.execute(self.version_update_sql)
+			cursor.execute(self.rewrite_update_sql)
+			for i in range(0, len(keys), self.batch_size):
+				batch = keys[i:i+self.batch_size]
+				existing = self._get_existing(cursor, 'schedule', batch)
+				cursor.executemany(sql, batch)
+				self._update_facets(cursor, -get_facet_counts([schedule for schedule, year in existing]))
+			cursor.close()
+			conn.commit()
+		except:
+			self.close()
+			raise
+	
+	
+	def _get_existing(self, cursor, column, keys):
+		"""
+		Gets the keys of the schedules that are stored, with one query per year
+		 and 500 values, to keep under the parameter limit of SQLite.
+		
+		Args:
+		  cursor: a cursor of the connection
+		  column: the column of the key, schedule or fingerprint
+		  keys: a list of (schedule or fingerprint, year)
+		
+		Return:
+		  A set of the stored keys, with the schedule or fingerprint as bytes.
+		"""
+		
+		year_values = dict()
+		for value, year in keys:
+			year_values.setdefault(year, []).append(value)
+		
+		existing = set()
+		for year, values in year_values.items():
+			for i in range(0, len(values), 500):
+				batch = values[i:i+500]
+				cursor.execute('SELECT %s FROM schedules WHERE year = %s AND %s IN (%s)%s' % (column, self.placeholder, column, ', '.join([self.placeholder] * len(batch)), self.locking_read), [year] + batch)
+				existing.update((bytes(row[0]), year) for row in cursor.fetchall())
+		
+		return existing
+	
+	
+	def _update_facets(self, cursor, counts):
+		"""
+		Adds to the facet counts.
+		
+		Args:
+		  cursor: a cursor of the connection
+		  counts: the counts to add, see get_facet_counts
+		"""
+		rows = [(facet_gameslots[i], int(matchup), int(counts[i, matchup])) for i, matchup in zip(*np.nonzero(counts))]
+		if rows:
+			cursor.executemany(self.facet_insert_sql, rows)
+	
+	
+	def rebuild_facets(self):
+		"""
+		Recounts the facets of all of the schedules, for a schedules table from
+		 before the facets were kept, reading with a second connection. The version
+		 row is locked first, so no schedules are written between the read and the
+		 replace of the counts.
+		"""
+		
+		conn = self.connection()
+		cursor = conn.cursor()
+		cursor.execute(self.version_update_sql)
+		
+		counts = np.zeros((len(facet_gameslots), NUM_MATCHUPS), dtype=np.int64)
+		reader = self._connect()
+		try:
+			batch = []
+			for schedule, year, score in self._fetch(reader):
+				batch.append(schedule)
+				if len(batch) == self.batch_size:
+					counts += get_facet_counts(batch)
+					batch = []
+			counts += get_facet_counts(batch)
+		finally:
+			reader.close()
+		
+		# replace the counts
+		cursor.execute('DELETE FROM schedule_facets')
+		self._update_facets(cursor, counts)
+		cursor.close()
+		conn.commit()
+	
+	
+	def migrate_to_packed(self):
+		"""
+		Migrates the schedules table from comma separated schedules to packed
+		 schedules, see encode_schedule. The schedules are copied to a new table,
+		 in batches, which then replaces the schedules table. The old table is kept
+		 as schedules_csv, and the facets are recounted.
+		"""
+		
+		conn = self.connection()
+		cursor = conn.cursor()
+		cursor.execute(self.create_sql.format(table='schedules_packed'))
+		insert_sql = self.insert_sql.replace('INSERT INTO schedules ', 'INSERT INTO schedules_packed ')
+		
+		# copy the schedules to the new table, reading with a second connection
+		#  so the reads and the writes do not share a connection, the scores are
+		#  stale, and the schedules with the fingerprint of a copied schedule are not copied
+		def write(batch):
+			digests = get_digests([row[0] for row in batch])
+			cursor.executemany(insert_sql, [row + (None, digest) for row, digest in zip(batch, digests)])
+		
+		reader = self._connect()
+		try:
+			batch = []
+			for schedule, year, score in self._fetch(reader):
+				batch.append((encode_schedule(decode_csv_schedule(schedule)), year, score))
+				if len(batch) == self.batch_size:
+					write(batch)
+					batch = []
+			if batch:
+				write(batch)
+		finally:
+			reader.close()
+		conn.commit()
+		
+		# replace the table
+		for sql in self.replace_sql:
+			cursor.execute(sql)
+		cursor.close()
+		conn.commit()
+		
+		self.rebuild_facets()
+	
+	
+	def add_ids(self):
+		"""
+		Adds the id column to a packed schedules table created without it. Each
+		 schedule gets a unique id, and new schedules get the next id, so the web
+		 app can index the schedules and fetch them by id.
+		"""
+		if self.add_id_sql is None:
+			raise Exception("the %s does not have an id column" % type(self).__name__)
+		cursor = self.connection().cursor()
+		try:
+			cursor.execute(self.add_id_sql)
+		finally:
+			cursor.close()
+		self.connection().commit()
+	
+	
+	def get_schedules(self):
+		"""
+		Reads the schedules, batch_size rows at a time.
+		
+		Yield:
+		  (schedule, year, score) rows.
+		"""
+		return self._fetch(self.connection())
+	
+	
+	def get_random_schedule(self):
+		"""
+		Reads a random schedule, the first from a random id between the smallest
+		 and the largest id, so only one row is read. A schedule after a gap in the
+		 ids, such as after deletes, is more likely.
+		
+		Return:
+		  A (schedule, year, score) row, None if there are no schedules.
+		"""
+		cursor = self.connection().cursor()
+		try:
+			cursor.execute('SELECT MIN({0}), MAX({0}) FROM schedules'.format(self.id_column))
+			low, high = cursor.fetchone()
+			if low is None:
+				return None
+			cursor.execute('SELECT schedule, year, score FROM schedules WHERE {0} >= {1} ORDER BY {0} LIMIT 1'.format(self.id_column, self.placeholder), (randint(low, high),))
+			return cursor.fetchone()
+		finally:
+			cursor.close()
+	
+	
+	def add_score_versions(self):
+		"""
+		Adds the score_version column to a packed schedules table created without
+		 it. The scores of all of the schedules are stale, until they are rescored.
+		"""
+		cursor = self.connection().cursor()
+		try:
+			for sql in self.add_score_version_sql:
+				cursor.execute(sql)
+		finally:
+			cursor.close()
+		self.connection().commit()
+	
+	
+	def add_fingerprints(self):
+		"""
+		Adds the fingerprint column to a packed schedules table created without it,
+		 and its unique key. The schedules with the fingerprint of a schedule of the
+		 same year read before them are deleted.
+		"""
+		
+		conn = self.connection()
+		cursor = conn.cursor()
+		cursor.execute(self.add_fingerprint_sql[0])
+		conn.commit()
+		
+		# set the fingerprints a batch at a time, keeping the duplicates to delete
+		sql = 'UPDATE schedules SET fingerprint = %s WHERE schedule = %s AND year = %s' % (self.placeholder, self.placeholder, self.placeholder)
+		fingerprints = set()
+		deletes = []
+		for rows in self.get_schedule_batches():
+			updates = []
+			for digest, (schedule, year, score) in zip(get_digests([row[0] for row in rows]), rows):
+				if (digest, year) in fingerprints:
+					deletes.append((schedule, year))
+				else:
+					fingerprints.add((digest, year))
+					updates.append((digest, schedule, year))
+			cursor.executemany(sql, updates)
+			conn.commit()
+		self.delete_schedules(deletes)
+		
+		# add the unique key
+		cursor = self.connection().cursor()
+		for sql in self.add_fingerprint_sql[1:]:
+			cursor.execute(sql)
+		cursor.close()
+		self.connection().commit()
+	
+	
+	def get_schedule_batches(self, stale=False):
+		"""
+		Reads the schedules, batch_size rows at a time, with a read connection so
+		 the schedules can be written while they are read, see _read_connection.
+		
+		Args:
+		  stale: True to only read the schedules with a stale score
+		
+		Yield:
+		  Lists of (schedule, year, score) rows.
+		"""
+		conn = self._read_connection()
+		cursor = self._cursor(conn)
+		try:
+			if stale:
+				cursor.execute(self.stale_select_sql, (score_version, '%d.%%' % constraints_version))
+			else:
+				cursor.execute(self.select_sql)
+			rows = cursor.fetchmany(self.batch_size)
+			while rows:
+				yield rows
+				rows = cursor.fetchmany(self.batch_size)
+		finally:
+			cursor.close()
+			if conn is not self._conn:
+				conn.close()
+	
+	
+	def _fetch(self, conn):
+		"""
+		Reads the schedules with a connection, batch_size rows at a time.
+		
+		Args:
+		  conn: a database connection
+		
+		Yield:
+		  (schedule, year, score) rows.
+		"""
+		cursor = self._cursor(conn)
+		try:
+			cursor.execute(self.select_sql)
+			rows = cursor.fetchmany(self.batch_size)
+			while rows:
+				yield from rows
+				rows = cursor.fetchmany(self.batch_size)
+		finally:
+			cursor.close()
+	
+	
+	def get_version(self, rewrite=False):
+		"""
+		Args:
+		  rewrite: True for the rewrite version
+		
+		Return:
+		  The version of the schedules, incremented by each write, or the rewrite
+		   version, incremented by each write that changes stored schedules, 0 before the first.
+		"""
+		cursor = self.connection().cursor()
+		try:
+			cursor.execute('SELECT version FROM schedule_version WHERE id = %d' % (1 if rewrite else 0))
+			row = cursor.fetchone()
+			return 0 if row is None else row[0]
+		finally:
+			cursor.close()
+	
+	
+	def get_num_schedules(self):
+		"""
+		Return:
+		  The number of schedules.
+		"""
+		cursor = self.connection().cursor()
+		try:
+			cursor.execute(self.count_sql)
+			return cursor.fetchone()[0]
+		finally:
+			cursor.close()
+
+
+class MySQLScheduleStore(ScheduleStore):
+	"""
+	Schedule store in a MySQL database, with pymysql. executemany sends each batch
+	 as one multiple row INSERT statement. Bulk loads send the schedules as a file,
+	 with LOAD DATA LOCAL INFILE, which needs local_infile enabled on the server.
+	"""
+	
+	placeholder = '%s'
+	insert_sql = 'INSERT INTO schedules (schedule, year, score, score_version, fingerprint) VALUES (%s, %s, %s, %s, %s) ON DUPLICATE KEY UPDATE score=VALUES(score), score_version=VALUES(score_version)'
+	
+	create_sql = 'CREATE TABLE IF NOT EXISTS {table} (schedule BINARY(%d) NOT NULL, year VARCHAR(16) NOT NULL, score DOUBLE, score_version VARCHAR(16), fingerprint BINARY(%d), id BIGINT NOT NULL AUTO_INCREMENT UNIQUE, PRIMARY KEY (schedule, year), INDEX (score_version), UNIQUE (fingerprint, year))' % (NUM_MATCHUPS, DIGEST_SIZE)
+	replace_sql = ['RENAME TABLE schedules TO schedules_csv, schedules_packed TO schedules']
+	add_id_sql = 'ALTER TABLE schedules ADD COLUMN id BIGINT NOT NULL AUTO_INCREMENT UNIQUE'
+	add_score_version_sql = ['ALTER TABLE schedules ADD COLUMN score_version VARCHAR(16), ADD INDEX (score_version)']
+	add_fingerprint_sql = ['ALTER TABLE schedules ADD COLUMN fingerprint BINARY(%d)' % DIGEST_SIZE, 'ALTER TABLE schedules ADD UNIQUE (fingerprint, year)']
+	
+	stale_select_sql = 'SELECT schedule, year, score FROM schedules ' + ScheduleStore.stale_condition.format('%s')
+	locking_read = ' LOCK IN SHARE MODE'
+	
+	facet_create_sql = 'CREATE TABLE IF NOT EXISTS schedule_facets (gameslot SMALLINT NOT NULL, matchup SMALLINT NOT NULL, count BIGINT NOT NULL, PRIMARY KEY (gameslot, matchup))'
+	facet_insert_sql = 'INSERT INTO schedule_facets (gameslot, matchup, count) VALUES (%s, %s, %s) ON DUPLICATE KEY UPDATE count=count+VALUES(count)'
+	
+	version_create_sql = 'CREATE TABLE IF NOT EXISTS schedule_version (id TINYINT NOT NULL PRIMARY KEY, version BIGINT NOT NULL)'
+	version_update_sql = 'INSERT INTO schedule_version (id, version) VALUES (0, 1) ON DUPLICATE KEY UPDATE version=version+1'
+	rewrite_update_sql = 'INSERT INTO schedule_version (id, version) VALUES (1, 1) ON DUPLICATE KEY UPDATE version=version+1'
+	
+	# bulk load into a temporary table, with the packed columns as hex, and then
+	#  insert, or update, the schedules the same as insert_sql
+	load_create_sql = 'CREATE TEMPORARY TABLE IF NOT EXISTS schedule_load (schedule BINARY(%d) NOT NULL, year VARCHAR(16) NOT NULL, score DOUBLE, score_version VARCHAR(16), fingerprint BINARY(%d))' % (NUM_MATCHUPS, DIGEST_SIZE)
+	load_sql = 'LOAD DATA LOCAL INFILE %s INTO TABLE schedule_load (@schedule, year, score, score_version, @fingerprint) SET schedule = UNHEX(@schedule), fingerprint = UNHEX(@fingerprint)'
+	load_insert_sql = 'INSERT INTO schedules (schedule, year, score, score_version, fingerprint) SELECT schedule, year, score, score_version, fingerprint FROM schedule_load ON DUPLICATE KEY UPDATE score=schedule_load.score, score_version=schedule_load.score_version'
+	
+	def __init__(self, host, port, user, password, dbname, batch_size=1000):
+		"""
+		Initializes the store, without connecting.
+		
+		Args:
+		  host: the database host
+		  port: the database port
+		  user: the database user
+		  password: the database password
+		  dbname: the database name
+		  batch_size: the number of rows per executemany, and per fetch
+		"""
+		super().__init__(batch_size)
+		self.host = host
+		self.port = port
+		self.user = user
+		self.password = password
+		self.dbname = dbname
+	
+	
+	def _connect(self, local_infile=False):
+		conn = pymysql.connect(host=self.host, user=self.user, port=self.port, passwd=self.password, db=self.dbname, local_infile=local_infile)
+		with conn.cursor() as cursor:
+			cursor.execute(self.facet_create_sql)
+			cursor.execute(self.version_create_sql)
+		return conn
+	
+	
+	def _cursor(self, conn):
+		# unbuffered, so reading all of the schedules does not hold them all in memory
+		return conn.cursor(pymysql.cursors.SSCursor)
+	
+	
+	def load_schedules(self, rows):
+		"""
+		Bulk loads schedules with LOAD DATA LOCAL INFILE, the same as insert_schedules,
+		 and commits. The load has its own connection, so local_infile is only
+		 enabled for it, and its temporary table is dropped when it is closed.
+		
+		Args:
+		  rows: a list of (schedule, year, score), see encode_schedule
+		"""
+		if not rows:
+			return
+		conn = self._connect(local_infile=True)
+		try:
+			cursor = conn.cursor()
+			cursor.execute(self.version_update_sql)
+			cursor.execute(self.load_create_sql)
+			if self._insert(cursor, rows, lambda values: self._load(cursor, values)):
+				cursor.execute(self.rewrite_update_sql)
+			cursor.close()
+			conn.commit()
+		finally:
+			conn.close()
+	
+	
+	def _load(self, cursor, values):
+		"""
+		Loads values into the schedules table, through a file and the schedule_load table.
+		
+		Args:
+		  cursor: a cursor of a connection with local_infile enabled
+		  values: a list of (schedule, year, score, score_version, fingerprint)
+		"""
+		f = tempfile.NamedTemporaryFile('w', suffix='.tsv', delete=False)
+		try:
+			with f:
+				write_load_file(f, values)
+			cursor.execute('DELETE FROM schedule_load')
+			cursor.execute(self.load_sql, (f.name,))
+			cursor.execute(self.load_insert_sql)
+		finally:
+			os.remove(f.name)
+
+
+class SQLiteScheduleStore(ScheduleStore):
+	"""
+	Schedule store in a local SQLite file, for local or offline runs. The
+	 schedules table is created if it does not exist. Rows are identified by
+	 the SQLite rowid, there is no id column.
+	"""
+	
+	placeholder = '?'
+	id_column = 'rowid'
+	insert_sql = 'INSERT INTO schedules (schedule, year, score, score_version, fingerprint) VALUES (?, ?, ?, ?, ?) ON CONFLICT (schedule, year) DO UPDATE SET score=excluded.score, score_version=excluded.score_version ON CONFLICT (fingerprint, year) DO UPDATE SET score=excluded.score, score_version=excluded.score_version'
+	
+	create_sql = 'CREATE TABLE IF NOT EXISTS {table} (schedule BLOB NOT NULL, year TEXT NOT NULL, score REAL, score_version TEXT, fingerprint BLOB, PRIMARY KEY (schedule, year), UNIQUE (fingerprint, year))'
+	replace_sql = ['ALTER TABLE schedules RENAME TO schedules_csv', 'ALTER TABLE schedules_packed RENAME TO schedules', 'CREATE INDEX IF NOT EXISTS schedules_score_version ON schedules (score_version)']
+	add_score_version_sql = ['ALTER TABLE schedules ADD COLUMN score_version TEXT', 'CREATE INDEX IF NOT EXISTS schedules_score_version ON schedules (score_version)']
+	add_fingerprint_sql = ['ALTER TABLE schedules ADD COLUMN fingerprint BLOB', 'CREATE UNIQUE INDEX IF NOT EXISTS schedules_fingerprint ON schedules (fingerprint, year)']
+	
+	# a table scan, the scores are rewritten while they are read, see _read_connection
+	stale_select_sql = 'SELECT schedule, year, score FROM schedules NOT INDEXED ' + ScheduleStore.stale_condition.format('?')
+	
+	facet_create_sql = 'CREATE TABLE IF NOT EXISTS schedule_facets (gameslot INTEGER NOT NULL, matchup INTEGER NOT NULL, count INTEGER NOT NULL, PRIMARY KEY (gameslot, matchup))'
+	facet_insert_sql = 'INSERT INTO schedule_facets (gameslot, matchup, count) VALUES (?, ?, ?) ON CONFLICT (gameslot, matchup) DO UPDATE SET count=count+excluded.count'
+	
+	version_create_sql = 'CREATE TABLE IF NOT EXISTS schedule_version (id INTEGER NOT NULL PRIMARY KEY, version INTEGER NOT NULL)'
+	version_update_sql = 'INSERT INTO schedule_version (id, version) VALUES (0, 1) ON CONFLICT (id) DO UPDATE SET version=version+1'
+	rewrite_update_sql = 'INSERT INTO schedule_version (id, version) VALUES (1, 1) ON CONFLICT (id) DO UPDATE SET version=version+1'
+	
+	def __init__(self, filepath, batch_size=1000):
+		"""
+		Initializes the store, without connecting.
+		
+		Args:
+		  filepath: the path to the SQLite file
+		  batch_size: the number of rows per executemany, and per fetch
+		"""
+		super().__init__(batch_size)
+		self.filepath = filepath
+	
+	
+	def _read_connection(self):
+		# a second connection would lock the file for the writes, and SQLite
+		#  allows writes on the connection while it reads
+		return self.connection()
+	
+	
+	def _connect(self):
+		conn = sqlite3.connect(self.filepath)
+		conn.execute(self.create_sql.format(table='schedules'))
+		conn.execute(self.facet_create_sql)
+		conn.execute(self.version_create_sql)
+		try:
+			conn.execute(self.add_score_version_sql[-1])
+		except sqlite3.OperationalError:
+			# a schedules table from before the score_version column, see add_score_versions
+			pass
+		conn.commit()
+		return conn
+
+
+def get_store(password=None, sqlite_path=None, batch_size=1000):
+	"""
+	Gets the schedule store of a script, the SQLite store if a path is given,
+	 otherwise the MySQL store.
+	
+	Args:
+	  password: the MySQL password
+	  sqlite_path: the path to a SQLite file, None for MySQL
+	  batch_size: the number of rows per executemany, and per fetch
+	
+	Return:
+	  The schedule store.
+	"""
+	if sqlite_path is not None:
+		return SQLiteScheduleStore(sqlite_path, batch_size)
+	if password is None:
+		raise Exception("a password is needed for the MySQL store")
+	return MySQLScheduleStore(host, port, user, password, dbname, batch_size)
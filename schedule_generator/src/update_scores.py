@@ -1,41 +1,106 @@
-from solver.genetic_algorithm import genetic_algorithm
-from schedule.NFLSchedule import NFLSchedule
-import csv
-import pymysql
+"""
+Rescores the schedules, after a change to the score calculation. The schedules
+ are streamed from the database a batch at a time, each batch is scored with the
+ batch scoring, optionally in several processes, and the scores are written in
+ batches, so the memory used does not depend on the number of schedules.
+
+Only the schedules with a stale score are rescored, unless -a is given, see
+ schedule.score.score_calculator.score_version. Each batch is written with the
+ current score version, so an interrupted run resumes where it stopped. Only the
+ scores are written, and the version and the rewrite version of the schedules
+ are incremented once, at the end of the run, so the web app rebuilds its index once.
+"""
+
+from schedule.score.score_calculator import get_scores
+from storage.schedule_store import get_store, decode_schedules
+from collections import deque
+from multiprocessing import Pool
 import argparse
-from random import randint
 
 # argument parser for password
 parser = argparse.ArgumentParser(description='Supply the password.')
 parser.add_argument('-p',
             dest='password',
-            required=True,
+            required=False,
             type=str,
             help='the rds password')
+parser.add_argument('-d',
+            dest='sqlite_path',
+            required=False,
+            type=str,
+            default=None,
+            help='A SQLite file the schedules are stored in, instead of the rds database')
+parser.add_argument('-b',
+            dest='batch_size',
+            required=False,
+            type=int,
+            default=10000,
+            help='The number of schedules read, scored and written at a time')
+parser.add_argument('-j',
+            dest='processes',
+            required=False,
+            type=int,
+            default=1,
+            help='The number of processes to score the schedules in')
+parser.add_argument('-a',
+            dest='all',
+            action='store_true',
+            help='Rescore all of the schedules, not only the schedules with a stale score')
 args = parser.parse_args()
 
-# connection information
-host='nflschedules.cd7ko38smnnq.us-west-1.rds.amazonaws.com'
-port=3306
-dbname='nflschedules'
-user='nflschedules'
-password=args.password
-
-sql = 'INSERT INTO schedules (schedule, year, score) VALUES (%s, %s, %s) ON DUPLICATE KEY UPDATE score=%s'
-
-try:
-	conn = pymysql.connect(host, user=user, port=port, passwd=password, db=dbname)
-	with conn.cursor() as cursor:
-		cursor.execute('SELECT * FROM schedules')
-		all_matchups = list(cursor.fetchall())
-		base = NFLSchedule()
-		schedules = []
-		for matchup in all_matchups:
-			schedule = NFLSchedule()
-			schedule.set_matchups([int(i) for i in matchup[0].split(',')])
-			with conn.cursor() as cursor:
-				cursor.execute(sql, (",".join(map(str,schedule.get_matchups().tolist())), '2018', schedule.get_score(), schedule.get_score()))
-		conn.commit()
-finally:
-	conn.close()
+
+def score_schedules(schedules):
+	"""
+	Scores packed schedules.
 	
+	Args:
+	  schedules: a list of packed schedules, see storage.schedule_store.encode_schedule
+	
+	Return:
+	  A list of the score of each schedule.
+	"""
+	return get_scores(decode_schedules(schedules)).tolist()
+
+
+def score_batches(batches, processes):
+	"""
+	Scores batches of rows, in order. With more than one process, the batches are
+	 scored in a pool of processes, with at most two batches per process waiting,
+	 so the batches are not read faster than they are scored.
+	
+	Args:
+	  batches: an iterable of lists of (schedule, year, score) rows
+	  processes: the number of processes
+	
+	Yield:
+	  Lists of (schedule, year, score) rows, with the new scores.
+	"""
+	
+	if processes <= 1:
+		for rows in batches:
+			yield [(row[0], row[1], score) for row, score in zip(rows, score_schedules([row[0] for row in rows]))]
+		return
+	
+	with Pool(processes) as pool:
+		pending = deque()
+		for rows in batches:
+			pending.append((rows, pool.apply_async(score_schedules, ([row[0] for row in rows],))))
+			if len(pending) == 2*processes:
+				rows, scores = pending.popleft()
+				yield [(row[0], row[1], score) for row, score in zip(rows, scores.get())]
+		while pending:
+			rows, scores = pending.popleft()
+			yield [(row[0], row[1], score) for row, score in zip(rows, scores.get())]
+
+
+if __name__ == '__main__':
+	with get_store(args.password, args.sqlite_path, args.batch_size) as store:
+		num_schedules = 0
+		try:
+			for rows in score_batches(store.get_schedule_batches(stale=not args.all), args.processes):
+				store.update_scores(rows)
+				num_schedules += len(rows)
+				print(num_schedules)
+		finally:
+			if num_schedules > 0:
+				store.increment_version(rewrite=True)
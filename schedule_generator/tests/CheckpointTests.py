@@ -0,0 +1,33 @@
+from tests.context import src
+import os
+import tempfile
+import numpy as np
+from schedule.NFLSchedule import NFLSchedule
+from schedule.fingerprint import get_digest
+from solver.population import Population
+from solver.checkpoint import save_checkpoint, load_checkpoint
+from solver.genetic_algorithm import next_generation
+
+
+def test_resume():
+	"""
+	Test a run resumed from a checkpoint continues exactly where it left off.
+	"""
+	
+	np.random.seed(0)
+	population = Population(NFLSchedule(), 32, 256)
+	digests = {get_digest(f) for f in population.fingerprints(range(4))}
+	with tempfile.TemporaryDirectory() as directory:
+		filepath = os.path.join(directory, 'checkpoint.npz')
+		save_checkpoint(filepath, population, 7, digests)
+		for _ in range(5):
+			next_generation(population, 4)
+		
+		resumed, generation, resumed_digests = load_checkpoint(filepath)
+		for _ in range(5):
+			next_generation(resumed, 4)
+	
+	assert generation == 7
+	assert resumed_digests == digests
+	assert np.array_equal(resumed.matchups, population.matchups)
+	assert np.array_equal(resumed.scores, population.scores)
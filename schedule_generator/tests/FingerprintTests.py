@@ -0,0 +1,59 @@
+from tests.context import src
+from random import seed
+from schedule.NFLSchedule import NFLSchedule
+from schedule.fingerprint import get_fingerprints
+from schedule.constants import thanksgiving_gameslots, london_games, sunday_gameslot, gameslot_week_index, NUM_GAMESLOTS
+
+
+def test_sunday_order():
+	"""
+	Test schedules that only differ by the order of Sunday afternoon games are equal, with the same hash.
+	"""
+	
+	s1 = NFLSchedule()
+	s2 = s1.copy()
+	s2.swap(s2.gameslot_matchup[1], s2.gameslot_matchup[2])
+	s2.swap(s2.gameslot_matchup[NUM_GAMESLOTS-1], s2.gameslot_matchup[NUM_GAMESLOTS-5])
+	assert s1 == s2
+	assert hash(s1) == hash(s2)
+	assert len({s1.fingerprint(), s2.fingerprint()}) == 1
+
+
+def test_fixed_gameslots():
+	"""
+	Test swapping a Thursday, Thanksgiving, Sunday night or Monday night game changes the fingerprint.
+	"""
+	
+	s1 = NFLSchedule()
+	for gameslot in [0, thanksgiving_gameslots[0], thanksgiving_gameslots[1], 14, 15]:
+		s2 = s1.copy()
+		s2.swap(s2.gameslot_matchup[gameslot], s2.gameslot_matchup[5])
+		assert s1 != s2
+		assert s1.fingerprint() != s2.fingerprint()
+
+
+def test_international_gameslot():
+	"""
+	Test swapping an international game with a Sunday afternoon game of the same week changes the fingerprint.
+	"""
+	
+	s1 = NFLSchedule()
+	for gameslot in london_games:
+		sunday = [g for g in range(NUM_GAMESLOTS) if sunday_gameslot[g] and gameslot_week_index[g] == gameslot_week_index[gameslot]]
+		s2 = s1.copy()
+		s2.swap(s2.gameslot_matchup[gameslot], s2.gameslot_matchup[sunday[0]])
+		assert s1 != s2
+
+
+def test_batch_fingerprints():
+	"""
+	Test the batch fingerprints are the same as the fingerprint of each schedule.
+	"""
+	
+	seed(0)
+	schedules = []
+	for i in range(32):
+		s = NFLSchedule()
+		s.shuffle(i)
+		schedules.append(s)
+	assert get_fingerprints([s.get_matchups() for s in schedules]) == [s.fingerprint() for s in schedules]
@@ -0,0 +1,37 @@
+from tests.context import src
+import time
+import solver.genetic_algorithm
+from schedule.NFLSchedule import NFLSchedule
+from solver.genetic_algorithm import island_genetic_algorithm_stream
+
+
+def failing_island(index, matchups, inbox, outbox, results, stop, *args):
+	"""
+	Island that fails if it is the second island, and otherwise waits until stopped.
+	"""
+	if index == 1:
+		raise Exception("island failed")
+	while not stop.is_set():
+		time.sleep(0.05)
+
+
+def test_island_failure():
+	"""
+	Test the island stream raises when one island exits before it is stopped, and stops the other islands.
+	"""
+	
+	island = solver.genetic_algorithm._island
+	solver.genetic_algorithm._island = failing_island
+	try:
+		schedules = island_genetic_algorithm_stream(NFLSchedule(), num_islands=3)
+		start = time.time()
+		try:
+			next(schedules)
+			raised = None
+		except Exception as e:
+			raised = str(e)
+	finally:
+		solver.genetic_algorithm._island = island
+	
+	assert raised == "island 1 stopped with exit code 1"
+	assert time.time() - start < 10
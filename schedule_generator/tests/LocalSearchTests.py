@@ -0,0 +1,32 @@
+from tests.context import src
+from random import seed
+from schedule.NFLSchedule import NFLSchedule
+from solver.local_search import simulated_annealing, simulated_annealing_stream
+
+
+def test_simulated_annealing():
+	"""
+	Test simulated annealing finds unique playable schedules, with the same score as scored from scratch.
+	"""
+	
+	seed(0)
+	schedules = simulated_annealing(NFLSchedule(), num_results=2)
+	assert len(set(schedules)) == 2
+	for schedule in schedules:
+		s = NFLSchedule()
+		s.set_matchups(schedule.get_matchups())
+		assert s.constraints_satisfied()
+		assert s.get_score() == schedule.get_score()
+
+
+def test_simulated_annealing_stream():
+	"""
+	Test the stream yields unique playable schedules until it is closed.
+	"""
+	
+	seed(1)
+	stream = simulated_annealing_stream(NFLSchedule())
+	schedules = [next(stream) for _ in range(3)]
+	stream.close()
+	assert len(set(schedules)) == 3
+	assert all(schedule.constraints_satisfied() for schedule in schedules)
@@ -0,0 +1,75 @@
+from tests.context import src
+import os
+import json
+import tempfile
+import numpy as np
+from schedule.NFLSchedule import NFLSchedule
+from schedule.score.score_calculator import get_scores, get_score_terms_batch, fixed_constraint_labels
+from schedule.NFLScheduleBatch import NFLScheduleBatch
+from solver.population import Population
+from solver.genetic_algorithm import next_generation
+from solver.metrics import Metrics
+
+
+def test_metrics_scores():
+	"""
+	Test the scores are the same with metrics, and the metrics count the scoring.
+	"""
+	
+	np.random.seed(0)
+	matchups = np.array([np.random.permutation(256) for _ in range(16)])
+	with tempfile.TemporaryDirectory() as directory:
+		metrics = Metrics(os.path.join(directory, 'metrics.json'))
+		assert get_scores(matchups, metrics=metrics).tolist() == get_scores(matchups).tolist()
+	
+	assert metrics.evaluations == 16
+	assert metrics.calls['one_game_per_week_batch', None] == 1
+	assert metrics.calls['consecutive_road_games_batch', None] == 1
+	
+	# each fixed constraint is kept apart by its label
+	assert [label for name, label in metrics.calls if name == 'fixed_matchup_batch'] == fixed_constraint_labels[:4]
+	assert [label for name, label in metrics.calls if name == 'fixed_home_game_batch'] == fixed_constraint_labels[4:]
+	assert fixed_constraint_labels[0] == 'Seattle Seahawks at Oakland Raiders, gameslot 79'
+	assert fixed_constraint_labels[5] == 'Detroit Lions at home, gameslot 161'
+	assert all(metrics.calls[key] == 1 for key in metrics.calls)
+	
+	# the violations are not weighted, the constraint term is
+	violations = sum((100 if name == 'fixed_matchup_batch' else 1)*count for (name, label), count in metrics.violations.items())
+	assert violations == int(np.sum(get_score_terms_batch(NFLScheduleBatch(matchups))[:, 0]))
+	assert ('consecutive_road_games_batch', None) not in metrics.violations
+
+
+def test_metrics_write():
+	"""
+	Test the metrics of generations are written as json lines and as prometheus text.
+	"""
+	
+	np.random.seed(0)
+	with tempfile.TemporaryDirectory() as directory:
+		json_path = os.path.join(directory, 'metrics.json')
+		prometheus_path = os.path.join(directory, 'metrics.prom')
+		metrics = Metrics(json_path)
+		population = Population(NFLSchedule(), 16, 256, metrics=metrics)
+		for _ in range(3):
+			next_generation(population, 4)
+		metrics.write()
+		metrics.write()
+		metrics.format = 'prometheus'
+		metrics.filepath = prometheus_path
+		metrics.write()
+		
+		with open(json_path) as f:
+			lines = [json.loads(line) for line in f]
+		with open(prometheus_path) as f:
+			text = f.read()
+	
+	assert len(lines) == 2
+	assert lines[-1]['generations'] == 3
+	assert lines[-1]['evaluations'] == metrics.evaluations > 16
+	assert lines[-1]['worst_score'] <= lines[-1]['best_score'] <= population.scores[0]
+	assert [scorer['calls'] for scorer in lines[-1]['scorers'] if scorer['scorer'] == 'shared_stadium_batch' and scorer['label'] is None] == [4]
+	assert 'nfl_schedule_evaluations_total %d\n' % metrics.evaluations in text
+	assert 'nfl_schedule_scorer_calls_total{scorer="shared_stadium_batch"} 4\n' in text
+	assert 'nfl_schedule_scorer_calls_total{scorer="fixed_matchup_batch",label="Seattle Seahawks at Oakland Raiders, gameslot 79"} 4\n' in text
+	assert 'nfl_schedule_constraint_violations_total{constraint="fixed_home_game_batch",label="Detroit Lions at home, gameslot 161"}' in text
+	assert '# TYPE nfl_schedule_constraint_violations_total counter\n' in text
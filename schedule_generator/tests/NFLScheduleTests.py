@@ -1,8 +1,11 @@
 from tests.context import src
-from src.NFLSchedule import NFLSchedule
+from schedule.NFLSchedule import NFLSchedule
+from schedule.score.constraints.fixed_matchup import fixed_matchup
+from schedule.score.constraints.shared_stadium import shared_stadium
+from schedule.constants import london_games, mexico_games, JETS, GIANTS, RAIDERS_SEAHAWKS, CHARGERS_TITANS, JAGUARS_EAGLES, RAMS_CHIEFS
 
-# base object so only one read of file
-base = NFLSchedule.init('./resources/nfl-matchups_2018.csv')
+# base object, the matchups file is only read once, by schedule.constants
+base = NFLSchedule()
 
 # known acceptable matchup to gameslot allocation
 known_acceptable_matchup = [98,99,238,174,102,251,66,241,69,42,218,159,
@@ -76,16 +79,16 @@ def test_swap():
 
 def test_same_home_team_week():
 	"""
-	Test the same_home_team_week constraint
+	Test the shared_stadium constraint
 	"""
 
 	# init actual schedule
 	s = base.copy()
-	s._set_home_away_matrix()
+	s.get_score()
 	# week 15 Jets are on a Saturday and Giants are on Sunday
 	#  which we do not account for in the algorithm,
 	#  so 1 violation is expected
-	assert s._home_game_same_week(s.teams['New York Giants'], s.teams['New York Jets']) == 1
+	assert shared_stadium(s, GIANTS, JETS) == 1
 	
 
 def test_international():
@@ -94,9 +97,9 @@ def test_international():
 	"""
 	
 	s = base.copy()
-	# TODO assert s._specific_matchup(s.get_matchup_index("Oakland Raiders", "Seattle Seahawks"), NFLSchedule.london_games[0]) == 0
-	assert s._specific_matchup(s.get_matchup_index("Los Angeles Chargers", "Tennessee Titans"), NFLSchedule.london_games[1]) == 0
-	assert s._specific_matchup(s.get_matchup_index("Jacksonville Jaguars", "Philadelphia Eagles"), NFLSchedule.london_games[2]) == 0
-	assert s._specific_matchup(s.get_matchup_index("Los Angeles Rams", "Kansas City Chiefs"), NFLSchedule.mexico_games[0]) == 0
+	# TODO assert fixed_matchup(s, RAIDERS_SEAHAWKS, london_games[0]) == 0
+	assert fixed_matchup(s, CHARGERS_TITANS, london_games[1]) == 0
+	assert fixed_matchup(s, JAGUARS_EAGLES, london_games[2]) == 0
+	assert fixed_matchup(s, RAMS_CHIEFS, mexico_games[0]) == 0
 
 
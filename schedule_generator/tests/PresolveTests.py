@@ -0,0 +1,31 @@
+from tests.context import src
+from random import seed
+import numpy as np
+from schedule.NFLSchedule import NFLSchedule
+from schedule.score.score_calculator import get_fixed_constraints
+from solver.presolve import presolve
+from solver.population import Population
+
+
+def test_presolve():
+	"""
+	Test the presolve satisfies the fixed constraints of shuffled schedules.
+	"""
+	
+	seed(0)
+	for i in range(16):
+		s = NFLSchedule()
+		s.shuffle(256)
+		assert get_fixed_constraints(presolve(s)) == 0
+
+
+def test_mutate_pinned():
+	"""
+	Test mutation keeps the fixed constraints satisfied.
+	"""
+	
+	np.random.seed(0)
+	population = Population(NFLSchedule(), 16, 256)
+	population.mutate(np.arange(16), np.full(16, 256))
+	for i in range(16):
+		assert get_fixed_constraints(population.get_schedule(i)) == 0
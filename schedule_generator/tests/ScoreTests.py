@@ -0,0 +1,86 @@
+from tests.context import src
+from random import seed, randint
+from schedule.NFLSchedule import NFLSchedule
+from schedule.score.score_calculator import get_scores
+from schedule.score.score_cache import ScoreCache
+
+
+def full_score(schedule):
+	"""
+	Scores a schedule from scratch.
+	"""
+	s = NFLSchedule()
+	s.set_matchups(schedule.get_matchups())
+	return s.get_score(), s._score_terms
+
+
+def test_incremental_score():
+	"""
+	Test the incrementally updated score after swaps is the same as the score calculated from scratch.
+	"""
+	
+	seed(0)
+	s = NFLSchedule()
+	s.shuffle(256)
+	s.get_score()
+	for _ in range(500):
+		s.shuffle(randint(1, 3))
+		assert (s.get_score(), s._score_terms) == full_score(s)
+
+
+def test_incremental_score_copy():
+	"""
+	Test a copy keeps the incremental score state independent of the original.
+	"""
+	
+	seed(1)
+	s1 = NFLSchedule()
+	s1.get_score()
+	s2 = s1.copy()
+	s2.shuffle(10)
+	assert (s1.get_score(), s1._score_terms) == full_score(s1)
+	assert (s2.get_score(), s2._score_terms) == full_score(s2)
+
+
+def test_swap_same_week():
+	"""
+	Test swapping matchups within a week, which only changes the gameslot dependent terms.
+	"""
+	
+	s = NFLSchedule()
+	s.get_score()
+	s.swap(s.gameslot_matchup[0], s.gameslot_matchup[5])
+	assert (s.get_score(), s._score_terms) == full_score(s)
+
+
+def test_batch_scores():
+	"""
+	Test the batch scores are the same as the score of each schedule.
+	"""
+	
+	seed(2)
+	schedules = []
+	for i in range(64):
+		s = NFLSchedule()
+		s.shuffle(i)
+		schedules.append(s)
+	scores = get_scores([s.get_matchups() for s in schedules])
+	assert scores.tolist() == [s.get_score() for s in schedules]
+
+
+def test_cached_scores():
+	"""
+	Test the cached scores are the same as the scores, and scored schedules are cache hits.
+	"""
+	
+	seed(3)
+	matchups = []
+	for i in range(32):
+		s = NFLSchedule()
+		s.shuffle(i)
+		matchups.append(s.get_matchups())
+	cache = ScoreCache(16)
+	assert get_scores(matchups, cache).tolist() == get_scores(matchups).tolist()
+	assert len(cache) == 16
+	assert get_scores(matchups[16:], cache).tolist() == get_scores(matchups[16:]).tolist()
+	assert cache.hits == 16
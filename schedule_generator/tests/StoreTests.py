@@ -0,0 +1,298 @@
+from tests.context import src
+import os
+import sqlite3
+import io
+import tempfile
+import threading
+import numpy as np
+from contextlib import contextmanager
+import pymysql.cursors
+from storage.schedule_store import SQLiteScheduleStore, MySQLScheduleStore, write_load_file, encode_schedule, decode_schedule, decode_schedules, facet_gameslots
+from schedule.score.score_calculator import score_version, constraints_version, heuristic_version
+from schedule.constants import gameslot_group
+
+
+def get_rows(num_schedules):
+	"""
+	Gets rows of distinct schedules in 2018, schedule i is the matchups in order rolled by i, with score i.
+	"""
+	return [(encode_schedule(np.roll(np.arange(256), i)), '2018', float(i)) for i in range(num_schedules)]
+
+
+@contextmanager
+def sqlite_store(batch_size=1000):
+	"""
+	Creates a SQLite schedule store in a temporary directory, removed after use.
+	"""
+	with tempfile.TemporaryDirectory() as directory:
+		with SQLiteScheduleStore(os.path.join(directory, 'schedules.db'), batch_size=batch_size) as store:
+			yield store
+
+
+def test_sqlite_store():
+	"""
+	Test inserting schedules in batches, updating the score of existing schedules, deleting schedules, and reading them back.
+	 Each write increments the version.
+	"""
+	
+	rows = get_rows(25)
+	with sqlite_store(batch_size=10) as store:
+		assert store.get_version() == 0
+		store.insert_schedules(rows)
+		store.insert_schedules([(rows[0][0], '2018', -1.0)])
+		store.delete_schedules([(rows[24][0], '2018')])
+		assert store.get_num_schedules() == 24
+		assert store.get_version() == 3
+		stored = sorted(store.get_schedules(), key=lambda row: row[2])
+	
+	assert stored == [(rows[0][0], '2018', -1.0)] + rows[1:24]
+	assert decode_schedule(stored[3][0]).tolist() == np.roll(np.arange(256), 3).tolist()
+
+
+def test_schedule_batches():
+	"""
+	Test rewriting the scores of the schedules while they are read in batches. The
+	 updates do not change the facets, or the version until it is incremented.
+	"""
+	
+	rows = get_rows(25)
+	with sqlite_store(batch_size=10) as store:
+		store.insert_schedules(rows)
+		conn = store.connection()
+		facets = conn.execute('SELECT gameslot, matchup, count FROM schedule_facets ORDER BY gameslot, matchup').fetchall()
+		sizes = []
+		for batch in store.get_schedule_batches():
+			sizes.append(len(batch))
+			store.update_scores([(schedule, year, -score) for schedule, year, score in batch])
+		assert store.get_version() == 1
+		store.increment_version()
+		assert store.get_version() == 2
+		assert conn.execute('SELECT gameslot, matchup, count FROM schedule_facets ORDER BY gameslot, matchup').fetchall() == facets
+		stored = sorted(store.get_schedules(), key=lambda row: -row[2])
+	
+	assert sizes == [10, 10, 5]
+	assert stored == [(schedule, year, -score) for schedule, year, score in rows]
+
+
+def test_stale_schedules():
+	"""
+	Test reading the schedules with a stale score. A schedule with violations is
+	 only stale if the constraints version changes.
+	"""
+	
+	rows = [(schedule, year, score - 2) for schedule, year, score in get_rows(6)]
+	with sqlite_store(batch_size=10) as store:
+		store.insert_schedules(rows)
+		assert list(store.get_schedule_batches(stale=True)) == []
+		
+		# old versions of the heuristic for schedules 0 and 2, of the constraints for 1 and 3, and none for 4
+		conn = store.connection()
+		old_heuristic = '%d.%d' % (constraints_version, heuristic_version - 1)
+		old_constraints = '%d.%d' % (constraints_version - 1, heuristic_version)
+		for i, version in [(0, old_heuristic), (1, old_constraints), (2, old_heuristic), (3, old_constraints), (4, None)]:
+			conn.execute('UPDATE schedules SET score_version = ? WHERE schedule = ?', (version, rows[i][0]))
+		conn.commit()
+		
+		stale = [row for batch in store.get_schedule_batches(stale=True) for row in batch]
+		store.update_scores(stale)
+		versions = sorted(conn.execute('SELECT score, score_version FROM schedules').fetchall())
+		assert list(store.get_schedule_batches(stale=True)) == []
+	
+	# schedule 0 has violations and the same constraints version
+	assert sorted(stale, key=lambda row: row[2]) == rows[1:5]
+	assert versions == [(-2.0, old_heuristic)] + [(row[2], score_version) for row in rows[1:]]
+
+
+def test_facets():
+	"""
+	Test the facet counts are kept on inserts and deletes, and match a recount.
+	"""
+	
+	# schedule i has matchup i % 16 in the opener
+	rows = [(encode_schedule(np.concatenate([np.roll(np.arange(16), i), np.arange(16, 256)])), '2018', float(i)) for i in range(16)]
+	with sqlite_store(batch_size=8) as store:
+		store.insert_schedules(rows)
+		store.insert_schedules(rows[:4] + [(rows[0][0], '2017', 0.0)])
+		store.delete_schedules([(rows[15][0], '2018'), (rows[15][0], '2018'), (rows[0][0], '2016')])
+		
+		conn = store.connection()
+		facets = conn.execute('SELECT gameslot, matchup, count FROM schedule_facets WHERE count != 0 ORDER BY gameslot, matchup').fetchall()
+		store.rebuild_facets()
+		assert conn.execute('SELECT gameslot, matchup, count FROM schedule_facets WHERE count != 0 ORDER BY gameslot, matchup').fetchall() == facets
+	
+	# 16 schedules in 2018 and a copy of the first in 2017, less the last, by the matchup in the opener
+	assert [(matchup, count) for gameslot, matchup, count in facets if gameslot == 0] == [(0, 2)] + [(matchup, 1) for matchup in range(1, 15)]
+	
+	# the other facet gameslots always have the same matchup
+	assert [(gameslot, matchup, count) for gameslot, matchup, count in facets if gameslot != 0] == [(gameslot, gameslot, 16) for gameslot in facet_gameslots[1:]]
+
+
+class InterleavedStore(SQLiteScheduleStore):
+	"""
+	SQLite store that starts another writer after it reads the stored schedules, and before it inserts.
+	"""
+	
+	writer = None
+	
+	def _get_existing(self, cursor, column, keys):
+		existing = super()._get_existing(cursor, column, keys)
+		if self.writer is not None:
+			self.writer.start()
+			self.writer.join(0.2)
+		return existing
+
+
+def test_concurrent_facets():
+	"""
+	Test a schedule written by two stores at the same time is counted in the facets once.
+	"""
+	
+	rows = get_rows(4)
+	with tempfile.TemporaryDirectory() as directory:
+		filepath = os.path.join(directory, 'schedules.db')
+		
+		def write():
+			with SQLiteScheduleStore(filepath) as other:
+				other.insert_schedules(rows)
+		
+		with InterleavedStore(filepath) as store:
+			store.writer = threading.Thread(target=write)
+			store.insert_schedules(rows)
+			store.writer.join()
+			
+			conn = store.connection()
+			facets = conn.execute('SELECT gameslot, matchup, count FROM schedule_facets ORDER BY gameslot, matchup').fetchall()
+			store.rebuild_facets()
+			assert conn.execute('SELECT gameslot, matchup, count FROM schedule_facets ORDER BY gameslot, matchup').fetchall() == facets
+			assert store.get_version() == 3
+	
+	assert sum(count for gameslot, matchup, count in facets if gameslot == 0) == 4
+
+
+def test_migrate_to_packed():
+	"""
+	Test migrating comma separated schedules to packed schedules.
+	"""
+	
+	with tempfile.TemporaryDirectory() as directory:
+		filepath = os.path.join(directory, 'schedules.db')
+		conn = sqlite3.connect(filepath)
+		conn.execute('CREATE TABLE schedules (schedule TEXT NOT NULL, year TEXT NOT NULL, score REAL, PRIMARY KEY (schedule, year))')
+		conn.executemany('INSERT INTO schedules VALUES (?, ?, ?)', [(','.join(str(j % 256) for j in range(i, i+256)), '2018', float(i)) for i in range(3)])
+		conn.commit()
+		conn.close()
+		
+		with SQLiteScheduleStore(filepath, batch_size=2) as store:
+			store.migrate_to_packed()
+			rows = sorted(store.get_schedules(), key=lambda row: row[2])
+	
+	assert [row[2] for row in rows] == [0.0, 1.0, 2.0]
+	assert decode_schedules([row[0] for row in rows]).tolist() == [[(j % 256) for j in range(i, i+256)] for i in range(3)]
+
+
+def test_mysql_bulk_insert():
+	"""
+	Test the MySQL insert is sent as one multiple row INSERT per batch by pymysql executemany.
+	"""
+	
+	assert pymysql.cursors.RE_INSERT_VALUES.match(MySQLScheduleStore.insert_sql)
+
+
+def test_load_file():
+	"""
+	Test the file for the MySQL bulk load has the packed columns as hex, and \\N for NULL.
+	"""
+	
+	f = io.StringIO()
+	write_load_file(f, [(bytes([0, 255]), '2018', -2.0, '1.1', bytes([16])), (bytes([1]), '2017', None, None, bytes([2]))])
+	lines = [line.split('\t') for line in f.getvalue().splitlines()]
+	
+	assert lines == [['00ff', '2018', '-2.0', '1.1', '10'], ['01', '2017', '\\N', '\\N', '02']]
+	assert bytes.fromhex(lines[0][0]) == bytes([0, 255])
+	assert MySQLScheduleStore.load_sql.count('%s') == 1
+
+
+def sunday_reordered(matchups):
+	"""
+	Swaps the gameslots of the matchups in the first two gameslots of a Sunday afternoon group.
+	"""
+	g1, g2 = [int(g) for g in np.flatnonzero(gameslot_group == np.bincount(gameslot_group).argmax())[:2]]
+	matchups = np.array(matchups)
+	m1, m2 = np.flatnonzero(matchups == g1)[0], np.flatnonzero(matchups == g2)[0]
+	matchups[[m1, m2]] = matchups[[m2, m1]]
+	return matchups
+
+
+def test_fingerprint_key():
+	"""
+	Test a schedule that only differs from a stored schedule by the order of the
+	 Sunday afternoon games is not inserted, and not counted in the facets, but
+	 updates the score of the stored schedule.
+	"""
+	
+	matchups = np.arange(256)
+	with sqlite_store() as store:
+		store.insert_schedules([(encode_schedule(matchups), '2018', 1.0)])
+		store.insert_schedules([(encode_schedule(sunday_reordered(matchups)), '2018', 2.0), (encode_schedule(sunday_reordered(matchups)), '2017', 3.0)])
+		stored = sorted(store.get_schedules(), key=lambda row: row[2])
+		facets = store.connection().execute('SELECT gameslot, count FROM schedule_facets WHERE matchup = gameslot').fetchall()
+	
+	assert stored == [(encode_schedule(matchups), '2018', 2.0), (encode_schedule(sunday_reordered(matchups)), '2017', 3.0)]
+	assert facets == [(gameslot, 2) for gameslot in facet_gameslots]
+
+
+def test_add_fingerprints():
+	"""
+	Test adding the fingerprints to a table without them deletes the identical schedules.
+	"""
+	
+	rows = [row + (score_version,) for row in get_rows(5)]
+	rows.append((encode_schedule(sunday_reordered(np.roll(np.arange(256), 2))), '2018', 2.0, score_version))
+	with tempfile.TemporaryDirectory() as directory:
+		filepath = os.path.join(directory, 'schedules.db')
+		conn = sqlite3.connect(filepath)
+		conn.execute('CREATE TABLE schedules (schedule BLOB NOT NULL, year TEXT NOT NULL, score REAL, score_version TEXT, PRIMARY KEY (schedule, year))')
+		conn.executemany('INSERT INTO schedules VALUES (?, ?, ?, ?)', rows)
+		conn.commit()
+		conn.close()
+		
+		with SQLiteScheduleStore(filepath, batch_size=4) as store:
+			store.add_fingerprints()
+			store.insert_schedules([(encode_schedule(sunday_reordered(np.roll(np.arange(256), 3))), '2018', 3.0)])
+			stored = sorted(store.get_schedules(), key=lambda row: row[2])
+	
+	assert stored == [row[:3] for row in rows[:5]]
+
+
+def test_random_schedule():
+	"""
+	Test reading a random schedule, and None from an empty store.
+	"""
+	
+	rows = get_rows(10)
+	with sqlite_store() as store:
+		assert store.get_random_schedule() is None
+		store.insert_schedules(rows)
+		store.delete_schedules([(rows[9][0], '2018')])
+		assert all(store.get_random_schedule() in rows[:9] for _ in range(20))
+
+
+def test_rewrite_version():
+	"""
+	Test the rewrite version is only incremented by the writes that change stored schedules.
+	"""
+	
+	rows = get_rows(6)
+	with sqlite_store(batch_size=4) as store:
+		store.insert_schedules(rows[:3])
+		store.insert_schedules(rows[3:])
+		assert (store.get_version(), store.get_version(rewrite=True)) == (2, 0)
+		store.insert_schedules([(rows[5][0], '2018', -1.0), (rows[0][0], '2017', 1.0)])
+		assert (store.get_version(), store.get_version(rewrite=True)) == (3, 1)
+		store.delete_schedules([(rows[4][0], '2018')])
+		assert (store.get_version(), store.get_version(rewrite=True)) == (4, 2)
+		store.update_scores([(rows[0][0], '2018', 2.0)])
+		store.increment_version()
+		assert (store.get_version(), store.get_version(rewrite=True)) == (5, 2)
+		store.increment_version(rewrite=True)
+		assert (store.get_version(), store.get_version(rewrite=True)) == (6, 3)
@@ -1,6 +1,7 @@
-from flask import Flask, render_template, request
-from utils.utils import get_num_schedules, get_schedules, get_matchups, thanksgiving_gameslots
+from flask import Flask, Response, abort, jsonify, render_template, request, stream_with_context
+from utils.utils import get_num_schedules, get_schedules, get_schedule_page, get_matchups, thanksgiving_gameslots
 import argparse
+import json
 
 
 # create flask app object
@@ -38,22 +39,79 @@ def matchup_display(matchup):
 	Format to display a matchup.
 	
 	Args:
-	  matchup: the matchup [hometeam, awayteam]
+	  matchup: the matchup [hometeam, awayteam], or [hometeam, awayteam, count]
 	
 	Return:
 	  Formatted string to display
 	"""
-	return matchup[0].split(' ')[-1] + " vs " + matchup[1].split(' ')[-1]
+	display = matchup[0].split(' ')[-1] + " vs " + matchup[1].split(' ')[-1]
+	if len(matchup) > 2:
+		display += " (%d)" % matchup[2]
+	return display
+
+
+def after_encode(after):
+	"""
+	Keyset pagination position encoding.
+	
+	Args:
+	  after: the (score, id) of a schedule, or None
+	
+	Return:
+	  The encoded position, None for None
+	"""
+	return None if after is None else '%r,%d' % after
 
 
-# get all matchups for specific gameslots
-matchups = get_matchups([0] + thanksgiving_gameslots)
+def after_decode(after):
+	"""
+	Keyset pagination position decoding, aborts with 400 if it is not a position.
+	
+	Args:
+	  after: the encoded position, or None
+	
+	Return:
+	  The decoded (score, id), None for None
+	"""
+	if after is None:
+		return None
+	try:
+		score, schedule_id = after.split(',')
+		return float(score), int(schedule_id)
+	except ValueError:
+		abort(400)
+
+
+def get_filters():
+	"""
+	Get the opener and thanksgiving game filters from the request arguments.
+	
+	Return:
+	  A dictionary of filter name to decoded matchup, ['All'] for any.
+	"""
+	return {name: matchup_decode(request.args.get(name, 'All')) for name in ['opener', 'tgm1', 'tgm2', 'tgm3']}
 
-# unique openers
-openers = [['All', 'All']] + [[matchup_encode(matchup), matchup_display(matchup)] for matchup in matchups[0]]
 
-# unique thanksgiving games
-thanksgiving_matchups = [{'n':i, 'matchups':[['All', 'All']] + [[matchup_encode(matchup), matchup_display(matchup)] for matchup in matchups[i]]} for i in range(1, len(thanksgiving_gameslots) + 1)]
+def get_dropdowns():
+	"""
+	Get the opener and thanksgiving game dropdowns, from the matchup facets, so
+	 new schedules show up without a restart.
+	
+	Return:
+	  openers: a list of [encoded matchup, display] of the openers
+	  thanksgiving_matchups: a list of {'n': game number, 'matchups': [[encoded matchup, display], ...]}
+	"""
+	
+	# get all matchups for specific gameslots
+	matchups = get_matchups([0] + thanksgiving_gameslots)
+	
+	# unique openers
+	openers = [['All', 'All']] + [[matchup_encode(matchup), matchup_display(matchup)] for matchup in matchups[0]]
+	
+	# unique thanksgiving games
+	thanksgiving_matchups = [{'n':i, 'matchups':[['All', 'All']] + [[matchup_encode(matchup), matchup_display(matchup)] for matchup in matchups[i]]} for i in range(1, len(thanksgiving_gameslots) + 1)]
+	
+	return openers, thanksgiving_matchups
 
 
 @app.route('/')
@@ -75,6 +133,9 @@ def home():
 	# get the number of schedules in the database
 	total_schedules = get_num_schedules()
 	
+	# get the dropdowns
+	openers, thanksgiving_matchups = get_dropdowns()
+	
 	# render template
 	return render_template('home.html',
 							total_schedules=total_schedules,
@@ -83,6 +144,37 @@ def home():
 							openers=openers,
 							thanksgiving_matchups=thanksgiving_matchups)
 
+@app.route('/api/schedules')
+def api_schedules():
+	"""
+	Schedules in score order as JSON, a page at a time. A page is limit
+	 schedules, at most 1000, after the position given by the after argument,
+	 and the position of its last schedule is returned for the next page. With
+	 format=ndjson, all of the schedules after the position are streamed, one
+	 JSON schedule per line.
+	"""
+	
+	# get arguments
+	filters = get_filters()
+	after = after_decode(request.args.get('after'))
+	limit = min(max(request.args.get('limit', 50, type=int), 1), 1000)
+	
+	# stream every page
+	if request.args.get('format') == 'ndjson':
+		def lines(after):
+			while True:
+				schedules, after = get_schedule_page(1000, after, **filters)
+				for schedule in schedules:
+					yield json.dumps(schedule) + '\n'
+				if after is None:
+					break
+		return Response(stream_with_context(lines(after)), mimetype='application/x-ndjson')
+	
+	# get a page of schedules
+	schedules, after = get_schedule_page(limit, after, **filters)
+	return jsonify({'schedules': schedules, 'after': after_encode(after)})
+
+
 @app.route('/contact')
 def contact():
 	return render_template('contact.html')
@@ -0,0 +1,138 @@
+from tests.context import utils
+import os
+import tempfile
+import numpy as np
+from contextlib import contextmanager
+import utils.utils
+from utils.connection_pool import ConnectionPool
+from utils.schedule_index import ScheduleIndex
+from app import after_encode, after_decode
+from tests.database import Connection, get_schedule
+
+# score of schedule i is scores[i % 5], so each score is tied, and missing for some schedules
+scores = [3.0, 3.0, None, -1.5, 3.0]
+
+
+@contextmanager
+def database(num_schedules):
+	"""
+	Writes schedules 1 to num_schedules to a database in a temporary directory,
+	 and pages them from it. Schedule i has matchup i % 2 in the opener, and
+	 matchup 161 in the first thanksgiving game.
+	"""
+	with tempfile.TemporaryDirectory() as directory:
+		filepath = os.path.join(directory, 'schedules.db')
+		rows = []
+		for i in range(1, num_schedules + 1):
+			gameslot_matchups = np.arange(256)
+			gameslot_matchups[[0, 1]] = gameslot_matchups[[i % 2, 1 - i % 2]]
+			rows.append((i, get_schedule(gameslot_matchups), scores[i % 5]))
+		conn = Connection(filepath)
+		conn.write(rows)
+		conn.close()
+		
+		pool, schedule_index = utils.utils.pool, utils.utils.schedule_index
+		utils.utils.pool = ConnectionPool(lambda: Connection(filepath))
+		utils.utils.schedule_index = ScheduleIndex(schedule_index.gameslots, utils.utils.pool.connection)
+		try:
+			yield
+		finally:
+			utils.utils.pool.close()
+			utils.utils.pool, utils.utils.schedule_index = pool, schedule_index
+
+
+def expected(ids):
+	"""
+	Orders schedules by score, missing scores last, and then by id.
+	"""
+	return sorted(ids, key=lambda i: (np.inf if scores[i % 5] is None else -scores[i % 5], i))
+
+
+def get_pages(limit, **filters):
+	"""
+	Gets every page, each starting after the encoded position of the page before, as the api does.
+	
+	Return:
+	  A list of the ids and the encoded position of each page.
+	"""
+	pages = []
+	after = None
+	while True:
+		schedules, position = utils.utils.get_schedule_page(limit, after_decode(after), **filters)
+		after = after_encode(position)
+		pages.append(([schedule['id'] for schedule in schedules], after))
+		if after is None:
+			return pages
+
+
+def test_score_ties():
+	"""
+	Test the schedules with the same score are paged in id order, and the
+	 position of a page is the score and id of its last schedule.
+	"""
+	
+	with database(23):
+		pages = get_pages(4)
+	
+	assert [schedule_id for ids, after in pages for schedule_id in ids] == expected(range(1, 24))
+	assert [len(ids) for ids, after in pages] == [4, 4, 4, 4, 4, 3]
+	assert pages[0] == ([1, 4, 5, 6], '3.0,6')
+	assert pages[2] == ([15, 16, 19, 20], '3.0,20')
+	assert pages[3] == ([21, 3, 8, 13], '-1.5,13')
+
+
+def test_missing_scores():
+	"""
+	Test the schedules without a score are paged last, in id order, after the
+	 -inf position of the page before, and the position is decoded as it is encoded.
+	"""
+	
+	with database(23):
+		pages = get_pages(4)
+		first, position = utils.utils.get_schedule_page(2, (-np.inf, 7))
+	
+	assert pages[4] == ([18, 23, 2, 7], '-inf,7')
+	assert pages[5] == ([12, 17, 22], None)
+	assert after_decode('-inf,7') == (-np.inf, 7)
+	assert after_encode(after_decode('-inf,7')) == '-inf,7'
+	assert after_decode(after_encode((-1.5, 13))) == (-1.5, 13)
+	assert [schedule['id'] for schedule in first] == [12, 17]
+	assert [schedule['score'] for schedule in first] == [None, None]
+	assert position == (-np.inf, 17)
+
+
+def test_filtered_pages():
+	"""
+	Test paging the schedules that pass filters, the positions are of the
+	 filtered schedules, across the page boundaries.
+	"""
+	
+	opener = utils.utils.matchup_team[1]
+	tgm1 = utils.utils.matchup_team[161]
+	with database(40):
+		pages = get_pages(3, opener=opener)
+		both = get_pages(5, opener=opener, tgm1=tgm1)
+		none = get_pages(5, opener=utils.utils.matchup_team[2])
+	
+	odd = expected(range(1, 41, 2))
+	assert [schedule_id for ids, after in pages for schedule_id in ids] == odd
+	assert all(after == '%r,%d' % (-np.inf if scores[ids[-1] % 5] is None else scores[ids[-1] % 5], ids[-1]) for ids, after in pages[:-1])
+	assert [schedule_id for ids, after in both for schedule_id in ids] == odd
+	assert none == [([], None)]
+
+
+def test_last_page():
+	"""
+	Test the last page has no position, also when it is full, and a page before it does.
+	"""
+	
+	with database(20):
+		full = get_pages(5)
+		short = get_pages(6)
+		one, position = utils.utils.get_schedule_page(19, None)
+	
+	assert [after is None for ids, after in full] == [False, False, False, True]
+	assert [len(ids) for ids, after in full] == [5, 5, 5, 5]
+	assert [after is None for ids, after in short] == [False, False, False, True]
+	assert [len(ids) for ids, after in short] == [6, 6, 6, 2]
+	assert len(one) == 19 and position is not None
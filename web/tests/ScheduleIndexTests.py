@@ -0,0 +1,134 @@
+from tests.context import utils
+import os
+import tempfile
+import threading
+import numpy as np
+from contextlib import contextmanager
+from utils.schedule_index import ScheduleIndex
+from tests.database import Connection, get_schedule
+
+# indexed gameslots, the opener and the thanksgiving games
+gameslots = [0, 161, 162, 163]
+
+# keys of the filters to search, none, one, several, and a matchup that is never in the opener
+filters = [[], [(0, 1)], [(161, 101)], [(163, 255)], [(0, 2), (161, 100)], [(0, 3), (161, 102), (162, 0)], [(0, 200)]]
+
+
+def random_schedule():
+	"""
+	Gets a random schedule, with one of 4 matchups in the opener, and one of 3 in the first thanksgiving game.
+	"""
+	gameslot_matchups = np.random.permutation(256)
+	for gameslot, matchup in [(0, np.random.randint(4)), (161, 100 + np.random.randint(3))]:
+		j = np.flatnonzero(gameslot_matchups == matchup)[0]
+		gameslot_matchups[[gameslot, j]] = gameslot_matchups[[j, gameslot]]
+	return gameslot_matchups
+
+
+def random_schedules(ids):
+	"""
+	Gets random schedules by id, with tied and missing scores.
+	"""
+	return {schedule_id: (random_schedule(), [None, -1.5, 1.0, 2.0, 3.0][np.random.randint(5)]) for schedule_id in ids}
+
+
+def get_rows(schedules):
+	"""
+	Gets the rows of schedules, see Connection.write.
+	"""
+	return [(schedule_id, get_schedule(gameslot_matchups), score) for schedule_id, (gameslot_matchups, score) in schedules.items()]
+
+
+def expected(schedules, keys):
+	"""
+	Searches the schedules one by one, in score order, missing scores last, and then in id order.
+	"""
+	ids = sorted((schedule_id for schedule_id, (gameslot_matchups, score) in schedules.items() if all(gameslot_matchups[gameslot] == matchup for gameslot, matchup in keys)),
+				 key=lambda schedule_id: (np.inf if schedules[schedule_id][1] is None else -schedules[schedule_id][1], schedule_id))
+	return ids, [-np.inf if schedules[schedule_id][1] is None else schedules[schedule_id][1] for schedule_id in ids]
+
+
+def search(index, keys):
+	ids, scores = index.search(keys)
+	return ids.tolist(), scores.tolist()
+
+
+def test_merge():
+	"""
+	Test the schedules written after the index is loaded are merged in, the same
+	 as an index loaded from all of the schedules.
+	"""
+	
+	np.random.seed(0)
+	schedules = random_schedules(range(1, 301))
+	with tempfile.TemporaryDirectory() as directory:
+		conn = Connection(os.path.join(directory, 'schedules.db'))
+		conn.write(get_rows({i: schedules[i] for i in range(1, 101)}))
+		index = ScheduleIndex(gameslots, None, batch_size=16)
+		index.refresh(conn, 1)
+		
+		# new schedules with the same scores as indexed ones, in two writes
+		conn.write(get_rows({i: schedules[i] for i in range(101, 251)}))
+		conn.write(get_rows({i: schedules[i] for i in range(251, 301)}))
+		index.refresh(conn, 3)
+		assert index._rebuilding is None
+		
+		loaded = ScheduleIndex(gameslots, None)
+		loaded.refresh(conn, 3)
+		conn.close()
+	
+	assert all(search(index, keys) == expected(schedules, keys) for keys in filters)
+	assert index._arrays[0].tolist() == loaded._arrays[0].tolist()
+	assert {key: ranks.tolist() for key, ranks in index._arrays[2].items()} == {key: ranks.tolist() for key, ranks in loaded._arrays[2].items()}
+
+
+def test_rebuild():
+	"""
+	Test deletes rebuild the index in the background, the old index with the
+	 new schedules merged in is searched until the rebuild replaces it, and the
+	 schedules written during the rebuild are merged in after it.
+	"""
+	
+	np.random.seed(1)
+	schedules = random_schedules(range(1, 131))
+	with tempfile.TemporaryDirectory() as directory:
+		filepath = os.path.join(directory, 'schedules.db')
+		
+		# the rebuild connects once it is allowed to
+		allowed = threading.Event()
+		@contextmanager
+		def connection():
+			allowed.wait()
+			conn = Connection(filepath)
+			try:
+				yield conn
+			finally:
+				conn.close()
+		
+		conn = Connection(filepath)
+		conn.write(get_rows({i: schedules[i] for i in range(1, 101)}))
+		index = ScheduleIndex(gameslots, connection)
+		index.refresh(conn, 1)
+		
+		# deletes, and then new schedules
+		conn.write(deletes=range(1, 101, 7))
+		conn.write(get_rows({i: schedules[i] for i in range(101, 121)}))
+		index.refresh(conn, 3)
+		rebuild = index._rebuilding
+		during = [search(index, keys) for keys in filters]
+		
+		allowed.set()
+		rebuild.join()
+		deleted = {i: schedules.pop(i) for i in range(1, 101, 7)}
+		after = [search(index, keys) for keys in filters]
+		
+		# written after the rebuild read the schedules
+		conn.write(get_rows({i: schedules[i] for i in range(121, 131)}))
+		index.refresh(conn, 4)
+		merged = [search(index, keys) for keys in filters]
+		conn.close()
+	
+	assert rebuild is not None and index._rebuilding is None
+	assert during == [expected({**{i: s for i, s in schedules.items() if i <= 120}, **deleted}, keys) for keys in filters]
+	assert after == [expected({i: s for i, s in schedules.items() if i <= 120}, keys) for keys in filters]
+	assert merged == [expected(schedules, keys) for keys in filters]
@@ -0,0 +1,78 @@
+from tests.context import utils
+import numpy as np
+from utils.utils import decode_matchups, decode_schedule, matchup_team, num_games_per_week, thanksgiving_week, thanksgiving_gameslots
+from tests.database import get_schedule
+
+
+def old_decode_matchups(gameslot_matchups):
+	"""
+	The decoder before the day labels were precomputed, appending the labels one week at a time.
+	"""
+	
+	# update gameslot matchups for each gameslot to [home, away] team
+	for i in range(len(gameslot_matchups)):
+		gameslot_matchups[i] = matchup_team[gameslot_matchups[i]][:]
+	
+	# order the schedules by gameslot
+	schedule_gameslot_matchups = [gameslot_matchups[i] for i in sorted(gameslot_matchups)]
+	
+	# week to schedule mapping
+	week_schedule = dict()
+	count = 0
+	for week_num in range(len(num_games_per_week)):
+		num_games = num_games_per_week[week_num]
+		week = schedule_gameslot_matchups[count:count+num_games]
+		if week_num != len(num_games_per_week) - 1:
+			if week_num != thanksgiving_week:
+				s = 1
+				week[0].append('THURSDAY NIGHT')
+			else:
+				s = 3
+				week[0].append('THANKSGIVING')
+				week[1].append('THANKSGIVING')
+				week[2].append('THANKSGIVING')
+			for i in range(s, len(week)-2):
+				week[i].append("SUNDAY")
+			week[-2].append('SUNDAY NIGHT')
+			week[-1].append('MONDAY NIGHT')
+		else:
+			for i in range(len(week)):
+				week[i].append("SUNDAY")
+		week_schedule[week_num+1] = week
+		count += num_games
+	
+	# return the decoded schedules
+	return week_schedule
+
+
+def test_decode_matchups():
+	"""
+	Test decoding random schedules is the same as the old decoder, from a list,
+	 a dictionary, and a packed schedule.
+	"""
+	
+	np.random.seed(0)
+	for _ in range(50):
+		gameslot_matchups = np.random.permutation(256).tolist()
+		old = old_decode_matchups(dict(enumerate(gameslot_matchups)))
+		assert decode_matchups(gameslot_matchups) == old
+		assert decode_matchups(dict(enumerate(gameslot_matchups))) == old
+		assert decode_schedule(get_schedule(gameslot_matchups)) == old
+
+
+def test_day_labels():
+	"""
+	Test the day labels of a week, the thanksgiving week and the last week.
+	"""
+	
+	gameslot_matchups = list(range(256))
+	schedule = decode_matchups(gameslot_matchups)
+	days = {week_num: [game[2] for game in week] for week_num, week in schedule.items()}
+	
+	assert list(schedule) == list(range(1, 18))
+	assert [len(week) for week in schedule.values()] == num_games_per_week
+	assert days[1] == ['THURSDAY NIGHT'] + ['SUNDAY'] * 13 + ['SUNDAY NIGHT', 'MONDAY NIGHT']
+	assert days[thanksgiving_week + 1] == ['THANKSGIVING'] * 3 + ['SUNDAY'] * 10 + ['SUNDAY NIGHT', 'MONDAY NIGHT']
+	assert days[17] == ['SUNDAY'] * 16
+	assert [game[:2] for game in schedule[thanksgiving_week + 1][:3]] == [matchup_team[gameslot] for gameslot in thanksgiving_gameslots]
+	assert schedule[17][-1][:2] == matchup_team[255]
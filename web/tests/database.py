@@ -0,0 +1,107 @@
+import sqlite3
+import numpy as np
+
+
+class Connection:
+	"""
+	SQLite connection with the part of the pymysql connection the web app uses,
+	 for the tests, with the tables the schedule generator writes.
+	"""
+	
+	def __init__(self, filepath):
+		"""
+		Connects, and creates the tables if they do not exist.
+		
+		Args:
+		  filepath: the path to the SQLite file
+		"""
+		self._conn = sqlite3.connect(filepath, check_same_thread=False)
+		self._conn.execute('CREATE TABLE IF NOT EXISTS schedules (id INTEGER PRIMARY KEY, schedule BLOB NOT NULL, year TEXT NOT NULL, score REAL)')
+		self._conn.execute('CREATE TABLE IF NOT EXISTS schedule_version (id INTEGER NOT NULL PRIMARY KEY, version INTEGER NOT NULL)')
+		self._conn.commit()
+	
+	
+	def cursor(self, cursor_class=None):
+		return Cursor(self._conn.cursor())
+	
+	
+	def ping(self, reconnect=False):
+		pass
+	
+	
+	def commit(self):
+		self._conn.commit()
+	
+	
+	def rollback(self):
+		self._conn.rollback()
+	
+	
+	def close(self):
+		self._conn.close()
+	
+	
+	def write(self, rows=(), deletes=(), rewrite=False):
+		"""
+		Writes schedules and increments the version, as the schedule generator does.
+		
+		Args:
+		  rows: a list of (id, schedule, score), see get_schedule
+		  deletes: a list of the ids of the schedules to delete
+		  rewrite: True to also increment the rewrite version
+		"""
+		self._conn.executemany("INSERT INTO schedules (id, schedule, year, score) VALUES (?, ?, '2018', ?)", rows)
+		self._conn.executemany('DELETE FROM schedules WHERE id = ?', [(schedule_id,) for schedule_id in deletes])
+		for version_id in ([0, 1] if rewrite or deletes else [0]):
+			self._conn.execute('INSERT INTO schedule_version (id, version) VALUES (?, 1) ON CONFLICT (id) DO UPDATE SET version=version+1', (version_id,))
+		self._conn.commit()
+
+
+class Cursor:
+	"""
+	SQLite cursor with pymysql parameter placeholders.
+	"""
+	
+	def __init__(self, cursor):
+		self._cursor = cursor
+	
+	
+	def __enter__(self):
+		return self
+	
+	
+	def __exit__(self, *args):
+		self.close()
+	
+	
+	def execute(self, sql, args=()):
+		self._cursor.execute(sql.replace('%s', '?'), args)
+	
+	
+	def fetchone(self):
+		return self._cursor.fetchone()
+	
+	
+	def fetchmany(self, size):
+		return self._cursor.fetchmany(size)
+	
+	
+	def fetchall(self):
+		return self._cursor.fetchall()
+	
+	
+	def close(self):
+		self._cursor.close()
+
+
+def get_schedule(gameslot_matchups):
+	"""
+	Packs a schedule as the schedule generator stores it, the gameslot of each matchup.
+	
+	Args:
+	  gameslot_matchups: the matchup of each gameslot
+	
+	Return:
+	  The packed schedule.
+	"""
+	return np.argsort(gameslot_matchups).astype(np.uint8).tobytes()
@@ -0,0 +1,62 @@
+import queue
+from contextlib import contextmanager
+
+
+class ConnectionPool:
+	"""
+	Pool of database connections, reused across requests instead of connecting
+	 for each one. Idle connections are kept up to max_size, the most recently
+	 used first, and checked with a ping when they are taken.
+	"""
+	
+	def __init__(self, connect, max_size=8):
+		"""
+		Initializes an empty pool, connections are made when they are first needed.
+		
+		Args:
+		  connect: a function that returns a new connection
+		  max_size: the maximum number of idle connections
+		"""
+		self._connect = connect
+		self._idle = queue.LifoQueue(max_size)
+	
+	
+	@contextmanager
+	def connection(self):
+		"""
+		Takes an idle connection, or connects. The connection is returned to the
+		 pool after use, with its transaction ended, so its next use sees new
+		 writes. If there is an error, the connection is closed instead.
+		
+		Yield:
+		  The connection.
+		"""
+		
+		try:
+			conn = self._idle.get_nowait()
+			conn.ping(reconnect=True)
+		except queue.Empty:
+			conn = self._connect()
+		
+		try:
+			yield conn
+			conn.rollback()
+		except:
+			conn.close()
+			raise
+		
+		try:
+			self._idle.put_nowait(conn)
+		except queue.Full:
+			conn.close()
+	
+	
+	def close(self):
+		"""
+		Closes the idle connections.
+		"""
+		while True:
+			try:
+				self._idle.get_nowait().close()
+			except queue.Empty:
+				break
@@ -2,10 +2,19 @@
 class MatchupFilter:
 
 	def __init__(self, matchup, gameslot, matchup_team):
-	
+
 		self.matchup = matchup
 		self.gameslot = gameslot
 		self.matchup_team = matchup_team
 
 	def filter(self, gameslot_matchups):	
 		return self.matchup_team[gameslot_matchups[self.gameslot]] == self.matchup
+
+	def key(self):
+		"""
+		Return:
+		  The (gameslot, matchup index) of the filter in the schedule index, the
+		   matchup index is -1 if the teams do not play.
+		"""
+		matchup = self.matchup_team.index(self.matchup) if self.matchup in self.matchup_team else -1
+		return self.gameslot, matchup
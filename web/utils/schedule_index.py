@@ -0,0 +1,273 @@
+import time
+import threading
+import numpy as np
+import pymysql
+
+
+class ScheduleIndex:
+	"""
+	In memory inverted index from (gameslot, matchup) to the schedules with the
+	 matchup in the gameslot, for a few gameslots. Schedules are numbered by their
+	 rank in score order, and each posting list is a sorted array of ranks, so the
+	 schedules that pass several filters are the intersection of the lists, and
+	 the first ranks of the intersection are the best scored schedules. The
+	 schedules written since the index was loaded are read by id and merged
+	 in, as the schedule generator writes one at a time, so new schedules get
+	 larger ids than the indexed ones. When stored schedules are changed, see the
+	 rewrite version of the schedule_version table, or the index is older than
+	 max_age, the index is rebuilt from all of the schedules in a background
+	 thread, and searched as it is until the rebuilt index replaces it.
+	"""
+	
+	def __init__(self, gameslots, connection, max_age=300, batch_size=10000):
+		"""
+		Initializes an empty index, loaded on the first refresh.
+		
+		Args:
+		  gameslots: the gameslots to index
+		  connection: a function that returns a context manager of a database
+		   connection, for the rebuilds, such as ConnectionPool.connection
+		  max_age: the number of seconds after which the index is rebuilt, even
+		   if the stored schedules did not change
+		  batch_size: the number of rows per fetch when loading
+		"""
+		self.gameslots = list(gameslots)
+		self.connection = connection
+		self.max_age = max_age
+		self.batch_size = batch_size
+		
+		# schedule id and negated score of each rank, and rank arrays keyed by
+		#  (gameslot, matchup), replaced together so a search sees one index
+		self._arrays = (np.empty(0, dtype=np.int64), np.empty(0), dict())
+		
+		# largest id indexed, version and rewrite version of the schedules, and
+		#  time of the last load, None if not loaded
+		self._max_id = 0
+		self._version = None
+		self._rewrite_version = None
+		self._loaded = None
+		
+		# the thread rebuilding the index, None if there is no rebuild
+		self._rebuilding = None
+		self._lock = threading.Lock()
+	
+	
+	def refresh(self, conn, version):
+		"""
+		Adds the schedules written since the index was loaded, if the version of
+		 the schedules changed, and starts a rebuild if stored schedules changed,
+		 or the index is older than max_age. The first refresh loads the index.
+		
+		Args:
+		  conn: a database connection
+		  version: the current version of the schedules, see the schedule_version table
+		"""
+		with self._lock:
+			if self._loaded is None:
+				self._rewrite_version = get_rewrite_version(conn)
+				self._load(conn)
+				self._version = version
+				return
+			
+			old = time.time() - self._loaded > self.max_age
+			if version == self._version and not old:
+				return
+			
+			# rebuild if stored schedules changed, the new schedules are added to
+			#  the index meanwhile
+			if (old or get_rewrite_version(conn) != self._rewrite_version) and self._rebuilding is None:
+				self._rebuilding = threading.Thread(target=self.rebuild, daemon=True)
+				self._rebuilding.start()
+			if version != self._version:
+				self._merge(*self._read(conn, self._max_id))
+				self._version = version
+	
+	
+	def rebuild(self):
+		"""
+		Loads the index from all of the schedules with a connection of its own,
+		 and replaces the index with it. The schedules written during the
+		 rebuild are added on the next refresh.
+		"""
+		try:
+			with self.connection() as conn:
+			
+				# the rewrite version of the schedules read, in the same transaction
+				rewrite_version = get_rewrite_version(conn)
+				start = time.time()
+				ids, neg_scores, gameslot_matchups = self._read(conn)
+			
+			arrays = (ids, neg_scores, self._postings(gameslot_matchups, np.arange(len(ids), dtype=np.int32)))
+			with self._lock:
+				self._arrays = arrays
+				self._max_id = int(ids.max()) if len(ids) else 0
+				self._rewrite_version = rewrite_version
+				self._version = None
+				self._loaded = start
+		finally:
+			self._rebuilding = None
+	
+	
+	def _load(self, conn):
+		"""
+		Loads the index from all of the schedules.
+		
+		Args:
+		  conn: a database connection
+		"""
+		self._loaded = time.time()
+		ids, neg_scores, gameslot_matchups = self._read(conn)
+		self._arrays = (ids, neg_scores, self._postings(gameslot_matchups, np.arange(len(ids), dtype=np.int32)))
+		self._max_id = int(ids.max()) if len(ids) else 0
+	
+	
+	def _read(self, conn, after_id=None):
+		"""
+		Reads the schedules in score order, and then in id order.
+		
+		Args:
+		  conn: a database connection
+		  after_id: only the schedules with a larger id, None for all
+		
+		Return:
+		  ids: an array of the schedule ids
+		  neg_scores: an array of the negated scores, inf for a missing score
+		  gameslot_matchups: a 2-D array, where row i is the matchup in each of the indexed gameslots of schedule i
+		"""
+		
+		ids = []
+		neg_scores = []
+		gameslot_matchups = []
+		
+		# unbuffered, the schedules are decoded one batch at a time
+		cursor = conn.cursor(pymysql.cursors.SSCursor)
+		try:
+			if after_id is None:
+				cursor.execute('SELECT id, schedule, score FROM schedules ORDER BY score DESC, id')
+			else:
+				cursor.execute('SELECT id, schedule, score FROM schedules WHERE id > %s ORDER BY score DESC, id', (after_id,))
+			rows = cursor.fetchmany(self.batch_size)
+			while rows:
+			
+				# matchup in each of the indexed gameslots, from the packed gameslot of each matchup
+				matchup_gameslot = np.frombuffer(b''.join(row[1] for row in rows), dtype=np.uint8).reshape((len(rows), -1))
+				gameslot_matchups.append(np.stack([np.argmax(matchup_gameslot == gameslot, axis=1) for gameslot in self.gameslots], axis=1))
+				ids.append(np.array([row[0] for row in rows], dtype=np.int64))
+				
+				# negated, so the ranks are in ascending order, and missing scores are last
+				neg_scores.append(np.array([np.inf if row[2] is None else -row[2] for row in rows]))
+				
+				rows = cursor.fetchmany(self.batch_size)
+		finally:
+			cursor.close()
+		
+		ids = np.concatenate(ids) if ids else np.empty(0, dtype=np.int64)
+		neg_scores = np.concatenate(neg_scores) if neg_scores else np.empty(0)
+		gameslot_matchups = np.concatenate(gameslot_matchups) if gameslot_matchups else np.empty((0, len(self.gameslots)), dtype=np.intp)
+		return ids, neg_scores, gameslot_matchups
+	
+	
+	def _postings(self, gameslot_matchups, ranks):
+		"""
+		Gets the posting lists of schedules.
+		
+		Args:
+		  gameslot_matchups: the matchups of the schedules in the indexed gameslots, see _read
+		  ranks: a sorted array of the rank of each schedule
+		
+		Return:
+		  A dictionary of (gameslot, matchup) to the sorted ranks of the schedules with the matchup in the gameslot.
+		"""
+		
+		# ranks of each matchup in each gameslot, a stable sort keeps the ranks sorted
+		postings = dict()
+		for j, gameslot in enumerate(self.gameslots):
+			order = np.argsort(gameslot_matchups[:, j], kind='stable')
+			matchups = gameslot_matchups[order, j]
+			starts = np.flatnonzero(np.diff(matchups, prepend=-1))
+			for matchup, matchup_ranks in zip(matchups[starts], np.split(ranks[order], starts[1:])):
+				postings[(gameslot, int(matchup))] = matchup_ranks
+		return postings
+	
+	
+	def _merge(self, ids, neg_scores, gameslot_matchups):
+		"""
+		Adds schedules to the index, in new arrays, so a search of the old index is not changed.
+		
+		Args:
+		  ids: the schedule ids, in score order, larger than the indexed ids, see _read
+		  neg_scores: the negated scores
+		  gameslot_matchups: the matchups in the indexed gameslots
+		"""
+		if len(ids) == 0:
+			return
+		old_ids, old_neg_scores, old_postings = self._arrays
+		
+		# each new schedule goes after the indexed schedules with the same score, as
+		#  its id is larger, and an indexed rank moves up by the new schedules before it
+		positions = np.searchsorted(old_neg_scores, neg_scores, 'right')
+		ranks = (positions + np.arange(len(ids))).astype(np.int32)
+		postings = {key: (old_ranks + np.searchsorted(positions, old_ranks, 'right')).astype(np.int32) for key, old_ranks in old_postings.items()}
+		for key, new_ranks in self._postings(gameslot_matchups, ranks).items():
+			postings[key] = np.sort(np.concatenate([postings[key], new_ranks])) if key in postings else new_ranks
+		
+		self._arrays = (np.insert(old_ids, positions, ids), np.insert(old_neg_scores, positions, neg_scores), postings)
+		self._max_id = max(self._max_id, int(ids.max()))
+	
+	
+	def search(self, keys, limit=None, after=None):
+		"""
+		Gets the best scored schedules with the matchups in the gameslots, after a
+		 position in score order, for keyset pagination.
+		
+		Args:
+		  keys: a list of (gameslot, matchup index), the gameslots need to be indexed
+		  limit: the maximum number of schedules, None for all
+		  after: the (score, id) of the schedule to start after, None for the start
+		
+		Return:
+		  ids: an array of the schedule ids, in score order, and then in id order
+		  scores: an array of the score of each schedule
+		"""
+		
+		ids, neg_scores, postings = self._arrays
+		
+		# first rank after the position, the ranks with the score are in id order
+		start = 0
+		if after is not None:
+			score, schedule_id = after
+			lo = np.searchsorted(neg_scores, -score, 'left')
+			hi = np.searchsorted(neg_scores, -score, 'right')
+			start = lo + np.searchsorted(ids[lo:hi], schedule_id, 'right')
+		
+		if not keys:
+			ranks = np.arange(start, len(ids) if limit is None else min(start + limit, len(ids)))
+		else:
+		
+			# intersect the shortest lists first
+			lists = sorted((postings.get(key, np.empty(0, dtype=np.int32)) for key in keys), key=len)
+			ranks = lists[0]
+			for other in lists[1:]:
+				if len(ranks) == 0:
+					break
+				ranks = np.intersect1d(ranks, other, assume_unique=True)
+			ranks = ranks[np.searchsorted(ranks, start):][:limit]
+		
+		return ids[ranks], -neg_scores[ranks]
+
+
+def get_rewrite_version(conn):
+	"""
+	Get the rewrite version of the schedules, incremented by the schedule
+	 generator on each write that changes stored schedules, such as a delete.
+	
+	Args:
+	  conn: a database connection
+	
+	Return:
+	  The rewrite version, 0 before the first such write.
+	"""
+	with conn.cursor() as cursor:
+		cursor.execute('SELECT version FROM schedule_version WHERE id = 1')
+		row = cursor.fetchone()
+	return 0 if row is None else row[0]
@@ -1,6 +1,11 @@
 import pymysql
+import numpy as np
+from functools import lru_cache
 from random import shuffle, randint
 from utils.filters.matchup_filter import MatchupFilter
+from utils.schedule_index import ScheduleIndex
+from utils.connection_pool import ConnectionPool
+from utils.version_cache import VersionCache
 
 
 # connection information
@@ -24,6 +29,43 @@ num_games_per_week = [16, 16, 16, 15, 15, 15, 14, 14, 13, 14, 13, 15, 16, 16, 16
 thanksgiving_gameslots = [161,162,163]
 thanksgiving_week = 11
 
+# week number and day of week of each gameslot
+gameslot_week = []
+gameslot_day = []
+for week_num in range(len(num_games_per_week)):
+	num_games = num_games_per_week[week_num]
+	if week_num == len(num_games_per_week) - 1:
+		days = ['SUNDAY'] * num_games
+	elif week_num == thanksgiving_week:
+		days = ['THANKSGIVING'] * 3 + ['SUNDAY'] * (num_games - 5) + ['SUNDAY NIGHT', 'MONDAY NIGHT']
+	else:
+		days = ['THURSDAY NIGHT'] + ['SUNDAY'] * (num_games - 3) + ['SUNDAY NIGHT', 'MONDAY NIGHT']
+	gameslot_week.extend([week_num + 1] * num_games)
+	gameslot_day.extend(days)
+
+# connections reused across requests, and results cached until the schedules are written
+pool = ConnectionPool(lambda: pymysql.connect(host, user=user, port=port, passwd=password, db=dbname))
+cache = VersionCache()
+
+# index of the gameslots the schedules are filtered by, rebuilt with connections from the pool
+schedule_index = ScheduleIndex([0] + thanksgiving_gameslots, pool.connection)
+
+
+def get_version(conn):
+	"""
+	Get the version of the schedules, incremented by the schedule generator on each write.
+	
+	Args:
+	  conn: a database connection
+	
+	Return:
+	  The version, 0 before the first write.
+	"""
+	with conn.cursor() as cursor:
+		cursor.execute('SELECT version FROM schedule_version WHERE id = 0')
+		row = cursor.fetchone()
+	return 0 if row is None else row[0]
+
 
 def get_num_schedules():
 	"""
@@ -33,67 +75,53 @@ def get_num_schedules():
 	  The number of schedules in the database.
 	"""
 
-	# schedule count
-	schedule_count = None
-	
-	try:
-		# try and get the number of rows in the database
-		conn = pymysql.connect(host, user=user, port=port, passwd=password, db=dbname)
-		with conn.cursor() as cursor:
-			cursor.execute('SELECT COUNT(*) FROM schedules')
-			schedule_count = cursor.fetchall()[0][0]
-		
-	finally:
-		conn.close()
+	with pool.connection() as conn:
+		version = get_version(conn)
 		
+		# count the rows in the database, if not cached
+		schedule_count = cache.get('count', version)
+		if schedule_count is None:
+			with conn.cursor() as cursor:
+				cursor.execute('SELECT COUNT(*) FROM schedules')
+				schedule_count = cursor.fetchall()[0][0]
+			cache.put('count', version, schedule_count)
+	
 	# return schedule count
 	return schedule_count
 
 
 def get_matchups(gameslots):
 	"""
-	Get a list of all unique matchups for a certain gameslot.
+	Get a list of all unique matchups for a certain gameslot, from the facet
+	 counts kept by the schedule generator.
 	
 	Args:
-	  gameslots: a list of gameslots
+	  gameslots: a list of facet gameslots
 	
 	Return:
-	  A list of [[[home, away], ...], [[home, away], ...], ...] for each unique matchup for each gameslots.
+	  A list of [[[home, away, count], ...], [[home, away, count], ...], ...] for each unique matchup for each gameslots,
+	   most common first, where count is the number of schedules with the matchup.
 	"""
 	
-	# a list of unique schedules
-	schedules = [[] for _ in range(len(gameslots))]
-	
-	try:
-		# try and get the schedules
-		conn = pymysql.connect(host, user=user, port=port, passwd=password, db=dbname)
-		with conn.cursor() as cursor:
-		
-			# fetch the schedules
-			cursor.execute('SELECT * FROM schedules ORDER BY score DESC')
-			all_schedules = list(cursor.fetchall())
-			
-			# for each schedule, decode and add to result if the schedule
-			#  passes all of the filters
-			for schedule in all_schedules:
-				
-				# strip and split the string as stored in the database
-				matchups_gameslot = schedule[0].strip().split(',')
-				
-				# find the matchup at gameslot i
-				for i in range(len(matchups_gameslot)):
-					for j in range(len(gameslots)):
-						gs = gameslots[j]
-						if int(matchups_gameslot[i]) == gs:
-							if matchup_team[i] not in schedules[j]:
-								schedules[j].append(matchup_team[i][:])
-							break
-	
-	finally:
-		conn.close()
+	with pool.connection() as conn:
+		version = get_version(conn)
 		
-	# return schedules
-	return schedules
+		# get the facets, if not cached
+		facets = cache.get('facets', version)
+		if facets is None:
+			with conn.cursor() as cursor:
+				cursor.execute('SELECT gameslot, matchup, count FROM schedule_facets WHERE count > 0 ORDER BY count DESC, matchup')
+				facets = cursor.fetchall()
+			cache.put('facets', version, facets)
+	
+	# gameslot to list of matchups
+	gameslot_matchups = {gameslot: [] for gameslot in gameslots}
+	for gameslot, matchup, count in facets:
+		if gameslot in gameslot_matchups:
+			gameslot_matchups[gameslot].append(matchup_team[matchup] + [count])
+	
+	# return matchups
+	return [gameslot_matchups[gameslot] for gameslot in gameslots]
 
 
 def get_schedules(num_schedules=None, opener=['All'], tgm1=['All'], tgm2=['All'], tgm3=['All']):
@@ -111,8 +139,97 @@ def get_schedules(num_schedules=None, opener=['All'], tgm1=['All'], tgm2=['All']
 	   score: the schedule score
 	"""
 
-	# a list of schedules
+	keys = get_filter_keys(opener, tgm1, tgm2, tgm3)
+	
+	with pool.connection() as conn:
+		version = get_version(conn)
+		
+		# the schedules, if the page is cached
+		schedules = cache.get(('schedules', num_schedules, tuple(keys)), version)
+		if schedules is not None:
+			return schedules
+		schedules = []
+		
+		# ids of the schedules that pass all of the filters, up to number of schedules
+		schedule_index.refresh(conn, version)
+		ids, scores = schedule_index.search(keys, num_schedules)
+		rows = fetch_schedules(conn, ids.tolist())
+		
+	# decode the schedules, in score order, skipping schedules deleted since the index was loaded
+	for schedule_id in ids.tolist():
+		if schedule_id in rows:
+			schedule = rows[schedule_id]
+			schedules.append({
+				'schedule': decode_schedule(schedule[0]),
+				'year': schedule[1],
+				'score': "%.3f" % schedule[2]
+			})
+	cache.put(('schedules', num_schedules, tuple(keys)), version, schedules)
+	
+	# return schedules
+	return schedules
+	
+
+def get_schedule_page(limit, after=None, opener=['All'], tgm1=['All'], tgm2=['All'], tgm3=['All']):
+	"""
+	Get a page of schedules in score order, and then in id order, starting after
+	 the last schedule of the previous page. The cost of a page does not depend
+	 on how many pages come before it.
+	
+	Args:
+	  limit: the number of schedules in the page
+	  after: the (score, id) of the last schedule of the previous page, None for the first page
+	  opener: the opponent for the Super Bowl champion home opener game
+	
+	Return:
+	  schedules: a list of decoded schedules of the form:
+	   id: the schedule id
+	   schedule: {week_number: [[home,away,day], [home,away,day], ...]}
+	   year: the schedule year
+	   score: the schedule score
+	  after: the (score, id) of the last schedule, None if it is the last page
+	"""
+	
+	keys = get_filter_keys(opener, tgm1, tgm2, tgm3)
+	
+	with pool.connection() as conn:
+		
+		# ids of the page, and of the first schedule of the next page if there is one
+		schedule_index.refresh(conn, get_version(conn))
+		ids, scores = schedule_index.search(keys, limit + 1, after)
+		rows = fetch_schedules(conn, ids[:limit].tolist())
+	
+	# decode the schedules, skipping schedules deleted since the index was loaded
 	schedules = []
+	for schedule_id in ids[:limit].tolist():
+		if schedule_id in rows:
+			schedule = rows[schedule_id]
+			schedules.append({
+				'id': schedule_id,
+				'schedule': decode_schedule(schedule[0]),
+				'year': schedule[1],
+				'score': schedule[2]
+			})
+	
+	# position of the last schedule of the page, from the index so deleted schedules keep their place
+	if len(ids) <= limit:
+		return schedules, None
+	return schedules, (float(scores[limit-1]), int(ids[limit-1]))
+
+
+def get_filter_keys(opener=['All'], tgm1=['All'], tgm2=['All'], tgm3=['All']):
+	"""
+	Get the schedule index keys of the opener and thanksgiving game filters.
+	
+	Args:
+	  opener: the opponent for the Super Bowl champion home opener game, ['All'] for any
+	  tgm1: the first thanksgiving game, ['All'] for any
+	  tgm2: the second thanksgiving game, ['All'] for any
+	  tgm3: the third thanksgiving game, ['All'] for any
+	
+	Return:
+	  A list of (gameslot, matchup index), see MatchupFilter.key.
+	"""
 	
 	# filters
 	filters = []
@@ -124,99 +241,84 @@ def get_schedules(num_schedules=None, opener=['All'], tgm1=['All'], tgm2=['All']
 		filters.append(MatchupFilter(matchup=tgm2, gameslot=thanksgiving_gameslots[1], matchup_team=matchup_team))
 	if tgm3 != ['All']:
 		filters.append(MatchupFilter(matchup=tgm3, gameslot=thanksgiving_gameslots[2], matchup_team=matchup_team))
+	return [f.key() for f in filters]
+
+
+def fetch_schedules(conn, ids, batch_size=1000):
+	"""
+	Fetch schedules by id.
 	
-	try:
-		# try and get the schedules
-		conn = pymysql.connect(host, user=user, port=port, passwd=password, db=dbname)
-		with conn.cursor() as cursor:
-		
-			# fetch the schedules
-			cursor.execute('SELECT * FROM schedules ORDER BY score DESC')
-			all_schedules = list(cursor.fetchall())
-			
-			# for each schedule, decode and add to result if the schedule
-			#  passes all of the filters
-			for schedule in all_schedules:
-			
-				# mapping from gameslot to matchup
-				gameslot_matchups = dict()
-				
-				# strip and split the string as stored in the database
-				matchups_gameslot = schedule[0].strip().split(',')
-				
-				# update gameslot matchups for each gameslot to [home, away] team
-				for i in range(len(matchups_gameslot)):
-					gameslot_matchups[int(matchups_gameslot[i])] = i
-				
-				# test filters
-				acceptable = True
-				for f in filters:
-					if not f.filter(gameslot_matchups):
-						acceptable = False
-					if not acceptable:
-						break
-				
-				# add decoded schedule, up to number of schedules
-				if acceptable:
-					schedules.append({
-						'schedule': decode_matchups(gameslot_matchups),
-						'year': schedule[1],
-						'score': "%.3f" % schedule[2]
-					})
-					if len(schedules) == num_schedules:
-						break
-		
-	finally:
-		conn.close()
-		
-	# return schedules
-	return schedules
+	Args:
+	  conn: a database connection
+	  ids: a list of schedule ids
+	  batch_size: the number of ids per query
+	
+	Return:
+	  A dictionary of schedule id to (schedule, year, score).
+	"""
+	
+	rows = dict()
+	with conn.cursor() as cursor:
+		for i in range(0, len(ids), batch_size):
+			batch = ids[i:i+batch_size]
+			cursor.execute('SELECT id, schedule, year, score FROM schedules WHERE id IN (%s)' % ', '.join(['%s'] * len(batch)), batch)
+			for row in cursor.fetchall():
+				rows[row[0]] = row[1:]
 	
+	return rows
+
+
+def decode_gameslot_matchup(schedule):
+	"""
+	Decode a schedule as stored in the database, one byte per matchup for the
+	 gameslot of the matchup, to the matchup of each gameslot.
+	
+	Args:
+	  schedule: the packed schedule
+	
+	Return:
+	  An array of the matchup index of each gameslot.
+	"""
+	
+	matchup_gameslot = np.frombuffer(schedule, dtype=np.uint8)
+	gameslot_matchup = np.empty(len(matchup_gameslot), dtype=np.intp)
+	gameslot_matchup[matchup_gameslot] = np.arange(len(matchup_gameslot))
+	return gameslot_matchup
+
+
+@lru_cache(maxsize=4096)
+def decode_schedule(schedule):
+	"""
+	Decode a schedule as stored in the database to team names and day of week.
+	 The most recently decoded schedules are cached, by the packed schedule, so
+	 the top scored schedules shown on every page are decoded once. The decoded
+	 schedule is shared, and should not be changed.
+	
+	Args:
+	  schedule: the packed schedule
+	
+	Return:
+	  A schedule in the form: {week_number: [[home,away,day], [home,away,day], ...]}
+	"""
+	return decode_matchups(decode_gameslot_matchup(bytes(schedule)).tolist())
+
 
 def decode_matchups(gameslot_matchups):
 	"""
 	Decode the gameslot matchup indexes to gameslot matchup team names and day of week
 	
 	Args:
-	  gameslot_matchups: a dictionary of gameslot index to matchup index.
+	  gameslot_matchups: the matchup index of each gameslot, a list or a dictionary of gameslot index to matchup index.
 	
 	Return:
 	  A schedule in the form: {week_number: [[home,away,day], [home,away,day], ...]}
 	"""
 	
-	# update gameslot matchups for each gameslot to [home, away] team
-	for i in range(len(gameslot_matchups)):
-		gameslot_matchups[i] = matchup_team[gameslot_matchups[i]][:]
-	
-	# order the schedules by gameslot
-	schedule_gameslot_matchups = [gameslot_matchups[i] for i in sorted(gameslot_matchups)]
-	
-	# week to schedule mapping
-	week_schedule = dict()
-	count = 0
-	for week_num in range(len(num_games_per_week)):
-		num_games = num_games_per_week[week_num]
-		week = schedule_gameslot_matchups[count:count+num_games]
-		if week_num != len(num_games_per_week) - 1:
-			if week_num != thanksgiving_week:
-				s = 1
-				week[0].append('THURSDAY NIGHT')
-			else:
-				s = 3
-				week[0].append('THANKSGIVING')
-				week[1].append('THANKSGIVING')
-				week[2].append('THANKSGIVING')
-			for i in range(s, len(week)-2):
-				week[i].append("SUNDAY")
-			week[-2].append('SUNDAY NIGHT')
-			week[-1].append('MONDAY NIGHT')
-		else:
-			for i in range(len(week)):
-				week[i].append("SUNDAY")
-		week_schedule[week_num+1] = week
-		count += num_games
+	# week to schedule mapping, in gameslot order
+	week_schedule = {week_num: [] for week_num in range(1, len(num_games_per_week) + 1)}
+	for i in range(len(gameslot_week)):
+		home, away = matchup_team[gameslot_matchups[i]]
+		week_schedule[gameslot_week[i]].append([home, away, gameslot_day[i]])
 	
 	# return the decoded schedules
 	return week_schedule
-
-	
@@ -0,0 +1,64 @@
+import time
+import threading
+from collections import OrderedDict
+
+
+class VersionCache:
+	"""
+	Least recently used cache of query results, each stored with the version of
+	 the schedules it was computed from, see the schedule_version table. A result
+	 is stale, and not returned, once the schedule generator writes a new version,
+	 or after ttl seconds.
+	"""
+	
+	def __init__(self, maxsize=256, ttl=300):
+		"""
+		Initializes an empty cache.
+		
+		Args:
+		  maxsize: the maximum number of results
+		  ttl: the number of seconds a result is kept
+		"""
+		self.maxsize = maxsize
+		self.ttl = ttl
+		self._results = OrderedDict()
+		self._lock = threading.Lock()
+	
+	
+	def get(self, key, version):
+		"""
+		Gets a result.
+		
+		Args:
+		  key: the key of the result
+		  version: the current version of the schedules
+		
+		Return:
+		  The result, None if it is not cached or is stale.
+		"""
+		with self._lock:
+			entry = self._results.get(key)
+			if entry is None:
+				return None
+			result, result_version, expires = entry
+			if result_version != version or time.time() > expires:
+				del self._results[key]
+				return None
+			self._results.move_to_end(key)
+			return result
+	
+	
+	def put(self, key, version, result):
+		"""
+		Adds a result, and removes the least recently used result if the cache is full.
+		
+		Args:
+		  key: the key of the result
+		  version: the version of the schedules the result was computed from
+		  result: the result
+		"""
+		with self._lock:
+			self._results[key] = (result, version, time.time() + self.ttl)
+			self._results.move_to_end(key)
+			if len(self._results) > self.maxsize:
+				self._results.popitem(last=False)